@@ -0,0 +1,65 @@
+"""
+Phase 11: World Catalog
+
+Static world data (locations and their exits, items, factions) only
+changes when the server is deployed, so clients fetch it once from
+GET /world/catalog instead of receiving it with every action. The catalog
+is built once and hashed (sha256 of its canonical JSON), and the hash
+doubles as the ETag. Action states carry only location ids plus
+`catalog_hash`. A client refetches the catalog when the hash changes,
+and a conditional request with If-None-Match gets 304.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+from .factions import FACTIONS
+from .items import ITEMS
+from .world import WORLD
+
+
+def location_summary(location_id: str) -> Dict[str, Any]:
+    """How a location is referenced in action states; the rest is in the catalog."""
+    return {"id": location_id}
+
+
+def _build_catalog() -> Dict[str, Any]:
+    return {
+        "locations": {
+            loc.id: {
+                "id": loc.id,
+                "name": loc.name,
+                "description": loc.description,
+                "exits": [{"to": e.to, "label": e.label} for e in loc.exits],
+            }
+            for loc in WORLD.values()
+        },
+        "items": {item_id: item.model_dump() for item_id, item in ITEMS.items()},
+        "factions": {
+            faction_id: {
+                "faction_id": faction_id,
+                "name": faction.name,
+                "alignment": faction.alignment,
+                "description": faction.description,
+                "influence_locations": faction.influence_locations,
+            }
+            for faction_id, faction in FACTIONS.items()
+        },
+    }
+
+
+@lru_cache(maxsize=1)
+def get_catalog() -> Tuple[Dict[str, Any], str]:
+    """(catalog with its hash, ETag). Built on first use; the world data is static."""
+    catalog = _build_catalog()
+    canonical = json.dumps(catalog, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(canonical.encode()).hexdigest()[:16]
+    return {"hash": digest, **catalog}, f'"{digest}"'
+
+
+def catalog_hash() -> str:
+    return get_catalog()[0]["hash"]
@@ -1,25 +1,189 @@
 from __future__ import annotations
 
+import itertools
 import json
+import random
 import sqlite3
 import time
-from typing import Optional, Any, Dict, List
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable, Iterator, Optional, Any, Dict, List, Tuple
 
 from .types import Player
+from .types_quests import Quest
+from .factions import decay_reputation, get_standing_tier
 
 
 DB_PATH = "game.sqlite"
 
 
+# Set while a transaction() block is running in this context
+_shared_conn: ContextVar[Optional[sqlite3.Connection]] = ContextVar("db_shared_conn", default=None)
+
+
+class _Hooks:
+    """In-memory side effects waiting on the innermost transaction() block."""
+
+    __slots__ = ("after_commit", "on_rollback")
+
+    def __init__(self):
+        self.after_commit: List[Callable[[], None]] = []
+        self.on_rollback: List[Callable[[], None]] = []
+
+
+_hooks: ContextVar[Optional[_Hooks]] = ContextVar("db_tx_hooks", default=None)
+
+
 def get_conn() -> sqlite3.Connection:
+    shared = _shared_conn.get()
+    if shared is not None:
+        return _NestedConnection(shared)
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+class _NestedConnection:
+    """
+    What get_conn() returns inside transaction(): the shared connection, with
+    each caller's own transaction mapped onto a savepoint. commit() releases
+    it, rollback() (or close() without commit, as with sqlite3) undoes just
+    that caller's writes, and BEGIN starts the savepoint. Nothing is durable
+    until the enclosing transaction() commits.
+    """
+
+    _names = itertools.count()
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._savepoint: Optional[str] = None
+
+    def _begin(self) -> None:
+        if self._savepoint is None:
+            self._savepoint = f"nested_{next(self._names)}"
+            self._conn.execute(f"SAVEPOINT {self._savepoint}")
+
+    def execute(self, sql: str, params: Any = ()) -> sqlite3.Cursor:
+        self._begin()
+        if sql.lstrip()[:5].upper() == "BEGIN":
+            return self._conn.execute("SELECT 1")
+        return self._conn.execute(sql, params)
+
+    def executemany(self, sql: str, seq_of_params: Any) -> sqlite3.Cursor:
+        self._begin()
+        return self._conn.executemany(sql, seq_of_params)
+
+    def commit(self) -> None:
+        if self._savepoint is not None:
+            self._conn.execute(f"RELEASE {self._savepoint}")
+            self._savepoint = None
+
+    def rollback(self) -> None:
+        if self._savepoint is not None:
+            self._conn.execute(f"ROLLBACK TO {self._savepoint}")
+            self._conn.execute(f"RELEASE {self._savepoint}")
+            self._savepoint = None
+
+    def close(self) -> None:
+        self.rollback()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+@contextmanager
+def transaction() -> Iterator[None]:
+    """
+    Run every db call in the block on one connection, inside one write
+    transaction that commits when the block exits (or rolls back if it
+    raises). Takes the write lock up front, so optimistic version checks
+    can't conflict inside the block. A nested block runs in a savepoint of
+    the outer one: if it raises, only its own writes are undone.
+
+    In-memory side effects registered with after_commit() run once the
+    outermost block commits, and are dropped if theirs rolls back; those
+    registered with on_rollback() run if theirs rolls back.
+    """
+    shared = _shared_conn.get()
+    if shared is not None:
+        yield from _savepoint(shared)
+        return
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("BEGIN IMMEDIATE")
+    hooks = _Hooks()
+    token = _shared_conn.set(conn)
+    hooks_token = _hooks.set(hooks)
+    committed = False
+    try:
+        yield
+        conn.execute("COMMIT")
+        committed = True
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        _hooks.reset(hooks_token)
+        _shared_conn.reset(token)
+        conn.close()
+        _run_hooks(hooks.after_commit if committed else reversed(hooks.on_rollback))
+
+
+def _savepoint(conn: sqlite3.Connection) -> Iterator[None]:
+    name = f"nested_{next(_NestedConnection._names)}"
+    conn.execute(f"SAVEPOINT {name}")
+    outer = _hooks.get()
+    hooks = _Hooks()
+    token = _hooks.set(hooks)
+    try:
+        yield
+    except BaseException:
+        _hooks.reset(token)
+        conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        _run_hooks(reversed(hooks.on_rollback))
+        raise
+    _hooks.reset(token)
+    conn.execute(f"RELEASE {name}")
+    outer.after_commit.extend(hooks.after_commit)
+    outer.on_rollback.extend(hooks.on_rollback)
+
+
+def _run_hooks(hooks: Iterable[Callable[[], None]]) -> None:
+    # The same hook (e.g. a registry reload) registered by several blocks runs once
+    for hook in dict.fromkeys(hooks):
+        try:
+            hook()
+        except Exception as e:
+            print(f"[DB] Transaction hook failed: {e!r}")
+
+
+def in_transaction() -> bool:
+    return _shared_conn.get() is not None
+
+
+def after_commit(fn: Callable[[], None]) -> None:
+    """Run fn once the enclosing transaction() commits (now, outside one); dropped on rollback."""
+    hooks = _hooks.get()
+    if hooks is None:
+        fn()
+    else:
+        hooks.after_commit.append(fn)
+
+
+def on_rollback(fn: Callable[[], None]) -> None:
+    """Run fn if the enclosing transaction() block rolls back (never, outside one)."""
+    hooks = _hooks.get()
+    if hooks is not None:
+        hooks.on_rollback.append(fn)
+
+
 def init_db() -> None:
     conn = get_conn()
     try:
+        # Must precede table creation to take effect on a new database;
+        # lets compaction return freed pages with PRAGMA incremental_vacuum
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
         conn.execute("PRAGMA journal_mode=WAL;")
         conn.executescript(
             """
@@ -37,7 +201,8 @@ def init_db() -> None:
               archived_quests_json TEXT DEFAULT '{}',
               last_defeated_at INTEGER,
               last_attacked_target TEXT,
-              last_attacked_at INTEGER
+              last_attacked_at INTEGER,
+              version INTEGER NOT NULL DEFAULT 0
             );
 
             CREATE TABLE IF NOT EXISTS action_log (
@@ -55,9 +220,17 @@ def init_db() -> None:
               to_player_id TEXT NOT NULL,
               offered_items_json TEXT NOT NULL,
               requested_items_json TEXT NOT NULL,
-              created_at INTEGER NOT NULL
+              created_at INTEGER NOT NULL,
+              expires_at INTEGER
             );
 
+            -- Trade listings page through each player's offers oldest first
+            CREATE INDEX IF NOT EXISTS idx_pending_trades_to_created
+              ON pending_trades (to_player_id, created_at, trade_id);
+
+            CREATE INDEX IF NOT EXISTS idx_pending_trades_from_created
+              ON pending_trades (from_player_id, created_at, trade_id);
+
             -- Phase 8: World clock and state
             CREATE TABLE IF NOT EXISTS world_clock (
               id INTEGER PRIMARY KEY CHECK (id = 1),
@@ -71,6 +244,13 @@ def init_db() -> None:
               updated_turn INTEGER NOT NULL
             );
 
+            CREATE TABLE IF NOT EXISTS world_counters (
+              key TEXT PRIMARY KEY,
+              value INTEGER NOT NULL DEFAULT 0,
+              updated_at INTEGER NOT NULL,
+              updated_turn INTEGER NOT NULL
+            );
+
             CREATE TABLE IF NOT EXISTS world_events (
               id INTEGER PRIMARY KEY AUTOINCREMENT,
               turn INTEGER NOT NULL,
@@ -80,6 +260,19 @@ def init_db() -> None:
               created_at INTEGER NOT NULL
             );
 
+            CREATE TABLE IF NOT EXISTS scheduled_events (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              due_turn INTEGER NOT NULL,
+              event_type TEXT NOT NULL,
+              location_id TEXT,
+              data_json TEXT NOT NULL,
+              created_at INTEGER NOT NULL,
+              created_turn INTEGER NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_scheduled_events_due_turn
+              ON scheduled_events (due_turn);
+
             -- Phase 9: Factions and reputation
             CREATE TABLE IF NOT EXISTS factions (
               faction_id TEXT PRIMARY KEY,
@@ -100,6 +293,38 @@ def init_db() -> None:
               created_at INTEGER NOT NULL
             );
 
+            CREATE INDEX IF NOT EXISTS idx_reputation_events_player_faction
+              ON reputation_events (player_id, faction_id);
+
+            CREATE INDEX IF NOT EXISTS idx_reputation_events_turn
+              ON reputation_events (turn);
+
+            -- Folded totals of compacted reputation_events
+            CREATE TABLE IF NOT EXISTS reputation_checkpoints (
+              player_id TEXT NOT NULL,
+              faction_id TEXT NOT NULL,
+              total INTEGER NOT NULL,
+              events_folded INTEGER NOT NULL,
+              through_turn INTEGER NOT NULL,
+              updated_at INTEGER NOT NULL,
+              PRIMARY KEY (player_id, faction_id)
+            );
+
+            -- Running reputation totals, ordered per faction for leaderboards
+            CREATE TABLE IF NOT EXISTS reputation_totals (
+              player_id TEXT NOT NULL,
+              faction_id TEXT NOT NULL,
+              total INTEGER NOT NULL,
+              updated_at INTEGER NOT NULL,
+              standing REAL NOT NULL DEFAULT 0,
+              standing_turn INTEGER NOT NULL DEFAULT 0,
+              notified_tier TEXT NOT NULL DEFAULT 'Neutral',
+              PRIMARY KEY (player_id, faction_id)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_reputation_totals_rank
+              ON reputation_totals (faction_id, total DESC, player_id);
+
             -- Phase 10: Parties and alliances
             CREATE TABLE IF NOT EXISTS parties (
               party_id TEXT PRIMARY KEY,
@@ -122,9 +347,55 @@ def init_db() -> None:
               party_id TEXT NOT NULL,
               from_player_id TEXT NOT NULL,
               to_player_id TEXT NOT NULL,
+              created_at INTEGER NOT NULL,
+              expires_at INTEGER
+            );
+
+            -- Phase 11: Marketplace
+            CREATE TABLE IF NOT EXISTS market_orders (
+              order_id INTEGER PRIMARY KEY AUTOINCREMENT,  -- Also time priority
+              player_id TEXT NOT NULL,
+              item TEXT NOT NULL,
+              side TEXT NOT NULL,            -- 'buy' or 'sell'
+              price INTEGER NOT NULL,        -- Coins per unit
+              quantity INTEGER NOT NULL,
+              remaining INTEGER NOT NULL,
+              status TEXT NOT NULL,          -- 'open', 'filled' or 'cancelled'
+              created_at INTEGER NOT NULL,
+              updated_at INTEGER NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_market_orders_open
+              ON market_orders (status, item);
+
+            CREATE INDEX IF NOT EXISTS idx_market_orders_player
+              ON market_orders (player_id, status);
+
+            CREATE TABLE IF NOT EXISTS market_fills (
+              fill_id INTEGER PRIMARY KEY AUTOINCREMENT,
+              item TEXT NOT NULL,
+              price INTEGER NOT NULL,
+              quantity INTEGER NOT NULL,
+              buy_order_id INTEGER NOT NULL,
+              sell_order_id INTEGER NOT NULL,
+              buyer_id TEXT NOT NULL,
+              seller_id TEXT NOT NULL,
               created_at INTEGER NOT NULL
             );
 
+            -- Responses to requests sent with an Idempotency-Key, replayed on retries
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+              player_id TEXT NOT NULL,
+              idempotency_key TEXT NOT NULL,
+              request_hash TEXT NOT NULL,
+              response_json TEXT NOT NULL,
+              expires_at INTEGER NOT NULL,
+              PRIMARY KEY (player_id, idempotency_key)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires
+              ON idempotency_keys(expires_at);
+
             -- Initialize world clock if not exists
             INSERT OR IGNORE INTO world_clock (id, current_turn) VALUES (1, 0);
             """
@@ -198,6 +469,7 @@ def _migrate_schema(conn: sqlite3.Connection) -> None:
         "last_defeated_at": "INTEGER",
         "last_attacked_target": "TEXT",
         "last_attacked_at": "INTEGER",
+        "version": "INTEGER NOT NULL DEFAULT 0",
     }
     
     # Add missing columns
@@ -214,10 +486,122 @@ def _migrate_schema(conn: sqlite3.Connection) -> None:
         CREATE UNIQUE INDEX IF NOT EXISTS idx_players_name_lower 
         ON players (LOWER(name))
     """)
+
+    _migrate_world_counters(conn)
+    _backfill_reputation_totals(conn)
+    _migrate_reputation_standing(conn)
+    _migrate_offer_expiry(conn)
     
     conn.commit()
 
 
+def _backfill_reputation_totals(conn: sqlite3.Connection) -> None:
+    """Build reputation_totals from checkpoints and events on databases that predate it."""
+    if conn.execute("SELECT 1 FROM reputation_totals LIMIT 1").fetchone():
+        return
+    conn.execute(
+        """
+        INSERT INTO reputation_totals (player_id, faction_id, total, updated_at)
+        SELECT player_id, faction_id, SUM(total), ?
+        FROM (
+          SELECT player_id, faction_id, total FROM reputation_checkpoints
+          UNION ALL
+          SELECT player_id, faction_id, value FROM reputation_events
+        )
+        GROUP BY player_id, faction_id
+        """,
+        (int(time.time() * 1000),),
+    )
+    _recompute_reputation_standing(conn)
+
+
+def _migrate_reputation_standing(conn: sqlite3.Connection) -> None:
+    """Add decayed-standing columns to reputation_totals tables created before them."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(reputation_totals)").fetchall()}
+    expected_columns = {
+        "standing": "REAL NOT NULL DEFAULT 0",
+        "standing_turn": "INTEGER NOT NULL DEFAULT 0",
+        "notified_tier": "TEXT NOT NULL DEFAULT 'Neutral'",
+    }
+    missing = [name for name in expected_columns if name not in columns]
+    for column_name in missing:
+        conn.execute(f"ALTER TABLE reputation_totals ADD COLUMN {column_name} {expected_columns[column_name]}")
+    if missing:
+        _recompute_reputation_standing(conn)
+
+
+def _migrate_offer_expiry(conn: sqlite3.Connection) -> None:
+    """Add expires_at to trade offers and party invites; existing rows get the default TTL."""
+    for table, ttl_ms in (("pending_trades", TRADE_OFFER_TTL_MS), ("party_invites", PARTY_INVITE_TTL_MS)):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+        if "expires_at" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN expires_at INTEGER")
+        conn.execute(f"UPDATE {table} SET expires_at = created_at + ? WHERE expires_at IS NULL", (ttl_ms,))
+
+    conn.executescript(
+        """
+        CREATE INDEX IF NOT EXISTS idx_pending_trades_expires_at ON pending_trades (expires_at);
+        -- Per-player trade lookups use idx_pending_trades_{to,from}_created (keyset order)
+        DROP INDEX IF EXISTS idx_pending_trades_to_player;
+        DROP INDEX IF EXISTS idx_pending_trades_from_player;
+        CREATE INDEX IF NOT EXISTS idx_party_invites_expires_at ON party_invites (expires_at);
+        CREATE INDEX IF NOT EXISTS idx_party_invites_to_player ON party_invites (to_player_id, expires_at);
+        CREATE INDEX IF NOT EXISTS idx_party_invites_from_player ON party_invites (from_player_id, expires_at);
+        """
+    )
+
+
+def _register_reputation_functions(conn: sqlite3.Connection) -> None:
+    """Expose the decay and tier functions to SQL on this connection."""
+    conn.create_function("reputation_decay", 3, decay_reputation, deterministic=True)
+    conn.create_function("reputation_tier", 1, get_standing_tier, deterministic=True)
+
+
+def _recompute_reputation_standing(conn: sqlite3.Connection) -> None:
+    """
+    Rebuild decayed standing from history. Compacted checkpoints decay from
+    their through_turn. Migration only; normal writes update standing in place.
+    """
+    _register_reputation_functions(conn)
+    turn_row = conn.execute("SELECT current_turn FROM world_clock WHERE id = 1").fetchone()
+    turn = turn_row["current_turn"] if turn_row else 0
+    conn.execute(
+        """
+        UPDATE reputation_totals SET
+          standing = COALESCE((
+            SELECT SUM(reputation_decay(h.value, h.turn, :turn)) FROM (
+              SELECT player_id, faction_id, total AS value, through_turn AS turn FROM reputation_checkpoints
+              UNION ALL
+              SELECT player_id, faction_id, value, turn FROM reputation_events
+            ) h
+            WHERE h.player_id = reputation_totals.player_id
+              AND h.faction_id = reputation_totals.faction_id
+          ), 0),
+          standing_turn = :turn
+        """,
+        {"turn": turn},
+    )
+    conn.execute("UPDATE reputation_totals SET notified_tier = reputation_tier(standing)")
+
+
+# world_state keys that used to hold stringified integers
+_LEGACY_COUNTER_KEYS = ("forest_rat_turns",)
+
+
+def _migrate_world_counters(conn: sqlite3.Connection) -> None:
+    """Move legacy integer world_state values into the typed world_counters table."""
+    placeholders = ",".join("?" * len(_LEGACY_COUNTER_KEYS))
+    conn.execute(
+        f"""
+        INSERT OR IGNORE INTO world_counters (key, value, updated_at, updated_turn)
+        SELECT key, CAST(value AS INTEGER), updated_at, updated_turn
+        FROM world_state WHERE key IN ({placeholders})
+        """,
+        _LEGACY_COUNTER_KEYS,
+    )
+    conn.execute(f"DELETE FROM world_state WHERE key IN ({placeholders})", _LEGACY_COUNTER_KEYS)
+
+
 def _build_player_from_row(row: sqlite3.Row) -> Player:
     """Helper function to build a Player object from a database row."""
     data = dict(row)
@@ -248,6 +632,48 @@ def get_player(player_id: str) -> Optional[Player]:
     finally:
         conn.close()
 
+def get_player_location(player_id: str) -> Optional[str]:
+    """The player's current location, or None for an unknown player."""
+    conn = get_conn()
+    try:
+        row = conn.execute("SELECT location FROM players WHERE player_id = ?", (player_id,)).fetchone()
+        return row["location"] if row else None
+    finally:
+        conn.close()
+
+def get_players(player_ids: List[str]) -> List[Player]:
+    """Load several players in one query, in the order given (missing IDs are skipped)."""
+    if not player_ids:
+        return []
+    conn = get_conn()
+    try:
+        placeholders = ",".join("?" * len(player_ids))
+        rows = conn.execute(
+            f"SELECT * FROM players WHERE player_id IN ({placeholders})",
+            list(player_ids),
+        ).fetchall()
+        by_id = {row["player_id"]: row for row in rows}
+        return [_build_player_from_row(by_id[pid]) for pid in player_ids if pid in by_id]
+    finally:
+        conn.close()
+
+def load_active_quests() -> Dict[str, Dict[str, Quest]]:
+    """Load every player's active quests (used to build the quest objective index)."""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            "SELECT player_id, active_quests_json FROM players WHERE active_quests_json != '{}'"
+        ).fetchall()
+        return {
+            row["player_id"]: {
+                quest_id: Quest.model_validate(quest)
+                for quest_id, quest in json.loads(row["active_quests_json"] or "{}").items()
+            }
+            for row in rows
+        }
+    finally:
+        conn.close()
+
 def get_player_by_name(name: str) -> Optional[Player]:
     """Get a player by their name (case-insensitive)."""
     conn = get_conn()
@@ -275,64 +701,168 @@ def get_players_at_location(location_id: str) -> List[Player]:
     finally:
         conn.close()
 
+def get_player_ids_at_location(location_id: str) -> List[str]:
+    """Get the IDs of all players at a location."""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            "SELECT player_id FROM players WHERE location = ?",
+            (location_id,),
+        ).fetchall()
+        return [row["player_id"] for row in rows]
+    finally:
+        conn.close()
+
+def get_player_names(player_ids: List[str]) -> Dict[str, str]:
+    """Get player_id -> name for the given players in one query."""
+    if not player_ids:
+        return {}
+    conn = get_conn()
+    try:
+        placeholders = ",".join("?" * len(player_ids))
+        rows = conn.execute(
+            f"SELECT player_id, name FROM players WHERE player_id IN ({placeholders})",
+            list(player_ids),
+        ).fetchall()
+        return {row["player_id"]: row["name"] for row in rows}
+    finally:
+        conn.close()
+
+_UPSERT_PLAYER_SQL = """
+    INSERT INTO players (
+      player_id,
+      name,
+      location,
+      level,
+      xp,
+      hp,
+      max_hp,
+      inventory_json,
+      active_quests_json,
+      completed_quests_json,
+      archived_quests_json,
+      last_defeated_at,
+      last_attacked_target,
+      last_attacked_at,
+      version
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(player_id) DO UPDATE SET
+      name=excluded.name,
+      location=excluded.location,
+      level=excluded.level,
+      xp=excluded.xp,
+      hp=excluded.hp,
+      max_hp=excluded.max_hp,
+      inventory_json=excluded.inventory_json,
+      active_quests_json=excluded.active_quests_json,
+      completed_quests_json=excluded.completed_quests_json,
+      archived_quests_json=excluded.archived_quests_json,
+      last_defeated_at=excluded.last_defeated_at,
+      last_attacked_target=excluded.last_attacked_target,
+      last_attacked_at=excluded.last_attacked_at,
+      version=players.version + 1
+    WHERE players.version = excluded.version
+    RETURNING version
+    """
+
+
+def _player_params(p: Player) -> tuple:
+    return (
+        p.player_id,
+        p.name,
+        p.location,
+        p.level,
+        p.xp,
+        p.hp,
+        p.max_hp,
+        json.dumps(p.inventory),
+        json.dumps({k: v.model_dump() for k, v in p.active_quests.items()}),
+        json.dumps({k: v.model_dump() for k, v in p.completed_quests.items()}),
+        json.dumps({k: v.model_dump() for k, v in p.archived_quests.items()}),
+        p.last_defeated_at,
+        p.last_attacked_target,
+        p.last_attacked_at,
+        p.version,
+    )
+
+
+class StalePlayerError(RuntimeError):
+    """A player row changed since it was read; the write was not applied."""
+
+    def __init__(self, player_id: str):
+        super().__init__(f"Player {player_id} was modified concurrently")
+        self.player_id = player_id
+
+
+def _write_player(conn: sqlite3.Connection, p: Player) -> None:
+    # Compare-and-swap on version: the update only applies if nobody wrote
+    # the row since p was read. On success p carries the new version.
+    row = conn.execute(_UPSERT_PLAYER_SQL, _player_params(p)).fetchone()
+    if row is None:
+        raise StalePlayerError(p.player_id)
+    p.version = row["version"]
+
+
 def upsert_player(p: Player) -> None:
+    """Save a player. Raises StalePlayerError if it changed since it was read."""
     conn = get_conn()
     try:
-        conn.execute(
-            """
-            INSERT INTO players (
-              player_id,
-              name,
-              location,
-              level,
-              xp,
-              hp,
-              max_hp,
-              inventory_json,
-              active_quests_json,
-              completed_quests_json,
-              archived_quests_json,
-              last_defeated_at,
-              last_attacked_target,
-              last_attacked_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(player_id) DO UPDATE SET
-              name=excluded.name,
-              location=excluded.location,
-              level=excluded.level,
-              xp=excluded.xp,
-              hp=excluded.hp,
-              max_hp=excluded.max_hp,
-              inventory_json=excluded.inventory_json,
-              active_quests_json=excluded.active_quests_json,
-              completed_quests_json=excluded.completed_quests_json,
-              archived_quests_json=excluded.archived_quests_json,
-              last_defeated_at=excluded.last_defeated_at,
-              last_attacked_target=excluded.last_attacked_target,
-              last_attacked_at=excluded.last_attacked_at
-            """,
-            (
-                p.player_id,
-                p.name,
-                p.location,
-                p.level,
-                p.xp,
-                p.hp,
-                p.max_hp,
-                json.dumps(p.inventory),
-                json.dumps({k: v.model_dump() for k, v in p.active_quests.items()}),
-                json.dumps({k: v.model_dump() for k, v in p.completed_quests.items()}),
-                json.dumps({k: v.model_dump() for k, v in p.archived_quests.items()}),
-                p.last_defeated_at,
-                p.last_attacked_target,
-                p.last_attacked_at,
-            ),
-        )
+        _write_player(conn, p)
         conn.commit()
+    except StalePlayerError:
+        conn.rollback()
+        raise
     finally:
         conn.close()
 
+
+def upsert_players(players: List[Player]) -> None:
+    """Save several players in one transaction; all or none (StalePlayerError)."""
+    if not players:
+        return
+    conn = get_conn()
+    versions = [p.version for p in players]
+    try:
+        for p in players:
+            _write_player(conn, p)
+        conn.commit()
+    except StalePlayerError:
+        conn.rollback()
+        for p, version in zip(players, versions):
+            p.version = version
+        raise
+    finally:
+        conn.close()
+
+
+# Attempts for optimistic read-modify-write loops before giving up
+OPTIMISTIC_RETRIES = 5
+
+
+def modify_players(
+    player_ids: List[str],
+    mutate: Callable[[Player], Any],
+    attempts: int = OPTIMISTIC_RETRIES,
+) -> List[Tuple[Player, Any]]:
+    """
+    Optimistic read-modify-write for players other than the acting one.
+    Loads the players, calls mutate(player) on each (a truthy result marks it
+    changed), and saves the changed ones in one transaction. On a version
+    conflict everything is reloaded and re-applied. Returns (player, result)
+    pairs from the attempt that committed.
+    """
+    for attempt in range(attempts):
+        results = [(p, mutate(p)) for p in get_players(player_ids)]
+        try:
+            upsert_players([p for p, result in results if result])
+            return results
+        except StalePlayerError:
+            print(f"[OPTIMISTIC] Conflict updating {len(player_ids)} players (attempt {attempt + 1})")
+            time.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+    raise StalePlayerError(",".join(player_ids))
+
+
 def log_action(*, player_id: str, action: str, args: Any, result: Any) -> None:
     conn = get_conn()
     try:
@@ -348,22 +878,39 @@ def log_action(*, player_id: str, action: str, args: Any, result: Any) -> None:
         conn.close()
 
 
+# Trade offers and party invites expire; the scheduler sweeps expired rows
+TRADE_OFFER_TTL_MS = 10 * 60 * 1000
+PARTY_INVITE_TTL_MS = 5 * 60 * 1000
+MAX_OUTSTANDING_TRADE_OFFERS = 10  # Per sender
+MAX_OUTSTANDING_PARTY_INVITES = 10  # Per sender
+EXPIRY_SWEEP_BATCH = 500
+
+
+def _decode_trade(row: sqlite3.Row) -> Dict[str, Any]:
+    data = dict(row)
+    data["offered_items"] = json.loads(data["offered_items_json"])
+    data["requested_items"] = json.loads(data["requested_items_json"])
+    return data
+
+
 def create_pending_trade(
     trade_id: str,
     from_player_id: str,
     to_player_id: str,
     offered_items: dict[str, int],
     requested_items: dict[str, int],
+    ttl_ms: int = TRADE_OFFER_TTL_MS,
 ) -> None:
     conn = get_conn()
     try:
+        now = int(time.time() * 1000)
         conn.execute(
             """
             INSERT INTO pending_trades (
               trade_id, from_player_id, to_player_id, 
-              offered_items_json, requested_items_json, created_at
+              offered_items_json, requested_items_json, created_at, expires_at
             )
-            VALUES (?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 trade_id,
@@ -371,7 +918,8 @@ def create_pending_trade(
                 to_player_id,
                 json.dumps(offered_items),
                 json.dumps(requested_items),
-                int(time.time() * 1000),
+                now,
+                now + ttl_ms,
             ),
         )
         conn.commit()
@@ -380,17 +928,16 @@ def create_pending_trade(
 
 
 def get_pending_trade(trade_id: str) -> Optional[Dict[str, Any]]:
+    """Get a trade offer by ID; expired offers are treated as gone."""
     conn = get_conn()
     try:
         row = conn.execute(
-            "SELECT * FROM pending_trades WHERE trade_id = ?", (trade_id,)
+            "SELECT * FROM pending_trades WHERE trade_id = ? AND expires_at > ?",
+            (trade_id, int(time.time() * 1000)),
         ).fetchone()
         if not row:
             return None
-        data = dict(row)
-        data["offered_items"] = json.loads(data["offered_items_json"])
-        data["requested_items"] = json.loads(data["requested_items_json"])
-        return data
+        return _decode_trade(row)
     finally:
         conn.close()
 
@@ -404,38 +951,234 @@ def delete_pending_trade(trade_id: str) -> None:
         conn.close()
 
 
-def get_pending_trades_for_player(player_id: str) -> List[Dict[str, Any]]:
-    """Get all pending trades where player is the recipient"""
+def get_pending_trades_for_player(player_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Get unexpired pending trades where player is the recipient, oldest first (all, or the first `limit`)"""
     conn = get_conn()
     try:
         rows = conn.execute(
-            "SELECT * FROM pending_trades WHERE to_player_id = ?", (player_id,)
+            """
+            SELECT * FROM pending_trades WHERE to_player_id = ? AND expires_at > ?
+            ORDER BY created_at, trade_id LIMIT ?
+            """,
+            (player_id, int(time.time() * 1000), -1 if limit is None else limit),
         ).fetchall()
-        trades = []
-        for row in rows:
-            data = dict(row)
-            data["offered_items"] = json.loads(data["offered_items_json"])
-            data["requested_items"] = json.loads(data["requested_items_json"])
-            trades.append(data)
-        return trades
+        return [_decode_trade(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def get_pending_trades_by_player(player_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Get unexpired pending trades where player is the sender/offerer, oldest first (all, or the first `limit`)"""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            """
+            SELECT * FROM pending_trades WHERE from_player_id = ? AND expires_at > ?
+            ORDER BY created_at, trade_id LIMIT ?
+            """,
+            (player_id, int(time.time() * 1000), -1 if limit is None else limit),
+        ).fetchall()
+        return [_decode_trade(row) for row in rows]
     finally:
         conn.close()
 
 
-def get_pending_trades_by_player(player_id: str) -> List[Dict[str, Any]]:
-    """Get all pending trades where player is the sender/offerer"""
+TRADE_PAGE_SIZE = 10
+MAX_TRADE_PAGE_SIZE = 50
+
+
+def encode_trade_cursor(trade: Dict[str, Any]) -> str:
+    return f"{trade['created_at']}:{trade['trade_id']}"
+
+
+def decode_trade_cursor(cursor: str) -> Tuple[int, str]:
+    """Parse a "<created_at>:<trade_id>" cursor; raises ValueError if malformed."""
+    created_at, trade_id = cursor.split(":", 1)
+    return int(created_at), trade_id
+
+
+def get_player_trades_page(
+    player_id: str,
+    limit: int = TRADE_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of a player's unexpired trades, sent and received together,
+    ordered by (created_at, trade_id) and starting after cursor. Each trade
+    has a "direction" of 'sent' or 'received'. Returns (trades, next_cursor);
+    raises ValueError for a malformed cursor.
+    """
+    limit = max(1, min(limit, MAX_TRADE_PAGE_SIZE))
+    after_created, after_id = decode_trade_cursor(cursor) if cursor else (-1, "")
+    params = {
+        "player_id": player_id,
+        "now": int(time.time() * 1000),
+        "after_created": after_created,
+        "after_id": after_id,
+        "limit": limit + 1,
+    }
     conn = get_conn()
     try:
         rows = conn.execute(
-            "SELECT * FROM pending_trades WHERE from_player_id = ?", (player_id,)
+            """
+            SELECT * FROM (
+              SELECT *, 'received' AS direction FROM pending_trades
+              WHERE to_player_id = :player_id AND expires_at > :now
+                AND (created_at, trade_id) > (:after_created, :after_id)
+              UNION ALL
+              SELECT *, 'sent' AS direction FROM pending_trades
+              WHERE from_player_id = :player_id AND expires_at > :now
+                AND (created_at, trade_id) > (:after_created, :after_id)
+            )
+            ORDER BY created_at, trade_id
+            LIMIT :limit
+            """,
+            params,
         ).fetchall()
-        trades = []
-        for row in rows:
-            data = dict(row)
-            data["offered_items"] = json.loads(data["offered_items_json"])
-            data["requested_items"] = json.loads(data["requested_items_json"])
-            trades.append(data)
-        return trades
+    finally:
+        conn.close()
+    trades = [_decode_trade(row) for row in rows[:limit]]
+    next_cursor = encode_trade_cursor(trades[-1]) if len(rows) > limit else None
+    return trades, next_cursor
+
+
+def count_player_trades(player_id: str) -> Dict[str, int]:
+    """Unexpired trade counts for a player: {"received": n, "sent": n}."""
+    conn = get_conn()
+    try:
+        row = conn.execute(
+            """
+            SELECT
+              (SELECT COUNT(*) FROM pending_trades WHERE to_player_id = :player_id AND expires_at > :now) AS received,
+              (SELECT COUNT(*) FROM pending_trades WHERE from_player_id = :player_id AND expires_at > :now) AS sent
+            """,
+            {"player_id": player_id, "now": int(time.time() * 1000)},
+        ).fetchone()
+        return {"received": row["received"], "sent": row["sent"]}
+    finally:
+        conn.close()
+
+
+def count_pending_trades_by_player(player_id: str) -> int:
+    """Count a player's outstanding (unexpired) trade offers."""
+    conn = get_conn()
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*) AS n FROM pending_trades WHERE from_player_id = ? AND expires_at > ?",
+            (player_id, int(time.time() * 1000)),
+        ).fetchone()
+        return row["n"]
+    finally:
+        conn.close()
+
+
+class TradeSettlementError(ValueError):
+    """A trade can't be settled (gone, not yours, or missing items); the message is player-facing."""
+
+
+def _move_items(source: Dict[str, int], dest: Dict[str, int], items: Dict[str, int]) -> None:
+    for item_name, quantity in items.items():
+        source[item_name] -= quantity
+        if source[item_name] == 0:
+            del source[item_name]
+        dest[item_name] = dest.get(item_name, 0) + quantity
+
+
+def settle_trade(
+    trade_id: str,
+    accepting_player_id: str,
+    attempts: int = OPTIMISTIC_RETRIES,
+) -> Tuple[Dict[str, Any], Player, Player]:
+    """
+    Settle a trade atomically: both inventories are re-validated from fresh
+    rows, written with a version compare-and-swap, and the offer is deleted,
+    all in one transaction. A concurrent write to either player (or a
+    concurrent accept) aborts the attempt, which is retried from a fresh read.
+
+    Returns (trade, from_player, to_player) as saved. Raises TradeSettlementError
+    when the trade can't go through, StalePlayerError if every attempt conflicted.
+    """
+    for attempt in range(attempts):
+        conn = get_conn()
+        try:
+            trade_row = conn.execute(
+                "SELECT * FROM pending_trades WHERE trade_id = ? AND expires_at > ?",
+                (trade_id, int(time.time() * 1000)),
+            ).fetchone()
+            if not trade_row:
+                raise TradeSettlementError(f"Trade '{trade_id}' not found.")
+            trade = _decode_trade(trade_row)
+            if trade["to_player_id"] != accepting_player_id:
+                raise TradeSettlementError("This trade is not for you.")
+
+            rows = {
+                row["player_id"]: row
+                for row in conn.execute(
+                    "SELECT * FROM players WHERE player_id IN (?, ?)",
+                    (trade["from_player_id"], trade["to_player_id"]),
+                ).fetchall()
+            }
+            if trade["from_player_id"] not in rows:
+                conn.execute("DELETE FROM pending_trades WHERE trade_id = ?", (trade_id,))
+                conn.commit()
+                raise TradeSettlementError("The offering player no longer exists.")
+            from_player = _build_player_from_row(rows[trade["from_player_id"]])
+            to_player = _build_player_from_row(rows[trade["to_player_id"]])
+
+            # Validate against the rows we are about to overwrite
+            for item_name, quantity in trade["offered_items"].items():
+                if from_player.inventory.get(item_name, 0) < quantity:
+                    conn.execute("DELETE FROM pending_trades WHERE trade_id = ?", (trade_id,))
+                    conn.commit()
+                    raise TradeSettlementError(f"{from_player.name} no longer has {quantity} {item_name}.")
+            for item_name, quantity in trade["requested_items"].items():
+                if to_player.inventory.get(item_name, 0) < quantity:
+                    raise TradeSettlementError(f"You don't have {quantity} {item_name} to complete this trade.")
+
+            _move_items(from_player.inventory, to_player.inventory, trade["offered_items"])
+            _move_items(to_player.inventory, from_player.inventory, trade["requested_items"])
+
+            swapped = 0
+            for p in (from_player, to_player):
+                swapped += conn.execute(
+                    "UPDATE players SET inventory_json = ?, version = version + 1 WHERE player_id = ? AND version = ?",
+                    (json.dumps(p.inventory), p.player_id, p.version),
+                ).rowcount
+            deleted = conn.execute("DELETE FROM pending_trades WHERE trade_id = ?", (trade_id,)).rowcount
+            if swapped == 2 and deleted == 1:
+                conn.commit()
+                from_player.version += 1
+                to_player.version += 1
+                return trade, from_player, to_player
+            conn.rollback()
+        except sqlite3.OperationalError as e:
+            # Lost a write race for the database lock; treat like a version conflict
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            conn.rollback()
+        finally:
+            conn.close()
+        print(f"[TRADE] Settlement conflict on {trade_id} (attempt {attempt + 1}), retrying")
+        time.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+    raise StalePlayerError(accepting_player_id)
+
+
+def sweep_expired_trades(batch_size: int = EXPIRY_SWEEP_BATCH) -> List[Dict[str, Any]]:
+    """Delete one bounded batch of expired trade offers, returning the deleted rows."""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            """
+            DELETE FROM pending_trades WHERE trade_id IN (
+              SELECT trade_id FROM pending_trades WHERE expires_at <= ?
+              ORDER BY expires_at LIMIT ?
+            )
+            RETURNING trade_id, from_player_id, to_player_id
+            """,
+            (int(time.time() * 1000), batch_size),
+        ).fetchall()
+        conn.commit()
+        return [dict(row) for row in rows]
     finally:
         conn.close()
 
@@ -452,11 +1195,11 @@ def get_world_turn() -> int:
         conn.close()
 
 
-def increment_world_turn() -> int:
-    """Increment and return the new world turn."""
+def increment_world_turn(turns: int = 1) -> int:
+    """Advance the world clock by `turns` and return the new world turn."""
     conn = get_conn()
     try:
-        conn.execute("UPDATE world_clock SET current_turn = current_turn + 1 WHERE id = 1")
+        conn.execute("UPDATE world_clock SET current_turn = current_turn + ? WHERE id = 1", (turns,))
         conn.commit()
         row = conn.execute("SELECT current_turn FROM world_clock WHERE id = 1").fetchone()
         return row["current_turn"] if row else 0
@@ -476,27 +1219,6 @@ def get_world_state(key: str) -> Optional[str]:
         conn.close()
 
 
-def set_world_state(key: str, value: str) -> None:
-    """Set a world state value."""
-    conn = get_conn()
-    try:
-        turn = get_world_turn()
-        conn.execute(
-            """
-            INSERT INTO world_state (key, value, updated_at, updated_turn)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(key) DO UPDATE SET
-              value=excluded.value,
-              updated_at=excluded.updated_at,
-              updated_turn=excluded.updated_turn
-            """,
-            (key, value, int(time.time() * 1000), turn),
-        )
-        conn.commit()
-    finally:
-        conn.close()
-
-
 def get_all_world_state() -> Dict[str, str]:
     """Get all world state key-value pairs."""
     conn = get_conn()
@@ -507,31 +1229,186 @@ def get_all_world_state() -> Dict[str, str]:
         conn.close()
 
 
-# ===== Phase 8: World Events =====
-
-def log_world_event(event_type: str, location_id: Optional[str], data: Dict[str, Any]) -> None:
-    """Log a world evolution event (for Miriel integration)."""
+def load_world_snapshot() -> Tuple[int, Dict[str, str], Dict[str, int]]:
+    """Load the current turn, all world state and all counters in a single query."""
     conn = get_conn()
     try:
-        turn = get_world_turn()
-        conn.execute(
+        rows = conn.execute(
             """
-            INSERT INTO world_events (turn, event_type, location_id, data_json, created_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (turn, event_type, location_id, json.dumps(data), int(time.time() * 1000)),
-        )
-        conn.commit()
+            SELECT 'turn' AS kind, NULL AS key, current_turn AS value FROM world_clock WHERE id = 1
+            UNION ALL
+            SELECT 'state', key, value FROM world_state
+            UNION ALL
+            SELECT 'counter', key, value FROM world_counters
+            """
+        ).fetchall()
+        turn = 0
+        state: Dict[str, str] = {}
+        counters: Dict[str, int] = {}
+        for row in rows:
+            if row["kind"] == "turn":
+                turn = int(row["value"])
+            elif row["kind"] == "state":
+                state[row["key"]] = row["value"]
+            else:
+                counters[row["key"]] = int(row["value"])
+        return turn, state, counters
     finally:
         conn.close()
 
 
-def get_world_events(limit: int = 100) -> List[Dict[str, Any]]:
-    """Get recent world events."""
+def apply_world_batch(
+    state: Dict[str, str],
+    events: List[Dict[str, Any]],
+    counters: Optional[Dict[str, int]] = None,
+    scheduled: Optional[List[Dict[str, Any]]] = None,
+    fired_event_ids: Optional[List[int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Apply world state and counter updates, log world events, schedule new
+    future events and remove fired ones, all in a single transaction.
+    Returns the newly scheduled events with their assigned ids.
+    """
     conn = get_conn()
     try:
-        rows = conn.execute(
-            "SELECT * FROM world_events ORDER BY id DESC LIMIT ?", (limit,)
+        now = int(time.time() * 1000)
+        turn_row = conn.execute("SELECT current_turn FROM world_clock WHERE id = 1").fetchone()
+        turn = turn_row["current_turn"] if turn_row else 0
+        _write_world_counters(conn, {k: (v, 0) for k, v in (counters or {}).items()}, now, turn)
+        conn.executemany(
+            """
+            INSERT INTO world_state (key, value, updated_at, updated_turn)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+              value=excluded.value,
+              updated_at=excluded.updated_at,
+              updated_turn=excluded.updated_turn
+            """,
+            [(key, value, now, turn) for key, value in state.items()],
+        )
+        conn.executemany(
+            """
+            INSERT INTO world_events (turn, event_type, location_id, data_json, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (turn, e["event_type"], e["location_id"], json.dumps(e["data"]), now)
+                for e in events
+            ],
+        )
+        conn.executemany(
+            "DELETE FROM scheduled_events WHERE id = ?",
+            [(event_id,) for event_id in fired_event_ids or []],
+        )
+        created = []
+        for e in scheduled or []:
+            cur = conn.execute(
+                """
+                INSERT INTO scheduled_events (due_turn, event_type, location_id, data_json, created_at, created_turn)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (e["due_turn"], e["event_type"], e["location_id"], json.dumps(e["data"]), now, turn),
+            )
+            created.append({**e, "id": cur.lastrowid})
+        conn.commit()
+        return created
+    finally:
+        conn.close()
+
+
+def get_scheduled_events() -> List[Dict[str, Any]]:
+    """Get all pending scheduled world events, soonest first."""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM scheduled_events ORDER BY due_turn, id"
+        ).fetchall()
+        events = []
+        for row in rows:
+            data = dict(row)
+            data["data"] = json.loads(data["data_json"])
+            events.append(data)
+        return events
+    finally:
+        conn.close()
+
+
+# ===== Phase 8: World Counters =====
+
+def _write_world_counters(
+    conn: sqlite3.Connection,
+    updates: Dict[str, Tuple[Optional[int], int]],
+    now: int,
+    turn: int,
+) -> None:
+    """
+    Apply counter updates on an open connection.
+    Each update is (reset_value, delta): reset_value None means a pure increment.
+    """
+    conn.executemany(
+        """
+        INSERT INTO world_counters (key, value, updated_at, updated_turn)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET
+          value=CASE WHEN ? IS NULL THEN world_counters.value + ? ELSE excluded.value END,
+          updated_at=excluded.updated_at,
+          updated_turn=excluded.updated_turn
+        """,
+        [
+            (key, (reset or 0) + delta, now, turn, reset, delta)
+            for key, (reset, delta) in updates.items()
+        ],
+    )
+
+
+def get_world_counter(key: str) -> int:
+    """Get a world counter value (0 if unset)."""
+    conn = get_conn()
+    try:
+        row = conn.execute("SELECT value FROM world_counters WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else 0
+    finally:
+        conn.close()
+
+
+def apply_world_counter_updates(updates: Dict[str, Tuple[Optional[int], int]]) -> None:
+    """Apply buffered counter resets/increments in a single transaction."""
+    if not updates:
+        return
+    conn = get_conn()
+    try:
+        turn_row = conn.execute("SELECT current_turn FROM world_clock WHERE id = 1").fetchone()
+        _write_world_counters(conn, updates, int(time.time() * 1000), turn_row["current_turn"] if turn_row else 0)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ===== Phase 8: World Events =====
+
+def log_world_event(event_type: str, location_id: Optional[str], data: Dict[str, Any]) -> None:
+    """Log a world evolution event (for Miriel integration)."""
+    conn = get_conn()
+    try:
+        turn = get_world_turn()
+        conn.execute(
+            """
+            INSERT INTO world_events (turn, event_type, location_id, data_json, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (turn, event_type, location_id, json.dumps(data), int(time.time() * 1000)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_world_events(limit: int = 100) -> List[Dict[str, Any]]:
+    """Get recent world events."""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM world_events ORDER BY id DESC LIMIT ?", (limit,)
         ).fetchall()
         events = []
         for row in rows:
@@ -596,31 +1473,91 @@ def get_all_factions() -> List[Dict[str, Any]]:
 
 # ===== Phase 9: Reputation Events =====
 
-def log_reputation_event(
-    player_id: str,
-    faction_id: str,
-    event_type: str,
-    value: int,
-    description: str,
-    location_id: Optional[str] = None,
-) -> None:
-    """Log a reputation-affecting event."""
+# Rows per multi-row INSERT, well under SQLite's bound-variable limit
+REPUTATION_INSERT_CHUNK = 500
+
+
+def log_reputation_events(events: List[Dict[str, Any]]) -> None:
+    """
+    Log a batch of reputation events in one transaction.
+
+    Each event is a dict with player_id, faction_id, event_type, value,
+    description and optional location_id. Events are inserted with one
+    multi-row INSERT, and the running totals and decayed standing for every
+    affected (player, faction) are updated in the same transaction.
+    """
+    if not events:
+        return
+
     conn = get_conn()
     try:
-        turn = get_world_turn()
-        conn.execute(
-            """
-            INSERT INTO reputation_events (
-              player_id, faction_id, event_type, value, description, location_id, turn, created_at
+        _register_reputation_functions(conn)
+        turn_row = conn.execute("SELECT current_turn FROM world_clock WHERE id = 1").fetchone()
+        turn = turn_row["current_turn"] if turn_row else 0
+        now = int(time.time() * 1000)
+
+        deltas: Dict[Tuple[str, str], int] = {}
+        for e in events:
+            key = (e["player_id"], e["faction_id"])
+            deltas[key] = deltas.get(key, 0) + e["value"]
+
+        for i in range(0, len(events), REPUTATION_INSERT_CHUNK):
+            chunk = events[i:i + REPUTATION_INSERT_CHUNK]
+            conn.execute(
+                f"""
+                INSERT INTO reputation_events (
+                  player_id, faction_id, event_type, value, description, location_id, turn, created_at
+                )
+                VALUES {",".join(["(?, ?, ?, ?, ?, ?, ?, ?)"] * len(chunk))}
+                """,
+                [
+                    v
+                    for e in chunk
+                    for v in (
+                        e["player_id"], e["faction_id"], e["event_type"], e["value"],
+                        e["description"], e.get("location_id"), turn, now,
+                    )
+                ],
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (player_id, faction_id, event_type, value, description, location_id, turn, int(time.time() * 1000)),
-        )
+
+        totals: List[Tuple[str, str, int]] = []
+        keys = list(deltas)
+        for i in range(0, len(keys), REPUTATION_INSERT_CHUNK):
+            chunk = keys[i:i + REPUTATION_INSERT_CHUNK]
+            rows = conn.execute(
+                f"""
+                INSERT INTO reputation_totals (
+                  player_id, faction_id, total, updated_at, standing, standing_turn
+                )
+                VALUES {",".join(["(?, ?, ?, ?, ?, ?)"] * len(chunk))}
+                ON CONFLICT(player_id, faction_id) DO UPDATE SET
+                  total=reputation_totals.total + excluded.total,
+                  updated_at=excluded.updated_at,
+                  standing=reputation_decay(
+                    reputation_totals.standing, reputation_totals.standing_turn, excluded.standing_turn
+                  ) + excluded.standing,
+                  standing_turn=MAX(reputation_totals.standing_turn, excluded.standing_turn)
+                RETURNING player_id, faction_id, total
+                """,
+                [
+                    v
+                    for (player_id, faction_id) in chunk
+                    for v in (player_id, faction_id, deltas[(player_id, faction_id)], now,
+                              deltas[(player_id, faction_id)], turn)
+                ],
+            ).fetchall()
+            totals.extend((row["player_id"], row["faction_id"], row["total"]) for row in rows)
         conn.commit()
     finally:
         conn.close()
 
+    # Inside an action's transaction the totals aren't final until it commits
+    def update_leaderboards() -> None:
+        from .leaderboards import LEADERBOARDS
+        for player_id, faction_id, total in totals:
+            LEADERBOARDS.update(faction_id, player_id, total)
+    after_commit(update_leaderboards)
+
 
 def get_reputation_events(
     player_id: str,
@@ -654,15 +1591,14 @@ def get_reputation_events(
 
 
 def calculate_reputation(player_id: str, faction_id: str) -> int:
-    """Calculate total reputation for a player with a faction."""
+    """
+    Get total reputation for a player with a faction.
+    Reads the running total, which always equals checkpoint + SUM(recent events).
+    """
     conn = get_conn()
     try:
         row = conn.execute(
-            """
-            SELECT COALESCE(SUM(value), 0) as total
-            FROM reputation_events
-            WHERE player_id = ? AND faction_id = ?
-            """,
+            "SELECT total FROM reputation_totals WHERE player_id = ? AND faction_id = ?",
             (player_id, faction_id),
         ).fetchone()
         return row["total"] if row else 0
@@ -670,6 +1606,176 @@ def calculate_reputation(player_id: str, faction_id: str) -> int:
         conn.close()
 
 
+def calculate_standing(player_id: str, faction_id: str) -> float:
+    """
+    Get a player's time-decayed standing with a faction at the current turn.
+    O(1): the stored standing is decayed in closed form, no event scan.
+    """
+    return get_player_standings(player_id).get(faction_id, 0.0)
+
+
+def get_player_standings(player_id: str) -> Dict[str, float]:
+    """Get a player's decayed standing with every faction they have history with."""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            """
+            SELECT faction_id, standing, standing_turn,
+              (SELECT current_turn FROM world_clock WHERE id = 1) AS current_turn
+            FROM reputation_totals WHERE player_id = ?
+            """,
+            (player_id,),
+        ).fetchall()
+        return {
+            row["faction_id"]: decay_reputation(row["standing"], row["standing_turn"], row["current_turn"] or 0)
+            for row in rows
+        }
+    finally:
+        conn.close()
+
+
+def get_faction_standings(faction_id: str, player_ids: List[str]) -> Dict[str, float]:
+    """Get decayed standing with one faction for a set of players."""
+    if not player_ids:
+        return {}
+    conn = get_conn()
+    try:
+        placeholders = ",".join("?" * len(player_ids))
+        rows = conn.execute(
+            f"""
+            SELECT player_id, standing, standing_turn,
+              (SELECT current_turn FROM world_clock WHERE id = 1) AS current_turn
+            FROM reputation_totals
+            WHERE faction_id = ? AND player_id IN ({placeholders})
+            """,
+            (faction_id, *player_ids),
+        ).fetchall()
+        return {
+            row["player_id"]: decay_reputation(row["standing"], row["standing_turn"], row["current_turn"] or 0)
+            for row in rows
+        }
+    finally:
+        conn.close()
+
+
+def recompute_reputation_tiers() -> List[Dict[str, Any]]:
+    """
+    Re-tier every (player, faction) standing at the current turn in one
+    set-based UPDATE, returning the rows whose tier changed since the last
+    recompute so players can be notified.
+    """
+    conn = get_conn()
+    try:
+        _register_reputation_functions(conn)
+        turn_row = conn.execute("SELECT current_turn FROM world_clock WHERE id = 1").fetchone()
+        turn = turn_row["current_turn"] if turn_row else 0
+        rows = conn.execute(
+            """
+            UPDATE reputation_totals
+            SET notified_tier = reputation_tier(reputation_decay(standing, standing_turn, :turn))
+            WHERE notified_tier != reputation_tier(reputation_decay(standing, standing_turn, :turn))
+            RETURNING player_id, faction_id, notified_tier AS tier
+            """,
+            {"turn": turn},
+        ).fetchall()
+        conn.commit()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def get_reputation_totals(faction_id: str) -> List[Dict[str, Any]]:
+    """Get all (player_id, total) rows for a faction in leaderboard order."""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            """
+            SELECT player_id, total FROM reputation_totals
+            WHERE faction_id = ?
+            ORDER BY total DESC, player_id
+            """,
+            (faction_id,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+# Detailed reputation history is kept for this many turns, then folded into checkpoints
+REPUTATION_HISTORY_TURNS = 1000
+REPUTATION_COMPACTION_BATCH = 500
+
+
+def compact_reputation_events(
+    horizon_turns: int = REPUTATION_HISTORY_TURNS,
+    batch_size: int = REPUTATION_COMPACTION_BATCH,
+) -> int:
+    """
+    Fold one bounded batch of reputation events older than horizon_turns into
+    per-(player, faction) checkpoints. The fold and the delete happen in one
+    transaction, so totals from calculate_reputation are unchanged.
+    Returns the number of events folded (0 when nothing is left to compact).
+    """
+    conn = get_conn()
+    try:
+        turn_row = conn.execute("SELECT current_turn FROM world_clock WHERE id = 1").fetchone()
+        cutoff = (turn_row["current_turn"] if turn_row else 0) - horizon_turns
+        rows = conn.execute(
+            """
+            SELECT id, player_id, faction_id, value, turn FROM reputation_events
+            WHERE turn < ?
+            ORDER BY turn, id
+            LIMIT ?
+            """,
+            (cutoff, batch_size),
+        ).fetchall()
+        if not rows:
+            return 0
+
+        folded: Dict[Tuple[str, str], List[int]] = {}  # (player, faction) -> [sum, count, max turn]
+        for row in rows:
+            agg = folded.setdefault((row["player_id"], row["faction_id"]), [0, 0, 0])
+            agg[0] += row["value"]
+            agg[1] += 1
+            agg[2] = max(agg[2], row["turn"])
+
+        now = int(time.time() * 1000)
+        conn.executemany(
+            """
+            INSERT INTO reputation_checkpoints (
+              player_id, faction_id, total, events_folded, through_turn, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(player_id, faction_id) DO UPDATE SET
+              total=reputation_checkpoints.total + excluded.total,
+              events_folded=reputation_checkpoints.events_folded + excluded.events_folded,
+              through_turn=MAX(reputation_checkpoints.through_turn, excluded.through_turn),
+              updated_at=excluded.updated_at
+            """,
+            [
+                (player_id, faction_id, total, count, through_turn, now)
+                for (player_id, faction_id), (total, count, through_turn) in folded.items()
+            ],
+        )
+        conn.executemany(
+            "DELETE FROM reputation_events WHERE id = ?",
+            [(row["id"],) for row in rows],
+        )
+        conn.commit()
+        return len(rows)
+    finally:
+        conn.close()
+
+
+def reclaim_free_pages(max_pages: int = 1000) -> None:
+    """Return up to max_pages free pages to the filesystem (incremental auto_vacuum only)."""
+    conn = get_conn()
+    try:
+        conn.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+    finally:
+        conn.close()
+
+
 # ===== Phase 10: Parties =====
 
 def create_party(party_id: str, leader_id: str, name: Optional[str] = None) -> None:
@@ -677,12 +1783,13 @@ def create_party(party_id: str, leader_id: str, name: Optional[str] = None) -> N
     conn = get_conn()
     try:
         turn = get_world_turn()
+        now = int(time.time() * 1000)
         conn.execute(
             """
             INSERT INTO parties (party_id, leader_id, name, created_at, created_turn)
             VALUES (?, ?, ?, ?, ?)
             """,
-            (party_id, leader_id, name, int(time.time() * 1000), turn),
+            (party_id, leader_id, name, now, turn),
         )
         # Add leader as first member
         conn.execute(
@@ -690,15 +1797,46 @@ def create_party(party_id: str, leader_id: str, name: Optional[str] = None) -> N
             INSERT INTO party_members (party_id, player_id, joined_at, joined_turn)
             VALUES (?, ?, ?, ?)
             """,
-            (party_id, leader_id, int(time.time() * 1000), turn),
+            (party_id, leader_id, now, turn),
         )
         conn.commit()
     finally:
         conn.close()
 
+    from .party_registry import PARTY_REGISTRY
+    PARTY_REGISTRY.party_created({
+        "party_id": party_id,
+        "leader_id": leader_id,
+        "name": name,
+        "created_at": now,
+        "created_turn": turn,
+        "members": [leader_id],
+    })
+    on_rollback(lambda: PARTY_REGISTRY.party_deleted(party_id))
+
+
+def load_parties() -> List[Dict[str, Any]]:
+    """Load every party with its members (used to fill the party registry)."""
+    conn = get_conn()
+    try:
+        parties = {row["party_id"]: {**dict(row), "members": []} for row in conn.execute("SELECT * FROM parties")}
+        member_rows = conn.execute(
+            "SELECT party_id, player_id FROM party_members ORDER BY joined_at"
+        ).fetchall()
+        for row in member_rows:
+            if row["party_id"] in parties:
+                parties[row["party_id"]]["members"].append(row["player_id"])
+        return list(parties.values())
+    finally:
+        conn.close()
+
 
 def get_party(party_id: str) -> Optional[Dict[str, Any]]:
     """Get party data."""
+    from .party_registry import PARTY_REGISTRY
+    if PARTY_REGISTRY.loaded:
+        return PARTY_REGISTRY.get_party(party_id)
+
     conn = get_conn()
     try:
         row = conn.execute("SELECT * FROM parties WHERE party_id = ?", (party_id,)).fetchone()
@@ -719,6 +1857,10 @@ def get_party(party_id: str) -> Optional[Dict[str, Any]]:
 
 def get_player_party(player_id: str) -> Optional[Dict[str, Any]]:
     """Get the party that a player belongs to."""
+    from .party_registry import PARTY_REGISTRY
+    if PARTY_REGISTRY.loaded:
+        return PARTY_REGISTRY.get_player_party(player_id)
+
     conn = get_conn()
     try:
         row = conn.execute(
@@ -760,6 +1902,10 @@ def add_party_member(party_id: str, player_id: str) -> None:
     finally:
         conn.close()
 
+    from .party_registry import PARTY_REGISTRY
+    PARTY_REGISTRY.member_added(party_id, player_id)
+    on_rollback(lambda: PARTY_REGISTRY.member_removed(party_id, player_id))
+
 
 def remove_party_member(party_id: str, player_id: str) -> None:
     """Remove a player from a party."""
@@ -773,9 +1919,16 @@ def remove_party_member(party_id: str, player_id: str) -> None:
     finally:
         conn.close()
 
+    from .party_registry import PARTY_REGISTRY
+    PARTY_REGISTRY.member_removed(party_id, player_id)
+    on_rollback(lambda: PARTY_REGISTRY.member_added(party_id, player_id))
+
 
 def delete_party(party_id: str) -> None:
     """Delete a party and all its members."""
+    from .party_registry import PARTY_REGISTRY
+    party = PARTY_REGISTRY.get_party(party_id) if PARTY_REGISTRY.loaded else None
+
     conn = get_conn()
     try:
         conn.execute("DELETE FROM party_members WHERE party_id = ?", (party_id,))
@@ -785,17 +1938,28 @@ def delete_party(party_id: str) -> None:
     finally:
         conn.close()
 
+    PARTY_REGISTRY.party_deleted(party_id)
+    if party:
+        on_rollback(lambda: PARTY_REGISTRY.party_created(party))
+
 
-def create_party_invite(invite_id: str, party_id: str, from_player_id: str, to_player_id: str) -> None:
-    """Create a party invitation."""
+def create_party_invite(
+    invite_id: str,
+    party_id: str,
+    from_player_id: str,
+    to_player_id: str,
+    ttl_ms: int = PARTY_INVITE_TTL_MS,
+) -> None:
+    """Create a party invitation that expires after ttl_ms."""
     conn = get_conn()
     try:
+        now = int(time.time() * 1000)
         conn.execute(
             """
-            INSERT INTO party_invites (invite_id, party_id, from_player_id, to_player_id, created_at)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT INTO party_invites (invite_id, party_id, from_player_id, to_player_id, created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
             """,
-            (invite_id, party_id, from_player_id, to_player_id, int(time.time() * 1000)),
+            (invite_id, party_id, from_player_id, to_player_id, now, now + ttl_ms),
         )
         conn.commit()
     finally:
@@ -803,11 +1967,12 @@ def create_party_invite(invite_id: str, party_id: str, from_player_id: str, to_p
 
 
 def get_party_invite(invite_id: str) -> Optional[Dict[str, Any]]:
-    """Get a party invitation."""
+    """Get a party invitation; expired invites are treated as gone."""
     conn = get_conn()
     try:
         row = conn.execute(
-            "SELECT * FROM party_invites WHERE invite_id = ?", (invite_id,)
+            "SELECT * FROM party_invites WHERE invite_id = ? AND expires_at > ?",
+            (invite_id, int(time.time() * 1000)),
         ).fetchone()
         return dict(row) if row else None
     finally:
@@ -815,17 +1980,31 @@ def get_party_invite(invite_id: str) -> Optional[Dict[str, Any]]:
 
 
 def get_player_party_invites(player_id: str) -> List[Dict[str, Any]]:
-    """Get all party invites for a player."""
+    """Get all unexpired party invites for a player."""
     conn = get_conn()
     try:
         rows = conn.execute(
-            "SELECT * FROM party_invites WHERE to_player_id = ?", (player_id,)
+            "SELECT * FROM party_invites WHERE to_player_id = ? AND expires_at > ?",
+            (player_id, int(time.time() * 1000)),
         ).fetchall()
         return [dict(row) for row in rows]
     finally:
         conn.close()
 
 
+def count_party_invites_by_player(player_id: str) -> int:
+    """Count a player's outstanding (unexpired) party invites."""
+    conn = get_conn()
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*) AS n FROM party_invites WHERE from_player_id = ? AND expires_at > ?",
+            (player_id, int(time.time() * 1000)),
+        ).fetchone()
+        return row["n"]
+    finally:
+        conn.close()
+
+
 def delete_party_invite(invite_id: str) -> None:
     """Delete a party invitation."""
     conn = get_conn()
@@ -835,3 +2014,282 @@ def delete_party_invite(invite_id: str) -> None:
     finally:
         conn.close()
 
+
+def sweep_expired_party_invites(batch_size: int = EXPIRY_SWEEP_BATCH) -> List[Dict[str, Any]]:
+    """Delete one bounded batch of expired party invites, returning the deleted rows."""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            """
+            DELETE FROM party_invites WHERE invite_id IN (
+              SELECT invite_id FROM party_invites WHERE expires_at <= ?
+              ORDER BY expires_at LIMIT ?
+            )
+            RETURNING invite_id, party_id, from_player_id, to_player_id
+            """,
+            (int(time.time() * 1000), batch_size),
+        ).fetchall()
+        conn.commit()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+# ===== Phase 11: Marketplace =====
+
+MARKET_CURRENCY = "coin"
+
+
+class MarketError(ValueError):
+    """A market order can't be placed or cancelled; the message is player-facing."""
+
+
+def load_open_market_orders() -> List[Dict[str, Any]]:
+    """All open orders in time priority (used to rebuild the in-memory books)."""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            """
+            SELECT order_id, player_id, item, side, price, remaining FROM market_orders
+            WHERE status = 'open' ORDER BY order_id
+            """
+        ).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def get_player_market_orders(player_id: str) -> List[Dict[str, Any]]:
+    """A player's open orders, oldest first."""
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM market_orders WHERE player_id = ? AND status = 'open' ORDER BY order_id",
+            (player_id,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def _apply_inventory_deltas(conn: sqlite3.Connection, deltas: Dict[str, Dict[str, int]]) -> Dict[str, Player]:
+    """
+    Apply per-player item deltas inside the caller's write transaction and
+    bump each player's version. Raises MarketError if any count would go negative.
+    """
+    if not deltas:
+        return {}
+    placeholders = ",".join("?" * len(deltas))
+    players = {
+        row["player_id"]: _build_player_from_row(row)
+        for row in conn.execute(
+            f"SELECT * FROM players WHERE player_id IN ({placeholders})", list(deltas)
+        ).fetchall()
+    }
+    for player_id, items in deltas.items():
+        p = players.get(player_id)
+        if p is None:
+            raise MarketError("Unknown player.")
+        for item_name, delta in items.items():
+            held = p.inventory.get(item_name, 0) + delta
+            if held < 0:
+                raise MarketError(f"You don't have enough {item_name}.")
+            if held:
+                p.inventory[item_name] = held
+            else:
+                p.inventory.pop(item_name, None)
+    conn.executemany(
+        "UPDATE players SET inventory_json = ?, version = version + 1 WHERE player_id = ?",
+        [(json.dumps(p.inventory), p.player_id) for p in players.values()],
+    )
+    for p in players.values():
+        p.version += 1
+    return players
+
+
+def _add_delta(deltas: Dict[str, Dict[str, int]], player_id: str, item_name: str, delta: int) -> None:
+    if delta:
+        items = deltas.setdefault(player_id, {})
+        items[item_name] = items.get(item_name, 0) + delta
+
+
+def execute_market_order(
+    player_id: str,
+    item: str,
+    side: str,
+    price: int,
+    quantity: int,
+    fills: List[Dict[str, Any]],
+) -> Tuple[int, Player, Dict[str, Player]]:
+    """
+    Persist a new order and its matches in one write transaction.
+
+    The order's escrow (items for a sell, price * quantity coins for a buy) is
+    taken from the player, each fill against a resting order (dicts with
+    order_id, player_id, price, quantity) is recorded, and both sides are
+    credited. Fills execute at the resting order's price; a buyer who bid
+    higher gets the difference back. Resting orders are updated with guards,
+    so a book that disagrees with the table aborts the whole transaction.
+
+    Returns (order_id, placing player, counterparties by player_id) as saved.
+    Raises MarketError (nothing written) if the escrow can't be covered.
+    """
+    now = int(time.time() * 1000)
+    filled = sum(f["quantity"] for f in fills)
+    deltas: Dict[str, Dict[str, int]] = {}
+    if side == "sell":
+        _add_delta(deltas, player_id, item, -quantity)
+    else:
+        _add_delta(deltas, player_id, MARKET_CURRENCY, -price * quantity)
+
+    conn = get_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        order_id = conn.execute(
+            """
+            INSERT INTO market_orders (
+              player_id, item, side, price, quantity, remaining, status, created_at, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (player_id, item, side, price, quantity, quantity - filled,
+             "filled" if filled == quantity else "open", now, now),
+        ).lastrowid
+
+        for f in fills:
+            updated = conn.execute(
+                """
+                UPDATE market_orders SET
+                  remaining = remaining - :qty,
+                  status = CASE WHEN remaining = :qty THEN 'filled' ELSE 'open' END,
+                  updated_at = :now
+                WHERE order_id = :order_id AND status = 'open' AND remaining >= :qty
+                """,
+                {"qty": f["quantity"], "now": now, "order_id": f["order_id"]},
+            ).rowcount
+            if updated != 1:
+                raise RuntimeError(f"Order book out of sync with market_orders at order {f['order_id']}")
+
+            buy_id, sell_id = (order_id, f["order_id"]) if side == "buy" else (f["order_id"], order_id)
+            buyer, seller = (player_id, f["player_id"]) if side == "buy" else (f["player_id"], player_id)
+            conn.execute(
+                """
+                INSERT INTO market_fills (
+                  item, price, quantity, buy_order_id, sell_order_id, buyer_id, seller_id, created_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (item, f["price"], f["quantity"], buy_id, sell_id, buyer, seller, now),
+            )
+            _add_delta(deltas, buyer, item, f["quantity"])
+            _add_delta(deltas, seller, MARKET_CURRENCY, f["price"] * f["quantity"])
+            if side == "buy":
+                # Price improvement: the escrow was taken at our limit
+                _add_delta(deltas, player_id, MARKET_CURRENCY, (price - f["price"]) * f["quantity"])
+
+        players = _apply_inventory_deltas(conn, deltas)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    placing_player = players.pop(player_id)
+    return order_id, placing_player, players
+
+
+def cancel_market_order(order_id: int, player_id: str) -> Tuple[Dict[str, Any], Player]:
+    """
+    Cancel one of a player's open orders and return its remaining escrow in
+    the same transaction. Returns (order, player as saved).
+    """
+    conn = get_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            """
+            UPDATE market_orders SET status = 'cancelled', updated_at = ?
+            WHERE order_id = ? AND player_id = ? AND status = 'open'
+            RETURNING order_id, item, side, price, remaining
+            """,
+            (int(time.time() * 1000), order_id, player_id),
+        ).fetchone()
+        if not row:
+            raise MarketError(f"You have no open order #{order_id}.")
+        order = dict(row)
+        deltas: Dict[str, Dict[str, int]] = {}
+        if order["side"] == "sell":
+            _add_delta(deltas, player_id, order["item"], order["remaining"])
+        else:
+            _add_delta(deltas, player_id, MARKET_CURRENCY, order["price"] * order["remaining"])
+        players = _apply_inventory_deltas(conn, deltas)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return order, players[player_id]
+
+
+# ===== Phase 11: Idempotency Keys =====
+
+def get_idempotent_response(player_id: str, idempotency_key: str) -> Optional[Tuple[str, Dict[str, Any], int]]:
+    """(request_hash, response, expires_at) stored for a key, unless it has expired."""
+    conn = get_conn()
+    try:
+        row = conn.execute(
+            """
+            SELECT request_hash, response_json, expires_at FROM idempotency_keys
+            WHERE player_id = ? AND idempotency_key = ? AND expires_at > ?
+            """,
+            (player_id, idempotency_key, int(time.time() * 1000)),
+        ).fetchone()
+        if not row:
+            return None
+        return row["request_hash"], json.loads(row["response_json"]), row["expires_at"]
+    finally:
+        conn.close()
+
+
+def save_idempotent_response(
+    player_id: str,
+    idempotency_key: str,
+    request_hash: str,
+    response: Dict[str, Any],
+    expires_at: int,
+) -> None:
+    conn = get_conn()
+    try:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO idempotency_keys (
+              player_id, idempotency_key, request_hash, response_json, expires_at
+            )
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (player_id, idempotency_key, request_hash, json.dumps(response), expires_at),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def sweep_expired_idempotency_keys(batch_size: int = EXPIRY_SWEEP_BATCH) -> int:
+    """Delete one bounded batch of expired idempotency keys; returns how many were deleted."""
+    conn = get_conn()
+    try:
+        cur = conn.execute(
+            """
+            DELETE FROM idempotency_keys WHERE rowid IN (
+              SELECT rowid FROM idempotency_keys WHERE expires_at <= ?
+              ORDER BY expires_at LIMIT ?
+            )
+            """,
+            (int(time.time() * 1000), batch_size),
+        )
+        conn.commit()
+        return cur.rowcount
+    finally:
+        conn.close()
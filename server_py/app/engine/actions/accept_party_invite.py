@@ -4,7 +4,7 @@ Phase 10: Accept party invite action
 
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, AcceptPartyInviteReq
 from ...db import (
     get_party_invite,
     delete_party_invite,
@@ -13,6 +13,7 @@ from ...db import (
     get_player_party,
 )
 from ..state_view import build_action_state
+from ..registry import register_action, word_arg
 
 
 def accept_party_invite(player: Player, invite_id: str) -> ActionResponse:
@@ -66,3 +67,12 @@ def accept_party_invite(player: Player, invite_id: str) -> ActionResponse:
         ],
         state=build_action_state(player)
     )
+
+
+register_action(
+    "accept_party_invite",
+    AcceptPartyInviteReq,
+    lambda player, req: accept_party_invite(player, req.args.invite_id),
+    verbs=("accept_party_invite",),
+    parse=word_arg("accept_party_invite", "invite_id"),
+)
@@ -1,15 +1,17 @@
 from copy import deepcopy
 import time
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, AcceptQuestReq
 from ...world_quests import QUEST_TEMPLATES
 from ...db import upsert_player
+from ...quest_progress import record_quest_accepted
 from ..entities import get_entities_at, serialize_entity
 from ...world import get_location
 from ..state_view import build_action_state
+from ..registry import register_action, word_arg
 
 
 def accept_quest(player: Player, quest_id: str) -> ActionResponse:
-    from ...db import get_player_party, get_player, upsert_player as db_upsert_player
+    from ...db import get_player_party, modify_players
 
     template = QUEST_TEMPLATES.get(quest_id)
     if not template:
@@ -34,29 +36,32 @@ def accept_quest(player: Player, quest_id: str) -> ActionResponse:
     player.active_quests[quest_id] = quest
 
     messages = [f"Quest accepted: {quest.name}"]
+    messages.extend(record_quest_accepted(player, quest))
+
+    # Share quest with party members: one bulk load, one optimistic bulk write
+    def share_quest(member: Player) -> list[str]:
+        # Only add if they don't already have it
+        if quest_id in member.active_quests or quest_id in member.completed_quests:
+            return []
+        # Remove from archived if repeatable
+        if quest_id in member.archived_quests and template.repeatable:
+            del member.archived_quests[quest_id]
+
+        # Give them a fresh copy of the quest
+        member_quest = deepcopy(template)
+        member_quest.status = "accepted"
+        member_quest.accepted_at = int(time.time() * 1000)
+        member.active_quests[quest_id] = member_quest
+        return [f"[Party] {member.name} also accepted the quest"] + [
+            f"[Party] {member.name}: {msg}"
+            for msg in record_quest_accepted(member, member_quest)
+        ]
 
-    # Share quest with party members
     party = get_player_party(player.player_id)
     if party:
-        for member_id in party["members"]:
-            if member_id == player.player_id:
-                continue  # Skip self
-            member = get_player(member_id)
-            if member:
-                # Only add if they don't already have it
-                if (quest_id not in member.active_quests and
-                    quest_id not in member.completed_quests):
-                    # Remove from archived if repeatable
-                    if quest_id in member.archived_quests and template.repeatable:
-                        del member.archived_quests[quest_id]
-
-                    # Give them a fresh copy of the quest
-                    member_quest = deepcopy(template)
-                    member_quest.status = "accepted"
-                    member_quest.accepted_at = int(time.time() * 1000)
-                    member.active_quests[quest_id] = member_quest
-                    db_upsert_player(member)
-                    messages.append(f"[Party] {member.name} also accepted the quest")
+        member_ids = [m for m in party["members"] if m != player.player_id]
+        for _, member_messages in modify_players(member_ids, share_quest):
+            messages.extend(member_messages)
 
     upsert_player(player)
 
@@ -64,4 +69,13 @@ def accept_quest(player: Player, quest_id: str) -> ActionResponse:
         ok=True,
         messages=messages,
         state=build_action_state(player, scene_dirty=False),
-    )
\ No newline at end of file
+    )
+
+
+register_action(
+    "accept_quest",
+    AcceptQuestReq,
+    lambda player, req: accept_quest(player, req.args.quest_id),
+    verbs=("accept",),
+    parse=word_arg("accept_quest", "quest_id"),
+)
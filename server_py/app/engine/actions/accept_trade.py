@@ -1,84 +1,63 @@
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, AcceptTradeReq
 from ...db import (
-    get_pending_trade,
-    delete_pending_trade,
-    get_player,
+    settle_trade,
+    modify_players,
     upsert_player,
+    log_reputation_events,
+    TradeSettlementError,
 )
+from ...factions import territory_reputation_events
+from ...notices import queue_notice
+from ...quest_progress import record_inventory_change
 from ..state_view import build_action_state
+from ..registry import register_action, word_arg
 
 
 def accept_trade(player: Player, trade_id: str) -> ActionResponse:
     """
     Accept a pending trade offer.
-    Executes the trade atomically.
+    Validation, both inventory updates and removing the offer happen in one
+    versioned transaction (see db.settle_trade), so concurrent accepts or a
+    concurrent purchase can't duplicate or destroy items.
     """
     messages: list[str] = []
 
-    # Get the pending trade
-    trade = get_pending_trade(trade_id)
-    if not trade:
-        return ActionResponse(ok=False, error=f"Trade '{trade_id}' not found.")
+    try:
+        trade, from_player, settled = settle_trade(trade_id, player.player_id)
+    except TradeSettlementError as e:
+        return ActionResponse(ok=False, error=str(e))
 
-    # Verify that the current player is the recipient
-    if trade["to_player_id"] != player.player_id:
-        return ActionResponse(ok=False, error="This trade is not for you.")
-
-    # Get the offering player
-    from_player = get_player(trade["from_player_id"])
-    if not from_player:
-        delete_pending_trade(trade_id)
-        return ActionResponse(ok=False, error="The offering player no longer exists.")
+    # Continue from the row that was just saved, not the copy read at the start of the request
+    for field in Player.model_fields:
+        setattr(player, field, getattr(settled, field))
 
     offered_items = trade["offered_items"]
     requested_items = trade["requested_items"]
 
-    # Validate from_player still has the offered items
-    for item_name, quantity in offered_items.items():
-        if from_player.inventory.get(item_name, 0) < quantity:
-            delete_pending_trade(trade_id)
-            return ActionResponse(
-                ok=False,
-                error=f"{from_player.name} no longer has {quantity} {item_name}.",
-            )
-
-    # Validate to_player (current player) has the requested items
-    for item_name, quantity in requested_items.items():
-        if player.inventory.get(item_name, 0) < quantity:
-            return ActionResponse(
-                ok=False,
-                error=f"You don't have {quantity} {item_name} to complete this trade.",
-            )
-
-    # Execute the trade atomically
-    # Remove offered items from from_player
-    for item_name, quantity in offered_items.items():
-        from_player.inventory[item_name] -= quantity
-        if from_player.inventory[item_name] == 0:
-            del from_player.inventory[item_name]
-
-    # Remove requested items from to_player (current player)
-    for item_name, quantity in requested_items.items():
-        player.inventory[item_name] -= quantity
-        if player.inventory[item_name] == 0:
-            del player.inventory[item_name]
-
-    # Add offered items to to_player (current player)
-    for item_name, quantity in offered_items.items():
-        player.inventory[item_name] = player.inventory.get(item_name, 0) + quantity
-
-    # Add requested items to from_player
-    for item_name, quantity in requested_items.items():
-        from_player.inventory[item_name] = from_player.inventory.get(item_name, 0) + quantity
-
-    # Save both players
-    upsert_player(from_player)
-    upsert_player(player)
-
-    # Delete the trade
-    delete_pending_trade(trade_id)
+    # Collect objectives follow both inventories; the offering player hears about it on their next action
+    traded_items = list(offered_items) + list(requested_items)
+    quest_messages = record_inventory_change(player, traded_items)
+    if quest_messages:
+        upsert_player(player)
+    for _, from_player_messages in modify_players(
+        [from_player.player_id], lambda p: record_inventory_change(p, traded_items)
+    ):
+        for msg in from_player_messages:
+            queue_notice([from_player.player_id], msg)
+
+    # Phase 9: Completed trades build standing with the factions holding this territory
+    log_reputation_events(
+        territory_reputation_events(
+            player.player_id, player.location, "trade_completed",
+            lambda faction: f"Traded with {from_player.name} in {faction} territory",
+        )
+        + territory_reputation_events(
+            from_player.player_id, player.location, "trade_completed",
+            lambda faction: f"Traded with {player.name} in {faction} territory",
+        )
+    )
 
     # Build messages
     offer_desc = ", ".join(f"{q}x {item}" for item, q in offered_items.items()) if offered_items else "nothing"
@@ -87,9 +66,19 @@ def accept_trade(player: Player, trade_id: str) -> ActionResponse:
     messages.append(f"Trade completed with {from_player.name}!")
     messages.append(f"You received: {offer_desc}")
     messages.append(f"You gave: {request_desc}")
+    messages.extend(quest_messages)
 
     return ActionResponse(
         ok=True,
         messages=messages,
         state=build_action_state(player),
     )
+
+
+register_action(
+    "accept_trade",
+    AcceptTradeReq,
+    lambda player, req: accept_trade(player, req.args.trade_id),
+    verbs=("accept_trade",),
+    parse=word_arg("accept_trade", "trade_id"),
+)
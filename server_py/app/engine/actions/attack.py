@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import time
-from ...types import Player, ActionResponse
-from ...db import upsert_player, log_reputation_event
+from ...types import Player, ActionResponse, AttackReq
+from ...db import upsert_player, log_reputation_events
 from ...world import get_location
-from ...factions import get_npc_faction, get_location_factions, get_reputation_event_value
+from ...factions import get_npc_faction, territory_reputation_events
 from ..entities import (
     find_entity,
     find_player_by_name_at,
@@ -16,6 +16,7 @@ from ..entities import (
     filter_current_player,
 )
 from ..state_view import build_action_state
+from ..registry import register_action, text_arg
 
 
 # Simple shared combat constants
@@ -29,71 +30,12 @@ ATTACK_COOLDOWN_SECONDS = 30  # 30 seconds before attacking same target again
 
 def update_quest_progress(player: Player, target_name: str) -> list[str]:
     """
-    Update quest progress for kill objectives.
-    Also updates progress for party members at the same location.
-    Returns list of quest completion messages.
+    Update quest progress for kill objectives, for the player and their party.
+    Only quests subscribed to this target are touched (see quest_progress).
+    Returns list of quest progress messages.
     """
-    from ...db import get_player_party, get_player, upsert_player
-
-    messages = []
-    completed_quest_ids = []
-
-    # Get all party members (regardless of location)
-    party_members_to_update = []
-    party = get_player_party(player.player_id)
-    print(f"[PARTY QUEST] Player {player.name} has party: {party is not None}")
-    if party:
-        print(f"[PARTY QUEST] Party members: {party['members']}")
-        for member_id in party["members"]:
-            if member_id == player.player_id:
-                continue  # Skip self, we'll update them directly
-            member = get_player(member_id)
-            if member:
-                print(f"[PARTY QUEST] Adding {member.name} to quest update list (location: {member.location})")
-                party_members_to_update.append(member)
-
-    # Update quest progress for player and party members
-    all_players = [player] + party_members_to_update
-
-    for p in all_players:
-        player_messages = []
-        player_completed = []
-
-        for quest_id, quest in p.active_quests.items():
-            if quest.status != "accepted":
-                continue
-
-            for objective in quest.objectives:
-                if objective.type == "kill" and objective.target.lower() == target_name.lower():
-                    if objective.progress < objective.required:
-                        objective.progress += 1
-                        player_messages.append(f"Quest progress: {quest.name} ({objective.progress}/{objective.required})")
-
-                        # Check if all objectives are complete
-                        if all(obj.progress >= obj.required for obj in quest.objectives):
-                            quest.status = "completed"
-                            quest.completed_at = int(time.time() * 1000)
-                            player_completed.append(quest_id)
-                            player_messages.append(f"Quest completed: {quest.name}! Return to the quest giver to turn it in.")
-                        break
-
-        # Move completed quests after iteration
-        for quest_id in player_completed:
-            p.completed_quests[quest_id] = p.active_quests[quest_id]
-            del p.active_quests[quest_id]
-
-        # Save party member updates
-        if p.player_id != player.player_id:
-            upsert_player(p)
-            # Add party member messages to main messages with prefix
-            for msg in player_messages:
-                messages.append(f"[Party] {p.name}: {msg}")
-        else:
-            # Add player's own messages
-            messages.extend(player_messages)
-            completed_quest_ids.extend(player_completed)
-
-    return messages
+    from ...quest_progress import record_kill
+    return record_kill(player, target_name)
 
 
 def is_player_attackable(target: Player, attacker: Player, current_time_ms: int) -> tuple[bool, str | None]:
@@ -141,7 +83,8 @@ def attack(player: Player, target_name: str) -> ActionResponse:
             messages.extend(quest_messages)
             
             # Phase 8: Track monster deaths for world evolution
-            from ...world_rules import track_monster_survival
+            from ...world_rules import track_monster_survival, emit_domain_event
+            emit_domain_event("monster_killed", player.location)
             track_monster_survival(player.location)
         else:
             # Update monster HP in world state
@@ -197,21 +140,21 @@ def attack(player: Player, target_name: str) -> ActionResponse:
     player.last_attacked_target = target_player.name
     player.last_attacked_at = current_time_ms
 
-    # Phase 9: Log reputation events for PvP in faction territory
-    location_factions = get_location_factions(player.location)
-    if location_factions:
-        # Attacking in faction territory damages reputation
-        for faction in location_factions:
-            value = get_reputation_event_value("attacked_in_territory")
-            log_reputation_event(
-                player_id=player.player_id,
-                faction_id=faction.faction_id,
-                event_type="attacked_in_territory",
-                value=value,
-                description=f"Attacked {target_player.name} in {faction.name} territory",
-                location_id=player.location
-            )
-
+    # Phase 8: PvP feeds world rules (e.g. town security)
+    from ...world_rules import emit_domain_event, increment_counter
+    emit_domain_event("pvp", player.location)
+    increment_counter(f"{player.location}_pvp_count")
+
+    # Phase 9: Attacking in faction territory damages reputation with every faction there
+    log_reputation_events(territory_reputation_events(
+        player.player_id,
+        player.location,
+        "attacked_in_territory",
+        lambda faction: f"Attacked {target_player.name} in {faction} territory",
+    ))
+
+    # The action runs in one transaction (apply_action._call_handler): if either
+    # save loses a version race, the other and the reputation events roll back too
     upsert_player(target_player)
     upsert_player(player)
 
@@ -219,4 +162,13 @@ def attack(player: Player, target_name: str) -> ActionResponse:
         ok=True,
         messages=messages,
         state=build_action_state(player, scene_dirty=False),
-    )
\ No newline at end of file
+    )
+
+
+register_action(
+    "attack",
+    AttackReq,
+    lambda player, req: attack(player, req.args.target),
+    verbs=("attack", "hit", "kill"),
+    parse=text_arg("attack", "target", missing="Attack what?"),
+)
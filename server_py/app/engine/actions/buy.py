@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, BuyReq
 from ..entities import get_entities_at, serialize_entity
 from ...world import get_location
 from ...db import upsert_player
+from ...quest_progress import record_inventory_change
 from ..state_view import build_action_state
+from ..registry import register_action, text_arg
 
 
 def buy(player: Player, item_name: str) -> ActionResponse:
@@ -30,11 +32,22 @@ def buy(player: Player, item_name: str) -> ActionResponse:
     # Perform transaction
     player.inventory["coin"] = coins - price
     player.inventory[item_name] = player.inventory.get(item_name, 0) + 1
+    messages = [f"You buy a {item_name} for {price} coins."]
+    messages.extend(record_inventory_change(player, ["coin", item_name]))
 
     upsert_player(player)
 
     return ActionResponse(
         ok=True,
-        messages=[f"You buy a {item_name} for {price} coins."],
+        messages=messages,
         state=build_action_state(player, scene_dirty=False),
-    )
\ No newline at end of file
+    )
+
+
+register_action(
+    "buy",
+    BuyReq,
+    lambda player, req: buy(player, req.args.item),
+    verbs=("buy",),
+    parse=text_arg("buy", "item"),
+)
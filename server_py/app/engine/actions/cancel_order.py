@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from ...types import Player, ActionResponse, CancelOrderReq
+from ...db import MarketError, MARKET_CURRENCY, upsert_player
+from ...market import MARKET
+from ...quest_progress import record_inventory_change
+from ..state_view import build_action_state
+from ..registry import register_action
+
+
+def cancel_order(player: Player, order_id: int) -> ActionResponse:
+    """
+    Cancel one of your open market orders.
+    The unfilled part of its escrow is returned in the same transaction.
+    """
+    try:
+        order, saved = MARKET.cancel_order(player, order_id)
+    except MarketError as e:
+        return ActionResponse(ok=False, error=str(e))
+
+    for field in Player.model_fields:
+        setattr(player, field, getattr(saved, field))
+
+    if order["side"] == "sell":
+        refund = f"{order['remaining']} {order['item']}"
+    else:
+        refund = f"{order['price'] * order['remaining']} {MARKET_CURRENCY}"
+
+    # The refund can complete (or undo) collect objectives
+    messages = [f"Order #{order_id} cancelled. {refund} returned to you."]
+    messages.extend(record_inventory_change(player, [order["item"], MARKET_CURRENCY]))
+    upsert_player(player)
+
+    return ActionResponse(
+        ok=True,
+        messages=messages,
+        state=build_action_state(player),
+    )
+
+
+# Parsed from "market cancel <order>" (see market_book)
+register_action("cancel_order", CancelOrderReq, lambda player, req: cancel_order(player, req.args.order_id))
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, CancelTradeReq
 from ...db import get_pending_trade, delete_pending_trade
 from ..state_view import build_action_state
+from ..registry import register_action, word_arg
 
 
 def cancel_trade(player: Player, trade_id: str) -> ActionResponse:
@@ -26,3 +27,12 @@ def cancel_trade(player: Player, trade_id: str) -> ActionResponse:
         messages=[f"Trade '{trade_id}' has been cancelled."],
         state=build_action_state(player),
     )
+
+
+register_action(
+    "cancel_trade",
+    CancelTradeReq,
+    lambda player, req: cancel_trade(player, req.args.trade_id),
+    verbs=("cancel_trade",),
+    parse=word_arg("cancel_trade", "trade_id"),
+)
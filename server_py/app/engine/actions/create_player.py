@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import uuid
 
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, CreatePlayerReq
 from ...db import upsert_player, get_player_by_name
 from ...world import get_location
-from ..entities import get_entities_at, get_adjacent_scenes, filter_current_player
+from ...sessions import SESSIONS
+from ..entities import get_entities_at, get_adjacent_scenes, filter_current_player, player_entity
 from ..state_view import build_action_state
+from ..registry import register_action, text_arg
 
 
 def create_player(name: str) -> ActionResponse:
@@ -35,6 +37,7 @@ def create_player(name: str) -> ActionResponse:
         max_hp=10,
     )
     upsert_player(player)
+    SESSIONS.publish_presence(player_entity(player), player.location, "arrived")
 
     loc = get_location(player.location)
 
@@ -44,3 +47,13 @@ def create_player(name: str) -> ActionResponse:
         state=build_action_state(player, scene_dirty=True),
     )
 
+
+register_action(
+    "create_player",
+    CreatePlayerReq,
+    lambda player, req: create_player(req.args.name),
+    turn_cost=0,
+    needs_player=False,
+    verbs=("create", "new"),
+    parse=text_arg("create_player", "name", missing="Create who?"),
+)
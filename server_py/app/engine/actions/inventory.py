@@ -1,5 +1,6 @@
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, InventoryReq
 from ...items import ITEMS
+from ..registry import register_action
 
 
 def inventory(player: Player) -> ActionResponse:
@@ -12,4 +13,13 @@ def inventory(player: Player) -> ActionResponse:
         name = item.name if item else item_id
         lines.append(f"- {name} x{qty}")
 
-    return ActionResponse(ok=True, messages=lines)
\ No newline at end of file
+    return ActionResponse(ok=True, messages=lines)
+
+
+register_action(
+    "inventory",
+    InventoryReq,
+    lambda player, req: inventory(player),
+    passive=True,
+    verbs=("inventory", "inv", "i"),
+)
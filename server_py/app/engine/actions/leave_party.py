@@ -4,7 +4,7 @@ Phase 10: Leave party action
 
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, LeavePartyReq
 from ...db import (
     get_player_party,
     remove_party_member,
@@ -12,6 +12,7 @@ from ...db import (
     get_party,
 )
 from ..state_view import build_action_state
+from ..registry import register_action
 
 
 def leave_party(player: Player) -> ActionResponse:
@@ -46,3 +47,7 @@ def leave_party(player: Player) -> ActionResponse:
         messages=["You left the party."],
         state=build_action_state(player)
     )
+
+
+# Parsed from "party leave" (see party_status)
+register_action("leave_party", LeavePartyReq, lambda player, req: leave_party(player))
@@ -1,64 +1,78 @@
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
-from ...db import get_pending_trades_for_player, get_pending_trades_by_player, get_player
-from ..state_view import build_action_state
+from typing import Optional
 
+from ...types import Player, ActionResponse, ListTradesReq
+from ...db import get_player_trades_page, count_player_trades, TRADE_PAGE_SIZE
+from ..state_view import build_action_state, describe_received_trades, describe_sent_trades
+from ..registry import register_action
 
-def list_trades(player: Player) -> ActionResponse:
-    """
-    List all pending trades (sent and received).
-    """
-    messages: list[str] = []
-
-    # Get trades sent by this player
-    sent_trades = get_pending_trades_by_player(player.player_id)
 
-    # Get trades received by this player
-    received_trades = get_pending_trades_for_player(player.player_id)
+def _items_desc(items: dict[str, int]) -> str:
+    return ", ".join(f"{item}:{q}" for item, q in items.items()) if items else "nothing"
 
-    if not sent_trades and not received_trades:
-        messages.append("You have no pending trades.")
-        return ActionResponse(
-            ok=True,
-            messages=messages,
-            state=build_action_state(player),
-        )
 
-    # Display sent trades
-    if sent_trades:
-        messages.append("=== Trades You've Offered ===")
-        for trade in sent_trades:
-            recipient = get_player(trade["to_player_id"])
-            recipient_name = recipient.name if recipient else "Unknown"
-
-            offer_desc = ", ".join(f"{item}:{q}" for item, q in trade["offered_items"].items()) if trade["offered_items"] else "nothing"
-            request_desc = ", ".join(f"{item}:{q}" for item, q in trade["requested_items"].items()) if trade["requested_items"] else "nothing"
-
-            messages.append(f"  [{trade['trade_id']}] To {recipient_name}: {offer_desc} for {request_desc}")
-        messages.append("")
+def list_trades(player: Player, cursor: Optional[str] = None, limit: Optional[int] = None) -> ActionResponse:
+    """
+    List one page of pending trades (sent and received), oldest first.
+    Pass the cursor from the previous page to continue.
+    """
+    try:
+        trades, next_cursor = get_player_trades_page(player.player_id, limit or TRADE_PAGE_SIZE, cursor)
+    except ValueError:
+        return ActionResponse(ok=False, error=f"Invalid trade cursor '{cursor}'.")
 
-    # Display received trades
-    if received_trades:
-        messages.append("=== Trades Offered to You ===")
-        for trade in received_trades:
-            sender = get_player(trade["from_player_id"])
-            sender_name = sender.name if sender else "Unknown"
+    counts = count_player_trades(player.player_id)
+    messages: list[str] = []
 
-            offer_desc = ", ".join(f"{item}:{q}" for item, q in trade["offered_items"].items()) if trade["offered_items"] else "nothing"
-            request_desc = ", ".join(f"{item}:{q}" for item, q in trade["requested_items"].items()) if trade["requested_items"] else "nothing"
+    if not trades:
+        messages.append("You have no pending trades." if not cursor else "No more pending trades.")
+    else:
+        messages.append(f"=== Pending Trades ({counts['received']} offered to you, {counts['sent']} offered by you) ===")
 
-            # Check if player can accept (has requested items)
-            can_accept = all(
-                player.inventory.get(item, 0) >= qty
-                for item, qty in trade["requested_items"].items()
+    received = iter(describe_received_trades(player, [t for t in trades if t["direction"] == "received"]))
+    sent = iter(describe_sent_trades([t for t in trades if t["direction"] == "sent"]))
+    page = []
+    for trade in trades:
+        if trade["direction"] == "received":
+            entry = next(received)
+            status = "" if entry["can_accept"] else " [Cannot accept - missing items]"
+            messages.append(
+                f"  [{entry['trade_id']}] From {entry['from_player_name']}: "
+                f"{_items_desc(entry['offered_items'])} for {_items_desc(entry['requested_items'])}{status}"
             )
-            status = "" if can_accept else " [Cannot accept - missing items]"
+        else:
+            entry = next(sent)
+            messages.append(
+                f"  [{entry['trade_id']}] To {entry['to_player_name']}: "
+                f"{_items_desc(entry['offered_items'])} for {_items_desc(entry['requested_items'])}"
+            )
+        page.append({"direction": trade["direction"], **entry})
 
-            messages.append(f"  [{trade['trade_id']}] From {sender_name}: {offer_desc} for {request_desc}{status}")
+    if next_cursor:
+        messages.append(f"More: list_trades {next_cursor}")
 
+    state = build_action_state(player)
+    state["trades_page"] = {"trades": page, "next_cursor": next_cursor, "counts": counts}
     return ActionResponse(
         ok=True,
         messages=messages,
-        state=build_action_state(player),
+        state=state,
     )
+
+
+def _parse_list_trades(rest: list[str]) -> dict:
+    # list_trades <cursor> continues from the cursor printed on the previous page
+    if rest:
+        return {"action": "list_trades", "args": {"cursor": rest[0]}}
+    return {"action": "list_trades"}
+
+
+register_action(
+    "list_trades",
+    ListTradesReq,
+    lambda player, req: list_trades(player, req.args.cursor if req.args else None, req.args.limit if req.args else None),
+    passive=True,
+    verbs=("trades", "list_trades"),
+    parse=_parse_list_trades,
+)
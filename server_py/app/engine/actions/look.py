@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, LookReq
 from ...world import get_location
 from ...db import get_world_state
 from ..entities import get_entities_at, serialize_entity, filter_current_player
 from ..state_view import build_action_state
+from ..registry import register_action
 
 
 def look(player: Player) -> ActionResponse:
@@ -37,4 +38,7 @@ def look(player: Player) -> ActionResponse:
         ok=True,
         messages=messages,
         state=build_action_state(player, scene_dirty=False),
-    )
\ No newline at end of file
+    )
+
+
+register_action("look", LookReq, lambda player, req: look(player), passive=True, verbs=("look", "l"))
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from ...types import Player, ActionResponse, MarketBookReq
+from ...db import MARKET_CURRENCY
+from ...market import MARKET
+from ..state_view import build_action_state
+from ..registry import ParseError, register_action
+
+
+def market_book(player: Player, item: str) -> ActionResponse:
+    """
+    Show the best bids and asks for an item.
+    """
+    summary = MARKET.book_summary(item)
+    messages: list[str] = [f"=== Market: {summary['item']} ==="]
+
+    if not summary["bids"] and not summary["asks"]:
+        messages.append("No open orders.")
+    else:
+        messages.append("Selling:")
+        for level in reversed(summary["asks"]):
+            messages.append(f"  {level['quantity']} at {level['price']} {MARKET_CURRENCY}")
+        if not summary["asks"]:
+            messages.append("  (none)")
+        messages.append("Buying:")
+        for level in summary["bids"]:
+            messages.append(f"  {level['quantity']} at {level['price']} {MARKET_CURRENCY}")
+        if not summary["bids"]:
+            messages.append("  (none)")
+
+    state = build_action_state(player)
+    state["market"] = summary
+    return ActionResponse(
+        ok=True,
+        messages=messages,
+        state=state,
+    )
+
+
+def _parse_market(rest: list[str]) -> dict:
+    # market buy <qty> <item> at <price> | market sell <qty> <item> at <price>
+    # market cancel <order_id> | market orders | market <item>
+    usage = "Market commands: market buy|sell <qty> <item> at <price>, market cancel <order>, market orders, market <item>"
+    if not rest:
+        raise ParseError(usage)
+
+    subcommand = rest[0].lower()
+
+    if subcommand in ("buy", "sell"):
+        if len(rest) != 5 or rest[3].lower() != "at":
+            raise ParseError(f"Use format: market {subcommand} <qty> <item> at <price>")
+        try:
+            quantity = int(rest[1])
+            price = int(rest[4])
+        except ValueError:
+            raise ParseError("Quantity and price must be whole numbers.")
+        if quantity <= 0 or price <= 0:
+            raise ParseError("Quantity and price must be positive.")
+        return {
+            "action": "place_order",
+            "args": {"item": rest[2], "side": subcommand, "price": price, "quantity": quantity}
+        }
+
+    if subcommand == "cancel" and len(rest) == 2:
+        try:
+            order_id = int(rest[1].lstrip("#"))
+        except ValueError:
+            raise ParseError("Cancel which order? Use the order number, e.g. market cancel 12")
+        return {"action": "cancel_order", "args": {"order_id": order_id}}
+
+    if subcommand == "orders":
+        return {"action": "market_orders"}
+
+    if len(rest) == 1:
+        return {"action": "market_book", "args": {"item": rest[0]}}
+
+    raise ParseError(usage)
+
+
+register_action(
+    "market_book",
+    MarketBookReq,
+    lambda player, req: market_book(player, req.args.item),
+    passive=True,
+    verbs=("market",),
+    parse=_parse_market,
+)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from ...types import Player, ActionResponse, MarketOrdersReq
+from ...db import get_player_market_orders, MARKET_CURRENCY
+from ..state_view import build_action_state
+from ..registry import register_action
+
+
+def market_orders(player: Player) -> ActionResponse:
+    """
+    List your open market orders.
+    """
+    orders = get_player_market_orders(player.player_id)
+    messages: list[str] = []
+
+    if not orders:
+        messages.append("You have no open market orders.")
+    else:
+        messages.append("=== Your Market Orders ===")
+        for order in orders:
+            filled = order["quantity"] - order["remaining"]
+            progress = f" ({filled}/{order['quantity']} filled)" if filled else ""
+            messages.append(
+                f"  [#{order['order_id']}] {order['side']} {order['remaining']} {order['item']} "
+                f"at {order['price']} {MARKET_CURRENCY}{progress}"
+            )
+
+    return ActionResponse(
+        ok=True,
+        messages=messages,
+        state=build_action_state(player),
+    )
+
+
+# Parsed from "market orders" (see market_book)
+register_action("market_orders", MarketOrdersReq, lambda player, req: market_orders(player), passive=True)
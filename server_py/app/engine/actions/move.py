@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, MoveReq
 from ...world import get_location
 from ...db import upsert_player
-from ..entities import get_entities_at, serialize_entity, get_adjacent_scenes, filter_current_player
+from ...sessions import SESSIONS
+from ..entities import get_entities_at, serialize_entity, get_adjacent_scenes, filter_current_player, player_entity
 from ..state_view import build_action_state
+from ..registry import register_action, text_arg
 
 
 def move(player: Player, to_label_or_id: str) -> ActionResponse:
@@ -30,8 +32,13 @@ def move(player: Player, to_label_or_id: str) -> ActionResponse:
 
     to_loc = get_location(player.location)
 
+    # Phase 11: Players watching either location see the change without polling
+    SESSIONS.publish_presence(player_entity(player), from_loc.id, "left")
+    SESSIONS.publish_presence(player_entity(player), to_loc.id, "arrived")
+
     # Phase 8: Track monster survival for world evolution
-    from ...world_rules import track_monster_survival
+    from ...world_rules import track_monster_survival, emit_domain_event
+    emit_domain_event("player_entered", player.location)
     track_monster_survival(player.location)
 
     return ActionResponse(
@@ -41,4 +48,13 @@ def move(player: Player, to_label_or_id: str) -> ActionResponse:
             to_loc.description,
         ],
         state=build_action_state(player, scene_dirty=True),
-    )
\ No newline at end of file
+    )
+
+
+register_action(
+    "move",
+    MoveReq,
+    lambda player, req: move(player, req.args.to),
+    verbs=("go", "move", "walk"),
+    parse=text_arg("move", "to", missing="Go where?"),
+)
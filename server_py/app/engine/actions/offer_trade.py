@@ -1,10 +1,20 @@
 from __future__ import annotations
 
 import uuid
-from ...types import Player, ActionResponse
-from ...db import create_pending_trade, get_player
+from typing import Optional
+from ...types import Player, ActionResponse, OfferTradeReq
+from ...db import (
+    create_pending_trade,
+    get_pending_trade,
+    get_player,
+    count_pending_trades_by_player,
+    MAX_OUTSTANDING_TRADE_OFFERS,
+    TRADE_OFFER_TTL_MS,
+)
+from ...sessions import SESSIONS
 from ..entities import find_player_by_name_at
-from ..state_view import build_action_state
+from ..state_view import build_action_state, describe_received_trades
+from ..registry import ParseError, register_action
 
 
 def offer_trade(
@@ -39,6 +49,12 @@ def offer_trade(
                 error=f"You don't have {quantity} {item_name} to offer.",
             )
 
+    if count_pending_trades_by_player(player.player_id) >= MAX_OUTSTANDING_TRADE_OFFERS:
+        return ActionResponse(
+            ok=False,
+            error=f"You already have {MAX_OUTSTANDING_TRADE_OFFERS} open trade offers. Cancel one or wait for them to expire.",
+        )
+
     # Create the trade
     trade_id = str(uuid.uuid4())[:16]  # Use 16 chars for better collision resistance
     create_pending_trade(
@@ -53,10 +69,22 @@ def offer_trade(
     offer_desc = ", ".join(f"{q}x {item}" for item, q in offer_items.items()) if offer_items else "nothing"
     request_desc = ", ".join(f"{q}x {item}" for item, q in request_items.items()) if request_items else "nothing"
 
+    # Phase 11: Push the offer to the recipient if they're connected
+    if SESSIONS.is_connected(target_player.player_id):
+        trade = get_pending_trade(trade_id)
+        if trade:
+            SESSIONS.publish(
+                [target_player.player_id],
+                "trade_offer",
+                f"{player.name} offers you {offer_desc} for {request_desc}. Accept with: accept_trade {trade_id}",
+                describe_received_trades(target_player, [trade])[0],
+            )
+
     messages.append(f"Trade offer created (ID: {trade_id})")
     messages.append(f"You offer: {offer_desc}")
     messages.append(f"You request: {request_desc}")
     messages.append(f"{target_player.name} can accept with: accept_trade {trade_id}")
+    messages.append(f"The offer expires in {TRADE_OFFER_TTL_MS // 60000} minutes.")
 
     # Build complete state including pending trades
     state = build_action_state(player)
@@ -67,3 +95,53 @@ def offer_trade(
         messages=messages,
         state=state,
     )
+
+
+def _parse_items(text: str) -> dict[str, int]:
+    # "sword:2 shield" -> {"sword": 2, "shield": 1}
+    items = {}
+    for token in text.split():
+        if ":" in token:
+            item_name, qty_str = token.split(":", 1)
+            try:
+                qty = int(qty_str)
+            except ValueError:
+                raise ParseError(f"Invalid quantity in '{token}': {qty_str}")
+            if qty <= 0:
+                raise ParseError(f"Quantity must be positive in '{token}'")
+            items[item_name] = qty
+        else:
+            # No colon means quantity 1
+            items[token] = 1
+    return items
+
+
+def _parse_offer(rest: list[str]) -> Optional[dict]:
+    # Format: offer <player_name> item:qty [item:qty ...] for item:qty [item:qty ...]
+    # Example: offer Alice sword:2 for gold:10
+    if not rest:
+        return None
+    text_parts = " ".join(rest)
+    if " for " not in text_parts:
+        raise ParseError("Use format: offer <player> item:qty [item:qty ...] for item:qty [item:qty ...]")
+    before_for, after_for = text_parts.split(" for ", 1)
+    parts = before_for.split()
+    if not parts:
+        raise ParseError("Specify player to trade with.")
+    return {
+        "action": "offer_trade",
+        "args": {
+            "to_player": parts[0],
+            "offer_items": _parse_items(" ".join(parts[1:])),
+            "request_items": _parse_items(after_for.strip()),
+        },
+    }
+
+
+register_action(
+    "offer_trade",
+    OfferTradeReq,
+    lambda player, req: offer_trade(player, req.args.to_player, req.args.offer_items, req.args.request_items),
+    verbs=("offer",),
+    parse=_parse_offer,
+)
@@ -5,15 +5,20 @@ Phase 10: Party invite action
 from __future__ import annotations
 
 import uuid
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, PartyInviteReq
 from ...db import (
     get_player,
     create_party,
     get_player_party,
     create_party_invite,
     get_party,
+    count_party_invites_by_player,
+    MAX_OUTSTANDING_PARTY_INVITES,
+    PARTY_INVITE_TTL_MS,
 )
-from ..state_view import build_action_state
+from ...sessions import SESSIONS
+from ..state_view import build_action_state, get_party_invites_info
+from ..registry import register_action
 
 
 def party_invite(player: Player, target_player_name: str) -> ActionResponse:
@@ -48,6 +53,12 @@ def party_invite(player: Player, target_player_name: str) -> ActionResponse:
             error=f"{target.name} is already in a party."
         )
     
+    if count_party_invites_by_player(player.player_id) >= MAX_OUTSTANDING_PARTY_INVITES:
+        return ActionResponse(
+            ok=False,
+            error=f"You already have {MAX_OUTSTANDING_PARTY_INVITES} open party invites. Wait for them to be answered or expire."
+        )
+
     # If inviter is not in a party, create one
     if not inviter_party:
         party_id = str(uuid.uuid4())
@@ -69,12 +80,29 @@ def party_invite(player: Player, target_player_name: str) -> ActionResponse:
         from_player_id=player.player_id,
         to_player_id=target.player_id,
     )
-    
+
+    # Phase 11: Push the invite to the target if they're connected
+    if SESSIONS.is_connected(target.player_id):
+        invite = next((i for i in get_party_invites_info(target) if i["invite_id"] == invite_id), None)
+        if invite:
+            SESSIONS.publish(
+                [target.player_id],
+                "party_invite",
+                f"{player.name} invites you to join {inviter_party.get('name', 'their party')}. "
+                f"Accept with: accept_party_invite {invite_id}",
+                invite,
+            )
+
     return ActionResponse(
         ok=True,
         messages=[
             f"You invite {target.name} to join your party.",
-            f"They can accept with: accept_party_invite {invite_id}"
+            f"They can accept with: accept_party_invite {invite_id}",
+            f"The invite expires in {PARTY_INVITE_TTL_MS // 60000} minutes."
         ],
         state=build_action_state(player)
     )
+
+
+# Parsed from "party invite <player>" (see party_status)
+register_action("party_invite", PartyInviteReq, lambda player, req: party_invite(player, req.args.target_player))
@@ -4,9 +4,10 @@ Phase 10: View party status action
 
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, PartyStatusReq
 from ...db import get_player_party, get_player
 from ..state_view import build_action_state
+from ..registry import ParseError, register_action
 
 
 def party_status(player: Player) -> ActionResponse:
@@ -40,3 +41,29 @@ def party_status(player: Player) -> ActionResponse:
         messages=messages,
         state=build_action_state(player)
     )
+
+
+def _parse_party(rest: list[str]) -> dict:
+    # party | party status | party invite <player> | party leave
+    if not rest:
+        return {"action": "party_status"}
+
+    subcommand = rest[0].lower()
+    if subcommand == "invite" and len(rest) >= 2:
+        return {"action": "party_invite", "args": {"target_player": " ".join(rest[1:])}}
+    if subcommand == "leave":
+        return {"action": "leave_party"}
+    if subcommand in ("status", "info"):
+        return {"action": "party_status"}
+
+    raise ParseError("Party commands: party invite <player>, party leave, party status")
+
+
+register_action(
+    "party_status",
+    PartyStatusReq,
+    lambda player, req: party_status(player),
+    passive=True,
+    verbs=("party",),
+    parse=_parse_party,
+)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from ...types import Player, ActionResponse, PlaceOrderReq
+from ...db import MarketError, MARKET_CURRENCY, modify_players, upsert_player
+from ...market import MARKET
+from ...notices import queue_notice
+from ...quest_progress import record_inventory_change
+from ..state_view import build_action_state
+from ..registry import register_action
+
+
+def place_order(player: Player, item: str, side: str, price: int, quantity: int) -> ActionResponse:
+    """
+    Place a limit order on the global market.
+    Whatever crosses the book fills immediately at the resting orders'
+    prices; the rest stays open with its items or coins held in escrow.
+    """
+    try:
+        order_id, fills, saved = MARKET.place_order(player, item, side, price, quantity)
+    except MarketError as e:
+        return ActionResponse(ok=False, error=str(e))
+
+    # Continue from the row that was just saved, not the copy read at the start of the request
+    for field in Player.model_fields:
+        setattr(player, field, getattr(saved, field))
+
+    item = item.strip().lower()
+    messages: list[str] = []
+    filled = sum(f["quantity"] for f in fills)
+    if filled:
+        spent = sum(f["price"] * f["quantity"] for f in fills)
+        verb = "Bought" if side == "buy" else "Sold"
+        messages.append(f"{verb} {filled} {item} for {spent} {MARKET_CURRENCY}.")
+
+    # Escrow and fills change both the item and coins; collect objectives follow
+    # inventories on both sides of the fills
+    changed = [item, MARKET_CURRENCY]
+    messages.extend(record_inventory_change(player, changed))
+    upsert_player(player)
+    counterparties = sorted({f["player_id"] for f in fills})
+    for p, quest_messages in modify_players(counterparties, lambda p: record_inventory_change(p, changed)):
+        for msg in quest_messages:
+            queue_notice([p.player_id], msg)
+
+    if filled < quantity:
+        messages.append(
+            f"Order #{order_id} is open: {side} {quantity - filled} {item} at {price} {MARKET_CURRENCY} each."
+        )
+
+    return ActionResponse(
+        ok=True,
+        messages=messages,
+        state=build_action_state(player),
+    )
+
+
+# Parsed from "market buy|sell ..." (see market_book)
+register_action(
+    "place_order",
+    PlaceOrderReq,
+    lambda player, req: place_order(player, req.args.item, req.args.side, req.args.price, req.args.quantity),
+)
@@ -4,10 +4,11 @@ Phase 9: Reputation status action
 
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
-from ...db import calculate_reputation, get_all_factions
-from ...factions import get_reputation_tier
+from ...types import Player, ActionResponse, ReputationReq
+from ...db import calculate_reputation, get_all_factions, get_player_standings
+from ...factions import get_standing_tier
 from ..state_view import build_action_state
+from ..registry import register_action
 
 
 def reputation(player: Player) -> ActionResponse:
@@ -24,13 +25,16 @@ def reputation(player: Player) -> ActionResponse:
 
     messages = ["Your reputation:"]
 
+    standings = get_player_standings(player.player_id)
     reputation_data = {}
     for faction in factions:
-        rep_value = calculate_reputation(player.player_id, faction["faction_id"])
-        tier = get_reputation_tier(rep_value)
+        # Tiers follow the time-decayed standing; the lifetime total is kept for reference
+        rep_value = round(standings.get(faction["faction_id"], 0.0))
+        tier = get_standing_tier(rep_value)
         reputation_data[faction["faction_id"]] = {
             "name": faction["name"],
             "value": rep_value,
+            "lifetime": calculate_reputation(player.player_id, faction["faction_id"]),
             "tier": tier
         }
         messages.append(f"  {faction['name']}: {tier} ({rep_value})")
@@ -43,3 +47,12 @@ def reputation(player: Player) -> ActionResponse:
         messages=messages,
         state=state
     )
+
+
+register_action(
+    "reputation",
+    ReputationReq,
+    lambda player, req: reputation(player),
+    passive=True,
+    verbs=("reputation", "rep", "factions"),
+)
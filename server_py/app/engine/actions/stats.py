@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, StatsReq
 from ..state_view import build_action_state
+from ..registry import register_action
 
 
 def stats(player: Player) -> ActionResponse:
@@ -14,4 +15,13 @@ def stats(player: Player) -> ActionResponse:
             f"XP: {player.xp}",
         ],
         state=build_action_state(player, scene_dirty=False),
-    )
\ No newline at end of file
+    )
+
+
+register_action(
+    "stats",
+    StatsReq,
+    lambda player, req: stats(player),
+    passive=True,
+    verbs=("stats", "hp", "me", "status"),
+)
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import time
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, TalkReq
 from ..entities import find_entity, get_entities_at, serialize_entity
 from ...world import get_location
 from ...world_quests import QUEST_TEMPLATES, is_quest_available
 from ..state_view import build_action_state
-from ...db import upsert_player
+from ...db import upsert_player, log_reputation_events
+from ...factions import quest_reputation_events
+from ...quest_progress import record_inventory_change
+from ..registry import register_action, text_arg
 from copy import deepcopy
 
 
@@ -41,11 +44,20 @@ def talk(player: Player, target: str) -> ActionResponse:
                 turned_in_quests.append(quest)
 
         if turned_in_quests:
+            reputation_events = []
             for quest in turned_in_quests:
                 messages.append(f'"Excellent work on {quest.name}!"')
                 for item, quantity in quest.rewards.items():
                     messages.append(f"Received: {quantity}x {item}")
+                reputation_events.extend(quest_reputation_events(
+                    player.player_id, player.location, quest.name, npc_id=npc["id"]
+                ))
+            messages.extend(record_inventory_change(
+                player, [item for quest in turned_in_quests for item in quest.rewards]
+            ))
             upsert_player(player)
+            # Phase 9: Completing quests improves reputation
+            log_reputation_events(reputation_events)
 
     if npc.get("role") == "quest_giver":
         # Check for active quests with this NPC
@@ -128,4 +140,13 @@ def talk(player: Player, target: str) -> ActionResponse:
         ok=True,
         messages=messages,
         state=build_action_state(player, scene_dirty=False),
-    )
\ No newline at end of file
+    )
+
+
+register_action(
+    "talk",
+    TalkReq,
+    lambda player, req: talk(player, req.args.target),
+    verbs=("talk",),
+    parse=text_arg("talk", "target"),
+)
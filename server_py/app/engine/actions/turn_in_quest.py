@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import time
-from ...types import Player, ActionResponse
-from ...db import upsert_player
+from ...types import Player, ActionResponse, TurnInQuestReq
+from ...db import upsert_player, log_reputation_events
+from ...factions import quest_reputation_events
+from ...quest_progress import record_inventory_change
 from ..entities import get_entities_at, get_adjacent_scenes
 from ...world import get_location
 from ..state_view import build_action_state
+from ..registry import register_action
 
 
 def turn_in_quest(player: Player, quest_id: str) -> ActionResponse:
@@ -43,11 +46,20 @@ def turn_in_quest(player: Player, quest_id: str) -> ActionResponse:
     # Move to archived quests
     player.archived_quests[quest_id] = quest
     del player.completed_quests[quest_id]
+    messages.extend(record_inventory_change(player, quest.rewards))
 
     upsert_player(player)
 
+    # Phase 9: Completing quests improves reputation with the giver's faction
+    log_reputation_events(
+        quest_reputation_events(player.player_id, player.location, quest.name, quest.giver_npc_id)
+    )
+
     return ActionResponse(
         ok=True,
         messages=messages,
         state=build_action_state(player, scene_dirty=False),
     )
+
+
+register_action("turn_in_quest", TurnInQuestReq, lambda player, req: turn_in_quest(player, req.args.quest_id))
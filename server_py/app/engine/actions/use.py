@@ -1,9 +1,11 @@
-from ...types import Player, ActionResponse
+from ...types import Player, ActionResponse, UseReq
 from ...items import ITEMS
 from ...db import upsert_player
+from ...quest_progress import record_inventory_change
 from ..entities import get_entities_at, serialize_entity, get_adjacent_scenes
 from ...world import get_location
 from ..state_view import build_action_state
+from ..registry import register_action, text_arg
 
 
 def normalize_item_key(name: str) -> str:
@@ -26,13 +28,24 @@ def use(player: Player, item_name: str) -> ActionResponse:
         player.inventory[item_key] -= 1
         if player.inventory[item_key] <= 0:
             del player.inventory[item_key]
+        messages = [f"You use {item.name}. (+{item.heal} HP)"]
+        messages.extend(record_inventory_change(player, [item_key]))
 
         upsert_player(player)
 
         return ActionResponse(
             ok=True,
-            messages=[f"You use {item.name}. (+{item.heal} HP)"],
+            messages=messages,
             state=build_action_state(player, scene_dirty=False),
         )
 
-    return ActionResponse(ok=False, error="You can't use that item.")
\ No newline at end of file
+    return ActionResponse(ok=False, error="You can't use that item.")
+
+
+register_action(
+    "use",
+    UseReq,
+    lambda player, req: use(player, req.args.item),
+    verbs=("use", "eat", "drink"),
+    parse=text_arg("use", "item", missing="Use what?"),
+)
@@ -1,46 +1,35 @@
 from __future__ import annotations
 
-from typing import Optional, Any
-
-from pydantic import TypeAdapter
-
-from ..types import ActionRequest, ActionResponse
-from ..db import get_player, log_action, increment_world_turn, get_world_turn
-
-from .actions.create_player import create_player
-from .actions.look import look
-from .actions.move import move
-from .actions.attack import attack
-from .actions.stats import stats
-from .actions.inventory import inventory
-from .actions.use import use 
-from .actions.talk import talk
-from .actions.buy import buy
-from .actions.accept_quest import accept_quest
-from .actions.turn_in_quest import turn_in_quest
-from .actions.offer_trade import offer_trade
-from .actions.accept_trade import accept_trade
-from .actions.list_trades import list_trades
-from .actions.cancel_trade import cancel_trade
-from .actions.party_invite import party_invite
-from .actions.accept_party_invite import accept_party_invite
-from .actions.leave_party import leave_party
-from .actions.party_status import party_status
-from .actions.reputation import reputation
-
-
-_action_adapter = TypeAdapter(ActionRequest)
+from typing import Optional, Any, Callable, List, Union
+
+from ..types import ActionResponse, BatchResponse, Player
+from ..db import (
+    get_player, log_action, increment_world_turn, get_world_turn, StalePlayerError, transaction,
+    after_commit,
+)
+from ..notices import drain_notices
+from ..world_scheduler import WORLD_SCHEDULER
+from .parse_command import parse_command, ParseError
+from .registry import ActionSpec, load_actions, validate_request
+from .state_view import build_action_state, deferred_state
+
+
+# Every action module registers itself (request model, handler, passive flag, turn cost)
+ACTIONS = load_actions()
+
+# Actions that only read: they don't advance the world clock
+PASSIVE_ACTIONS = frozenset(name for name, spec in ACTIONS.items() if spec.passive)
 
 
 def apply_action(*, player_id: Optional[str], req_json: Any) -> ActionResponse:
     try:
-        req = _action_adapter.validate_python(req_json)
+        req = validate_request(req_json)
     except Exception:
         return ActionResponse(ok=False, error="Invalid action payload.")
 
     # create_player does not require x-player-id
-    if req.action == "create_player":
-        result = create_player(req.args.name)
+    if not ACTIONS[req.action].needs_player:
+        result = _call_handler(ACTIONS[req.action], None, req)
         pid = (
             result.state["player"]["player_id"]
             if result.state and "player" in result.state
@@ -62,74 +51,39 @@ def apply_action(*, player_id: Optional[str], req_json: Any) -> ActionResponse:
     if not player:
         return ActionResponse(ok=False, error="Unknown player_id.")
 
-    if req.action == "look":
-        result = look(player)
-    elif req.action == "move":
-        result = move(player, req.args.to)
-    elif req.action == "attack":
-        result = attack(player, req.args.target)
-    elif req.action == "stats":
-        result = stats(player)
-    elif req.action == "inventory":
-        result = inventory(player)
-    elif req.action == "use":
-        result = use(player, req.args.item)
-    elif req.action == "talk":
-        result = talk(player, req.args.target)
-    elif req.action == "buy":
-        result = buy(player, req.args.item)
-    elif req.action == "accept_quest":
-        result = accept_quest(player, req.args.quest_id)
-    elif req.action == "turn_in_quest":
-        result = turn_in_quest(player, req.args.quest_id)
-    elif req.action == "offer_trade":
-        result = offer_trade(
-            player,
-            req.args.to_player,
-            req.args.offer_items,
-            req.args.request_items,
+    return _run_action(player, req)
+
+
+def _run_action(player: Player, req: Any) -> ActionResponse:
+    """Dispatch one validated action for a loaded player, then advance the world and log it."""
+    spec = ACTIONS[req.action]
+    try:
+        result = _call_handler(spec, player, req)
+    except StalePlayerError as e:
+        # Optimistic concurrency: someone else saved this player (or the
+        # other party to the action) after we read it. The handler's
+        # transaction rolled back, so none of the action's writes were kept
+        print(f"[ACTION] {req.action} lost a write race: {e}")
+        result = ActionResponse(
+            ok=False, error="Something changed while you were acting. Please try again.", retryable=True
         )
-    elif req.action == "accept_trade":
-        result = accept_trade(player, req.args.trade_id)
-    elif req.action == "list_trades":
-        result = list_trades(player)
-    elif req.action == "cancel_trade":
-        result = cancel_trade(player, req.args.trade_id)
-    elif req.action == "party_invite":
-        result = party_invite(player, req.args.target_player)
-    elif req.action == "accept_party_invite":
-        result = accept_party_invite(player, req.args.invite_id)
-    elif req.action == "leave_party":
-        result = leave_party(player)
-    elif req.action == "party_status":
-        result = party_status(player)
-    elif req.action == "reputation":
-        result = reputation(player)
-    else:
-        result = ActionResponse(ok=False, error="Unhandled action.")
-
-    # Phase 8: Increment world turn on successful actions (except passive ones like look, stats, inventory)
-    if result.ok and req.action not in ["look", "stats", "inventory", "party_status", "reputation", "list_trades"]:
-        new_turn = increment_world_turn()
+
+    # Phase 8: Advance the world turn on successful actions by their registered turn cost (passive ones cost none)
+    if result.ok and spec.turn_cost:
+        new_turn = increment_world_turn(spec.turn_cost)
         print(f"[TURN] New turn: {new_turn}, Action: {req.action}")
 
-        # Evaluate world evolution rules periodically (every 5 turns)
-        if new_turn % 5 == 0:
-            print(f"[TURN] Turn {new_turn} is divisible by 5, evaluating world rules")
-            from ..world_rules import evaluate_world_rules
-            try:
-                triggered_rules = evaluate_world_rules()
-            except Exception as e:
-                from ..db import log_world_event
-                print(f"[TURN] World rules error: {e}")
-                log_world_event(
-                    event_type="world_rule_error",
-                    location_id=None,
-                    data={"error": str(e)}
-                )
-                triggered_rules = []
-            if triggered_rules and result.messages:
-                result.messages.append(f"[World changed: {', '.join(triggered_rules)}]")
+        def notify_turn() -> None:
+            from ..world_rules import note_world_turn
+            note_world_turn(new_turn)
+
+            # World rules are evaluated by the background scheduler, off the request path
+            WORLD_SCHEDULER.notify_turn(new_turn)
+        after_commit(notify_turn)
+
+    # Deliver queued notices (e.g. world changes) to this player
+    if result.ok:
+        result.messages.extend(drain_notices(player.player_id))
 
     log_action(
         player_id=player.player_id,
@@ -137,4 +91,91 @@ def apply_action(*, player_id: Optional[str], req_json: Any) -> ActionResponse:
         args=req.model_dump().get("args"),
         result=result.model_dump(),
     )
-    return result
\ No newline at end of file
+    return result
+
+
+def _call_handler(spec: ActionSpec, player: Optional[Player], req: Any) -> ActionResponse:
+    """
+    Run a handler. A mutating one runs in its own transaction (a savepoint
+    inside a batch), so an action that saves several rows (attack saves the
+    target, the attacker and reputation events) keeps all of them or none.
+    Notices, pushes, world counters and leaderboards wait for the commit;
+    removed entities and the entries an action changed in the party
+    registry, quest index and order books are undone on rollback.
+    """
+    if spec.passive:
+        return spec.handler(player, req)
+    with transaction():
+        return spec.handler(player, req)
+
+
+# Commands per POST /commands request
+MAX_BATCH_COMMANDS = 50
+
+
+def apply_actions(
+    *,
+    player_id: Optional[str],
+    commands: List[Union[str, dict]],
+    stop_on_error: bool = True,
+    runs_here: Optional[Callable[[str, str], bool]] = None,
+) -> BatchResponse:
+    """
+    Run several commands (text or action payloads) for one player in order.
+
+    The player is loaded once and every command runs against that object,
+    inside one database transaction (db.transaction) that commits at the
+    end; each command runs in a savepoint of it. Notices and pushes from
+    the batch go out after the commit. States are not built per command;
+    the batch builds one at the end. Stops after the first failed command
+    unless stop_on_error is False.
+
+    The shard workers pass runs_here(action, player location): the batch
+    stops before the first command that belongs on another shard and
+    commits what ran, leaving the rest for the router to send on.
+    """
+    if not player_id:
+        return BatchResponse(ok=False, error="Missing player_id (x-player-id header).")
+    if not commands:
+        return BatchResponse(ok=False, error="No commands.")
+    if len(commands) > MAX_BATCH_COMMANDS:
+        return BatchResponse(ok=False, error=f"At most {MAX_BATCH_COMMANDS} commands per batch.")
+
+    results: List[ActionResponse] = []
+    with transaction(), deferred_state():
+        player = get_player(player_id)
+        if not player:
+            return BatchResponse(ok=False, error="Unknown player_id.")
+
+        for command in commands:
+            try:
+                req_json = parse_command(command) if isinstance(command, str) else command
+                req = validate_request(req_json)
+            except ParseError as e:
+                result = ActionResponse(ok=False, error=str(e))
+            except Exception:
+                result = ActionResponse(ok=False, error="Invalid action payload.")
+            else:
+                if not ACTIONS[req.action].needs_player:
+                    result = ActionResponse(ok=False, error=f"{req.action} can't be batched.")
+                elif runs_here is not None and not runs_here(req.action, player.location):
+                    break
+                else:
+                    result = _run_action(player, req)
+            # Keep only what the action added on top of the deferred state
+            result.state = result.state or None
+            results.append(result)
+            if not result.ok and stop_on_error:
+                break
+
+    # Notices for this player from the batch were queued when it committed
+    if results and results[-1].ok:
+        results[-1].messages.extend(drain_notices(player.player_id))
+
+    return BatchResponse(
+        ok=all(r.ok for r in results) and len(results) == len(commands),
+        # Only safe to resend if nothing in the batch was kept
+        retryable=not any(r.ok for r in results) and any(r.retryable for r in results),
+        results=results,
+        state=build_action_state(player),
+    )
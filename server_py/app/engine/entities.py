@@ -4,7 +4,8 @@ from typing import List, Dict, Any
 
 from ..types_entities import Entity
 from ..world_entities import WORLD_ENTITIES
-from ..db import get_players_at_location
+from ..db import get_players_at_location, on_rollback
+from ..catalog import location_summary
 from ..world import get_location
 
 
@@ -30,16 +31,17 @@ def get_player_entities_at(location_id: str) -> List[Dict[str, Any]]:
     """
     players = get_players_at_location(location_id)
 
-    return [
-        {
-            "type": "player",
-            "id": p.player_id,
-            "name": p.name,
-            "hp": p.hp,
-            "level": p.level,
-        }
-        for p in players
-    ]
+    return [player_entity(p) for p in players]
+
+
+def player_entity(p) -> Dict[str, Any]:
+    return {
+        "type": "player",
+        "id": p.player_id,
+        "name": p.name,
+        "hp": p.hp,
+        "level": p.level,
+    }
 
 
 # -------------------------------------------------
@@ -133,10 +135,16 @@ def remove_entity(location_id: str, entity_id: str) -> None:
     Remove a world entity (monsters/NPCs only).
     Players are not removed this way.
     """
-    WORLD_ENTITIES[location_id] = [
-        e for e in WORLD_ENTITIES.get(location_id, [])
-        if e.entity_id != entity_id
-    ]
+    entities = WORLD_ENTITIES.get(location_id, [])
+    removed = [e for e in entities if e.entity_id == entity_id]
+    WORLD_ENTITIES[location_id] = [e for e in entities if e.entity_id != entity_id]
+
+    # Put it back if the action's transaction rolls back
+    def restore() -> None:
+        current = WORLD_ENTITIES.setdefault(location_id, [])
+        if not any(e.entity_id == entity_id for e in current):
+            current.extend(removed)
+    on_rollback(restore)
 
 
 def get_adjacent_scenes(location_id: str) -> List[Dict[str, Any]]:
@@ -151,12 +159,7 @@ def get_adjacent_scenes(location_id: str) -> List[Dict[str, Any]]:
         next_loc = get_location(ex.to)
         scenes.append(
             {
-                "location": {
-                    "id": next_loc.id,
-                    "name": next_loc.name,
-                    "description": next_loc.description,
-                    "exits": [{"to": e.to, "label": e.label} for e in next_loc.exits],
-                },
+                "location": location_summary(next_loc.id),
                 "entities": get_entities_at(next_loc.id),
             }
         )
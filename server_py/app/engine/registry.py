@@ -0,0 +1,142 @@
+"""
+Phase 11: Action Registry
+
+Each module in engine/actions registers its action here: the request model,
+a handler taking (player, validated request), whether the action is passive
+(only reads, doesn't advance the world clock), how many world turns it
+costs, and the text verbs that parse into it. Everything that used to list
+the actions by hand reads the registry instead:
+
+- Payloads are validated by one TypeAdapter over the registered models,
+  discriminated on `action`, so pydantic picks the model by tag instead of
+  trying each member of the union in turn.
+- apply_action dispatches with ACTIONS[req.action].
+- parse_command looks the first word up in VERBS.
+
+The action modules are imported (and so registered) by load_actions().
+"""
+
+from __future__ import annotations
+
+import importlib
+import pkgutil
+from dataclasses import dataclass
+from typing import Annotated, Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from ..types import ActionResponse, Player
+
+
+class ParseError(Exception):
+    pass
+
+
+# Parses the words after the verb into a request dict. None means the words
+# don't make a command and the text falls through to "Unknown command".
+Parser = Callable[[List[str]], Optional[Dict[str, Any]]]
+
+
+@dataclass(frozen=True)
+class ActionSpec:
+    name: str
+    request: Type[BaseModel]
+    handler: Callable[[Optional[Player], Any], ActionResponse]
+    passive: bool = False
+    turn_cost: int = 1  # World turns advanced when the action succeeds
+    needs_player: bool = True  # False only for create_player
+    verbs: Tuple[str, ...] = ()
+
+
+ACTIONS: Dict[str, ActionSpec] = {}
+VERBS: Dict[str, Parser] = {}
+
+_adapter: Optional[TypeAdapter] = None
+_loaded = False
+
+
+def register_action(
+    name: str,
+    request: Type[BaseModel],
+    handler: Callable[[Optional[Player], Any], ActionResponse],
+    *,
+    passive: bool = False,
+    turn_cost: Optional[int] = None,
+    needs_player: bool = True,
+    verbs: Tuple[str, ...] = (),
+    parse: Optional[Parser] = None,
+) -> ActionSpec:
+    """
+    Register an action. Passive actions cost no turns unless turn_cost says
+    otherwise. Each verb maps to parse (by default, the bare action with no
+    args); a verb can only belong to one action.
+    """
+    if name in ACTIONS:
+        raise ValueError(f"Action {name!r} is already registered")
+    for verb in verbs:
+        if verb in VERBS:
+            raise ValueError(f"Verb {verb!r} is already registered")
+
+    spec = ActionSpec(
+        name=name,
+        request=request,
+        handler=handler,
+        passive=passive,
+        turn_cost=(0 if passive else 1) if turn_cost is None else turn_cost,
+        needs_player=needs_player,
+        verbs=verbs,
+    )
+    ACTIONS[name] = spec
+    parser = parse or (lambda rest: {"action": name})
+    for verb in verbs:
+        VERBS[verb] = parser
+
+    global _adapter
+    _adapter = None
+    return spec
+
+
+def text_arg(action: str, field: str, missing: Optional[str] = None) -> Parser:
+    """Parser for `<verb> <some words>`: the words joined become args[field]."""
+    def parse(rest: List[str]) -> Optional[Dict[str, Any]]:
+        if not rest:
+            if missing:
+                raise ParseError(missing)
+            return None
+        return {"action": action, "args": {field: " ".join(rest)}}
+    return parse
+
+
+def word_arg(action: str, field: str) -> Parser:
+    """Parser for `<verb> <id>`: the first word becomes args[field]."""
+    def parse(rest: List[str]) -> Optional[Dict[str, Any]]:
+        if not rest:
+            return None
+        return {"action": action, "args": {field: rest[0]}}
+    return parse
+
+
+def load_actions() -> Dict[str, ActionSpec]:
+    """Import every module in engine/actions so each registers itself."""
+    global _loaded
+    if not _loaded:
+        from . import actions
+
+        for module in sorted(m.name for m in pkgutil.iter_modules(actions.__path__)):
+            importlib.import_module(f"{actions.__name__}.{module}")
+        _loaded = True
+    return ACTIONS
+
+
+def request_adapter() -> TypeAdapter:
+    """TypeAdapter for any registered request, discriminated on `action`."""
+    global _adapter
+    if _adapter is None:
+        models = tuple(spec.request for spec in load_actions().values())
+        _adapter = TypeAdapter(Annotated[Union[models], Field(discriminator="action")])
+    return _adapter
+
+
+def validate_request(req_json: Any) -> Any:
+    """Validate an action payload into its request model (raises on invalid)."""
+    return request_adapter().validate_python(req_json)
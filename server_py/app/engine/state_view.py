@@ -1,13 +1,19 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
 
+from ..catalog import catalog_hash, location_summary
 from ..types import Player
 from ..world import get_location
 from ..db import (
     get_pending_trades_for_player,
     get_pending_trades_by_player,
+    count_player_trades,
     get_player,
+    get_players,
+    get_player_names,
     get_player_party,
     get_player_party_invites,
 )
@@ -21,6 +27,8 @@ def build_location_view_for_player(player: Player) -> Dict[str, Any]:
       - build the location dict
       - attach entities
       - filter the current player out (so UI never shows yourself in People Here)
+    Locations are referenced by id; names, descriptions and exits are in
+    the world catalog (see catalog.py).
     """
     loc = get_location(player.location)
 
@@ -30,12 +38,7 @@ def build_location_view_for_player(player: Player) -> Dict[str, Any]:
     )
 
     return {
-        "location": {
-            "id": loc.id,
-            "name": loc.name,
-            "description": loc.description,
-            "exits": [{"to": e.to, "label": e.label} for e in loc.exits],
-        },
+        "location": location_summary(loc.id),
         "entities": entities,
         "adjacent_scenes": get_adjacent_scenes_for_prefetch(loc.id),
     }
@@ -53,12 +56,7 @@ def get_adjacent_scenes_for_prefetch(location_id: str) -> List[Dict[str, Any]]:
         next_loc = get_location(ex.to)
         scenes.append(
             {
-                "location": {
-                    "id": next_loc.id,
-                    "name": next_loc.name,
-                    "description": next_loc.description,
-                    "exits": [{"to": e.to, "label": e.label} for e in next_loc.exits],
-                },
+                "location": location_summary(next_loc.id),
                 "entities": get_entities_at(next_loc.id),
             }
         )
@@ -66,72 +64,74 @@ def get_adjacent_scenes_for_prefetch(location_id: str) -> List[Dict[str, Any]]:
     return scenes
 
 
-def get_pending_trade_offers(player: Player) -> List[Dict[str, Any]]:
-    """
-    Get pending trade offers for a player with validation flags.
-    Returns list of incoming trades with 'can_accept' flag based on inventory.
-    """
-    trades = get_pending_trades_for_player(player.player_id)
-    result = []
+# Trades included in every action state; the rest are reached with list_trades <cursor>
+TRADE_STATE_PREVIEW = 5
 
-    for trade in trades:
-        # Get sender info
-        sender = get_player(trade["from_player_id"])
-        sender_name = sender.name if sender else "Unknown"
-
-        # Check if player can accept (has requested items)
-        can_accept = all(
-            player.inventory.get(item, 0) >= qty
-            for item, qty in trade["requested_items"].items()
-        )
 
-        result.append({
+def describe_received_trades(player: Player, trades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Incoming trades with sender names and a 'can_accept' flag based on the
+    player's inventory. Senders are resolved in one query.
+    """
+    names = get_player_names(list({trade["from_player_id"] for trade in trades}))
+    return [
+        {
             "trade_id": trade["trade_id"],
-            "from_player_name": sender_name,
+            "from_player_name": names.get(trade["from_player_id"], "Unknown"),
             "from_player_id": trade["from_player_id"],
             "offered_items": trade["offered_items"],
             "requested_items": trade["requested_items"],
-            "can_accept": can_accept,
+            # Check if player can accept (has requested items)
+            "can_accept": all(
+                player.inventory.get(item, 0) >= qty
+                for item, qty in trade["requested_items"].items()
+            ),
             "created_at": trade["created_at"],
-        })
-
-    return result
+            "expires_at": trade["expires_at"],
+        }
+        for trade in trades
+    ]
 
 
-def get_pending_trade_offers_sent(player: Player) -> List[Dict[str, Any]]:
+def describe_sent_trades(trades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Get pending trade offers sent by the player.
-    Returns list of outgoing trades with validation flag for whether recipient can accept.
+    Outgoing trades with recipient names and a 'can_be_accepted' flag based
+    on the recipient's inventory. Recipients are loaded in one query.
     """
-    trades = get_pending_trades_by_player(player.player_id)
+    recipients = {p.player_id: p for p in get_players(list({trade["to_player_id"] for trade in trades}))}
     result = []
-
     for trade in trades:
-        # Get recipient info
-        recipient = get_player(trade["to_player_id"])
-        recipient_name = recipient.name if recipient else "Unknown"
-
-        # Check if recipient can accept (has requested items)
-        can_be_accepted = False
-        if recipient:
-            can_be_accepted = all(
-                recipient.inventory.get(item, 0) >= qty
-                for item, qty in trade["requested_items"].items()
-            )
-
+        recipient = recipients.get(trade["to_player_id"])
         result.append({
             "trade_id": trade["trade_id"],
-            "to_player_name": recipient_name,
+            "to_player_name": recipient.name if recipient else "Unknown",
             "to_player_id": trade["to_player_id"],
             "offered_items": trade["offered_items"],
             "requested_items": trade["requested_items"],
-            "can_be_accepted": can_be_accepted,
+            "can_be_accepted": recipient is not None and all(
+                recipient.inventory.get(item, 0) >= qty
+                for item, qty in trade["requested_items"].items()
+            ),
             "created_at": trade["created_at"],
+            "expires_at": trade["expires_at"],
         })
-
     return result
 
 
+def get_pending_trade_offers(player: Player, limit: Optional[int] = TRADE_STATE_PREVIEW) -> List[Dict[str, Any]]:
+    """
+    Get the player's oldest pending incoming trade offers (first `limit`, or all if None).
+    """
+    return describe_received_trades(player, get_pending_trades_for_player(player.player_id, limit))
+
+
+def get_pending_trade_offers_sent(player: Player, limit: Optional[int] = TRADE_STATE_PREVIEW) -> List[Dict[str, Any]]:
+    """
+    Get the player's oldest pending outgoing trade offers (first `limit`, or all if None).
+    """
+    return describe_sent_trades(get_pending_trades_by_player(player.player_id, limit))
+
+
 def get_party_info(player: Player) -> Optional[Dict[str, Any]]:
     """
     Get current party information with member details.
@@ -178,11 +178,25 @@ def get_party_invites_info(player: Player) -> List[Dict[str, Any]]:
             "from_player_id": invite["from_player_id"],
             "from_player_name": sender_name,
             "created_at": invite["created_at"],
+            "expires_at": invite["expires_at"],
         })
 
     return result
 
 
+# Set while a batch runs: actions get an empty state and the batch builds it once at the end
+_state_deferred: ContextVar[bool] = ContextVar("state_deferred", default=False)
+
+
+@contextmanager
+def deferred_state() -> Iterator[None]:
+    token = _state_deferred.set(True)
+    try:
+        yield
+    finally:
+        _state_deferred.reset(token)
+
+
 def build_action_state(
     player: Player,
     *,
@@ -191,12 +205,17 @@ def build_action_state(
     """
     Full ActionResponse.state builder used by all actions.
     Centralizes: player dump + location view + optional flags like scene_dirty.
+    Inside deferred_state() only the flags are returned.
     """
+    if _state_deferred.get():
+        return {"scene_dirty": scene_dirty} if scene_dirty is not None else {}
     state: Dict[str, Any] = {
+        "catalog_hash": catalog_hash(),
         "player": player.model_dump(),
         **build_location_view_for_player(player),
         "pending_trade_offers": get_pending_trade_offers(player),
         "pending_trade_offers_sent": get_pending_trade_offers_sent(player),
+        "pending_trade_counts": count_player_trades(player.player_id),
         "party": get_party_info(player),
         "party_invites": get_party_invites_info(player),
     }
@@ -0,0 +1,118 @@
+"""
+Phase 11: Game Executor
+
+Game logic is a chain of blocking sqlite3 calls, so request handlers are
+async and hand the work to a dedicated, fixed-size thread pool instead of
+Starlette's shared threadpool. The event loop stays free for health
+checks, WebSockets and the world scheduler while database work backs up.
+
+GAME_WORKERS bounds how many actions run at once; SQLite has a single
+writer, so more threads mostly wait on its lock. At most
+MAX_PENDING_ACTIONS may be running or queued; past that, run() raises
+ExecutorSaturated and the endpoints answer 503 instead of letting the
+queue (and latency) grow without bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+GAME_WORKERS = 8
+MAX_PENDING_ACTIONS = 256
+
+
+class ExecutorSaturated(RuntimeError):
+    """Too many actions are already queued; the caller should retry later."""
+
+
+class GameExecutor:
+    def __init__(self, workers: int = GAME_WORKERS, max_pending: int = MAX_PENDING_ACTIONS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0  # Queued + running
+        self._running = 0
+        self.metrics: Dict[str, Any] = {
+            "workers": workers,
+            "running": 0,
+            "queued": 0,
+            "max_queued": 0,
+            "completed": 0,
+            "rejected": 0,
+            "errors": 0,
+            "last_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "last_run_ms": 0.0,
+            "max_run_ms": 0.0,
+        }
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="game")
+            return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn(*args, **kwargs) on the game pool and await its result."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.metrics["rejected"] += 1
+                raise ExecutorSaturated(f"{self._pending} actions already pending")
+            self._pending += 1
+            self._update_depth()
+
+        submitted = time.monotonic()
+        context = contextvars.copy_context()
+
+        def call() -> Any:
+            started = time.monotonic()
+            with self._lock:
+                self._running += 1
+                self._update_depth()
+                wait_ms = (started - submitted) * 1000
+                self.metrics["last_wait_ms"] = wait_ms
+                self.metrics["max_wait_ms"] = max(self.metrics["max_wait_ms"], wait_ms)
+            try:
+                return context.run(fn, *args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.metrics["errors"] += 1
+                raise
+            finally:
+                run_ms = (time.monotonic() - started) * 1000
+                with self._lock:
+                    self._running -= 1
+                    self.metrics["completed"] += 1
+                    self.metrics["last_run_ms"] = run_ms
+                    self.metrics["max_run_ms"] = max(self.metrics["max_run_ms"], run_ms)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_pool(), call)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._update_depth()
+
+    def _update_depth(self) -> None:
+        # Caller holds self._lock
+        queued = self._pending - self._running
+        self.metrics["running"] = self._running
+        self.metrics["queued"] = queued
+        self.metrics["max_queued"] = max(self.metrics["max_queued"], queued)
+
+    def shutdown(self) -> None:
+        """Finish in-flight actions and stop the workers."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=True)
+
+
+GAME_EXECUTOR = GameExecutor()
@@ -6,7 +6,7 @@ This module defines factions, their properties, and reputation logic.
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from dataclasses import dataclass
 
 
@@ -28,7 +28,7 @@ FACTIONS: Dict[str, Faction] = {
         name="Town Guard",
         alignment="lawful",
         influence_locations=["town_square", "market"],
-        npc_members=["town_guard_captain"],
+        npc_members=["town_guard_captain", "warden"],
         description="The protectors of the town, maintaining law and order.",
     ),
     "merchants_guild": Faction(
@@ -68,6 +68,55 @@ def get_location_factions(location_id: str) -> List[Faction]:
     return [f for f in FACTIONS.values() if location_id in f.influence_locations]
 
 
+def territory_reputation_events(
+    player_id: str,
+    location_id: str,
+    event_type: str,
+    describe: Callable[[str], str],
+) -> List[Dict[str, Any]]:
+    """
+    Build one reputation event per faction with influence at a location, for
+    log_reputation_events. describe(faction_name) returns each description;
+    it's a function, not a format string, because descriptions carry player names.
+    """
+    value = get_reputation_event_value(event_type)
+    return [
+        {
+            "player_id": player_id,
+            "faction_id": faction.faction_id,
+            "event_type": event_type,
+            "value": value,
+            "description": describe(faction.name),
+            "location_id": location_id,
+        }
+        for faction in get_location_factions(location_id)
+    ]
+
+
+def quest_reputation_events(
+    player_id: str,
+    location_id: str,
+    quest_name: str,
+    npc_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Build the reputation events for turning in a quest: credit goes to the
+    quest giver's faction, or to the factions holding the territory.
+    """
+    description = f"Completed {quest_name}"
+    npc_faction = get_npc_faction(npc_id) if npc_id else None
+    if not npc_faction:
+        return territory_reputation_events(player_id, location_id, "quest_completed", lambda faction: description)
+    return [{
+        "player_id": player_id,
+        "faction_id": npc_faction.faction_id,
+        "event_type": "quest_completed",
+        "value": get_reputation_event_value("quest_completed"),
+        "description": description,
+        "location_id": location_id,
+    }]
+
+
 def get_npc_faction(npc_id: str) -> Optional[Faction]:
     """Get the faction that an NPC belongs to."""
     for faction in FACTIONS.values():
@@ -98,6 +147,23 @@ def get_reputation_tier(reputation: int) -> str:
         return "Hostile"
 
 
+# Standing with a faction drifts back toward neutral: each reputation event's
+# weight halves every REPUTATION_HALF_LIFE_TURNS world turns.
+REPUTATION_HALF_LIFE_TURNS = 500
+
+
+def decay_reputation(value: float, from_turn: int, to_turn: int) -> float:
+    """Decay a standing value recorded at from_turn forward to to_turn (closed form)."""
+    if to_turn <= from_turn:
+        return value
+    return value * 0.5 ** ((to_turn - from_turn) / REPUTATION_HALF_LIFE_TURNS)
+
+
+def get_standing_tier(standing: float) -> str:
+    """Get the reputation tier for a (possibly fractional) decayed standing."""
+    return get_reputation_tier(round(standing))
+
+
 def get_price_modifier(reputation: int) -> float:
     """Get the price modifier based on reputation (1.0 = normal price)."""
     if reputation >= REPUTATION_HONORED:
@@ -0,0 +1,153 @@
+"""
+Phase 11: Idempotency Keys
+
+Clients that retry POSTs (the SMS gateway, flaky mobile connections) send
+an Idempotency-Key header with /action and /command. The first request
+with a given (player_id, key) runs normally; requests without a player
+(create_player) are scoped by client IP instead, and run without a key
+when there is no IP, so one client can't replay another's new player. Its response is stored in the
+idempotency_keys table and in a bounded in-memory LRU, and both expire
+after IDEMPOTENCY_TTL_MS. Later requests with the same key get the stored
+response back without running anything.
+
+- A duplicate that arrives while the first request is still running waits
+  for it and shares its response, so only one of them executes.
+- A key reused with a different request body is rejected with
+  IdempotencyConflict.
+- A request that was turned away before running (rate limited, server
+  busy), that raised, or whose response is marked retryable (it lost a
+  write race and kept nothing) stores nothing; retrying with the same key
+  runs it.
+
+The response is saved right after the action commits, not in the same
+transaction, so a crash in between can still let a retry run twice.
+Expired rows are swept by the world scheduler's maintenance.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .db import get_idempotent_response, save_idempotent_response
+
+
+IDEMPOTENCY_TTL_MS = 24 * 60 * 60 * 1000
+MAX_CACHED_RESPONSES = 10_000
+MAX_KEY_LENGTH = 255
+
+Scope = Tuple[str, str]  # (player_id or "ip:<client ip>", key)
+Entry = Tuple[str, Dict[str, Any], int]  # (request_hash, response, expires_at)
+
+
+class IdempotencyConflict(ValueError):
+    """An Idempotency-Key was reused for a different request."""
+
+
+def request_fingerprint(request: Any) -> str:
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Stored responses by (player_id, key), plus the requests still running."""
+
+    def __init__(self, max_cached: int = MAX_CACHED_RESPONSES, ttl_ms: int = IDEMPOTENCY_TTL_MS):
+        self.max_cached = max_cached
+        self.ttl_ms = ttl_ms
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Scope, Entry]" = OrderedDict()
+        self._in_flight: Dict[Scope, Future] = {}
+        self.metrics: Dict[str, int] = {"executed": 0, "replayed": 0, "coalesced": 0, "conflicts": 0, "not_stored": 0}
+
+    async def run(
+        self,
+        player_id: Optional[str],
+        client_ip: Optional[str],
+        key: str,
+        fingerprint: str,
+        execute: Callable[..., Awaitable[Any]],
+        fn: Callable[..., Dict[str, Any]],
+        *args: Any,
+    ) -> Dict[str, Any]:
+        """
+        Return the stored response for this key, or run fn once and store
+        its response. execute(blocking_fn, *args) is how the caller runs
+        blocking work (admission control + the game executor).
+        """
+        if player_id:
+            scope = (player_id, key)
+        elif client_ip:
+            scope = (f"ip:{client_ip}", key)
+        else:
+            return await execute(fn, *args)
+        with self._lock:
+            entry = self._cached(scope)
+            future = None if entry else self._in_flight.get(scope)
+            owner = entry is None and future is None
+            if owner:
+                future = self._in_flight[scope] = Future()
+
+        if entry is not None:
+            self.metrics["replayed"] += 1
+            return self._replay(entry, fingerprint)
+        if not owner:
+            self.metrics["coalesced"] += 1
+            return self._replay(await asyncio.wrap_future(future), fingerprint)
+
+        try:
+            entry = await execute(self._execute_once, scope, fingerprint, fn, *args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(entry)
+        finally:
+            with self._lock:
+                self._in_flight.pop(scope, None)
+        return self._replay(entry, fingerprint)
+
+    def _execute_once(self, scope: Scope, fingerprint: str, fn: Callable[..., Dict[str, Any]], *args: Any) -> Entry:
+        # Blocking; runs on the game executor. The database covers restarts and other processes
+        entry = get_idempotent_response(*scope)
+        if entry is not None:
+            self.metrics["replayed"] += 1
+        else:
+            response = fn(*args)
+            entry = (fingerprint, response, int(time.time() * 1000) + self.ttl_ms)
+            self.metrics["executed"] += 1
+            if response.get("retryable"):
+                self.metrics["not_stored"] += 1
+                return entry  # Not final; a retry with this key should run again
+            save_idempotent_response(*scope, *entry)
+        with self._lock:
+            self._cache[scope] = entry
+            self._cache.move_to_end(scope)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return entry
+
+    def _cached(self, scope: Scope) -> Optional[Entry]:
+        # Caller holds self._lock
+        entry = self._cache.get(scope)
+        if entry is None:
+            return None
+        if entry[2] <= time.time() * 1000:
+            del self._cache[scope]
+            return None
+        self._cache.move_to_end(scope)
+        return entry
+
+    def _replay(self, entry: Entry, fingerprint: str) -> Dict[str, Any]:
+        if entry[0] != fingerprint:
+            self.metrics["conflicts"] += 1
+            raise IdempotencyConflict("This Idempotency-Key was already used for a different request.")
+        return entry[1]
+
+
+IDEMPOTENCY = IdempotencyStore()
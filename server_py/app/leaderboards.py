@@ -0,0 +1,145 @@
+"""
+Phase 9: Faction Reputation Leaderboards
+
+Per-faction leaderboards over the running totals in reputation_totals.
+Each board is kept in memory as a sorted list of (-total, player_id) keys,
+loaded at startup and updated incrementally whenever a reputation event is
+logged. Rank lookups are a binary search, pages are cursor-based slices,
+and a small top-K list per faction is cached until a change reaches it.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db import get_reputation_totals
+
+
+TOP_K = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(total: int, player_id: str) -> str:
+    return f"{total}:{player_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """Parse a "<total>:<player_id>" cursor; raises ValueError if malformed."""
+    total, player_id = cursor.split(":", 1)
+    return int(total), player_id
+
+
+class FactionLeaderboard:
+    """Ordered reputation totals for one faction."""
+
+    def __init__(self, faction_id: str, top_k: int = TOP_K):
+        self.faction_id = faction_id
+        self.top_k = top_k
+        self._keys: List[Tuple[int, str]] = []  # (-total, player_id), ascending
+        self._totals: Dict[str, int] = {}
+        self._top_cache: Optional[List[Dict[str, Any]]] = None
+
+    def load(self, rows: List[Dict[str, Any]]) -> None:
+        self._totals = {row["player_id"]: row["total"] for row in rows}
+        self._keys = sorted((-total, player_id) for player_id, total in self._totals.items())
+        self._top_cache = None
+
+    def update(self, player_id: str, total: int) -> None:
+        old_total = self._totals.get(player_id)
+        if old_total == total:
+            return
+        new_key = (-total, player_id)
+
+        # Only invalidate the top-K cache if this change can affect it
+        cutoff = self._keys[self.top_k - 1] if len(self._keys) >= self.top_k else None
+        if cutoff is None or new_key <= cutoff or (old_total is not None and (-old_total, player_id) <= cutoff):
+            self._top_cache = None
+
+        if old_total is not None:
+            old_key = (-old_total, player_id)
+            del self._keys[bisect.bisect_left(self._keys, old_key)]
+        bisect.insort(self._keys, new_key)
+        self._totals[player_id] = total
+
+    def total(self, player_id: str) -> Optional[int]:
+        return self._totals.get(player_id)
+
+    def rank(self, player_id: str) -> Optional[int]:
+        """1-based rank, or None if the player has no reputation with this faction."""
+        total = self._totals.get(player_id)
+        if total is None:
+            return None
+        return bisect.bisect_left(self._keys, (-total, player_id)) + 1
+
+    def page(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Entries after cursor (exclusive) in rank order, plus the next cursor."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if cursor is None and limit <= self.top_k:
+            entries = self.top()[:limit]
+        else:
+            start = 0
+            if cursor is not None:
+                total, player_id = decode_cursor(cursor)
+                start = bisect.bisect_right(self._keys, (-total, player_id))
+            entries = [
+                {"rank": start + i + 1, "player_id": player_id, "total": -neg_total}
+                for i, (neg_total, player_id) in enumerate(self._keys[start:start + limit])
+            ]
+        next_cursor = None
+        if entries and entries[-1]["rank"] < len(self._keys):
+            last = entries[-1]
+            next_cursor = encode_cursor(last["total"], last["player_id"])
+        return entries, next_cursor
+
+    def top(self) -> List[Dict[str, Any]]:
+        """Cached top-K entries."""
+        if self._top_cache is None:
+            self._top_cache = [
+                {"rank": i + 1, "player_id": player_id, "total": -neg_total}
+                for i, (neg_total, player_id) in enumerate(self._keys[:self.top_k])
+            ]
+        return list(self._top_cache)
+
+
+class LeaderboardService:
+    """All faction leaderboards, guarded by one lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards: Dict[str, FactionLeaderboard] = {}
+        self.loaded = False
+
+    def load(self, faction_ids: List[str]) -> None:
+        boards = {}
+        for faction_id in faction_ids:
+            board = FactionLeaderboard(faction_id)
+            board.load(get_reputation_totals(faction_id))
+            boards[faction_id] = board
+        with self._lock:
+            self._boards = boards
+            self.loaded = True
+
+    def update(self, faction_id: str, player_id: str, total: int) -> None:
+        with self._lock:
+            if not self.loaded:
+                return
+            board = self._boards.setdefault(faction_id, FactionLeaderboard(faction_id))
+            board.update(player_id, total)
+
+    def page(self, faction_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        with self._lock:
+            board = self._boards.get(faction_id)
+            return board.page(limit, cursor) if board else ([], None)
+
+    def rank(self, faction_id: str, player_id: str) -> Tuple[Optional[int], Optional[int]]:
+        """(rank, total) for a player, or (None, None) if unranked."""
+        with self._lock:
+            board = self._boards.get(faction_id)
+            if not board:
+                return None, None
+            return board.rank(player_id), board.total(player_id)
+
+
+LEADERBOARDS = LeaderboardService()
@@ -1,12 +1,30 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, Header, Body
+import asyncio
+import json
+
+from fastapi import FastAPI, Header, Body, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from .engine.parse_command import parse_command, ParseError
 
-from .db import init_db, create_faction
-from .engine.apply_action import apply_action
-from .factions import FACTIONS
+from .db import init_db, create_faction, get_player, get_player_names, get_faction_standings, calculate_standing
+from .engine.apply_action import apply_action, apply_actions
+from .engine.state_view import build_action_state
+from .catalog import get_catalog
+from .executor import GAME_EXECUTOR, ExecutorSaturated
+from .factions import FACTIONS, get_standing_tier
+from .market import MARKET
+from .leaderboards import LEADERBOARDS, TOP_K, MAX_PAGE_SIZE
+from .party_registry import PARTY_REGISTRY
+from .quest_progress import QUEST_INDEX
+from .notices import set_push_handler, drain_notices
+from .sessions import SESSIONS, Session
+from .sharding import SHARD_ROUTER, configured_shard_count
+from .rate_limit import ADMISSION, Throttled, action_class
+from .idempotency import IDEMPOTENCY, MAX_KEY_LENGTH, IdempotencyConflict, request_fingerprint
+from .world_scheduler import WORLD_SCHEDULER
+from .scheduled_events import SCHEDULED_EVENTS
+from .world_rules import backfill_scheduled_flags
 
 app = FastAPI(title="RPG World Server", version="0.1.0")
 
@@ -22,6 +40,7 @@ app.add_middleware(
 @app.on_event("startup")
 def _startup() -> None:
     init_db()
+    SCHEDULED_EVENTS.load()
     # Initialize factions
     for faction_id, faction in FACTIONS.items():
         create_faction(
@@ -34,6 +53,39 @@ def _startup() -> None:
                 "description": faction.description,
             }
         )
+    LEADERBOARDS.load(list(FACTIONS))
+    set_push_handler(SESSIONS.push_notices)
+
+    # Phase 11: With WORLD_SHARDS set, game state lives in the shard processes
+    shard_count = configured_shard_count()
+    if shard_count:
+        SHARD_ROUTER.start(shard_count)
+        return
+    backfill_scheduled_flags()
+    PARTY_REGISTRY.load()
+    QUEST_INDEX.load()
+    MARKET.load()
+
+
+@app.on_event("startup")
+async def _start_world_scheduler() -> None:
+    if not SHARD_ROUTER.running:  # Each shard runs its own
+        await WORLD_SCHEDULER.start()
+
+
+@app.on_event("shutdown")
+async def _stop_world_scheduler() -> None:
+    await WORLD_SCHEDULER.stop()
+
+
+@app.on_event("shutdown")
+async def _stop_shards() -> None:
+    await asyncio.to_thread(SHARD_ROUTER.stop)
+
+
+@app.on_event("shutdown")
+async def _stop_game_executor() -> None:
+    await asyncio.to_thread(GAME_EXECUTOR.shutdown)
 
 
 @app.get("/health")
@@ -41,24 +93,295 @@ def health():
     return {"ok": True}
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "world_scheduler": WORLD_SCHEDULER.metrics,
+        "sessions": SESSIONS.metrics,
+        "executor": GAME_EXECUTOR.metrics,
+        "shards": SHARD_ROUTER.metrics,
+        "admission": ADMISSION.metrics,
+        "idempotency": IDEMPOTENCY.metrics,
+    }
+
+
+@app.get("/world/catalog")
+def world_catalog(response: Response, if_none_match: str | None = Header(default=None)):
+    """
+    Static world data: locations with exits, items and factions. Action
+    states reference locations by id plus catalog_hash; refetch when it changes.
+    """
+    catalog, etag = get_catalog()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return catalog
+
+
+@app.get("/leaderboards/{faction_id}")
+def leaderboard(
+    faction_id: str,
+    limit: int = Query(default=TOP_K, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+):
+    """Top players by reputation with a faction, cursor-paginated."""
+    if faction_id not in FACTIONS:
+        raise HTTPException(status_code=404, detail="Unknown faction.")
+    try:
+        entries, next_cursor = LEADERBOARDS.page(faction_id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    player_ids = [e["player_id"] for e in entries]
+    names = get_player_names(player_ids)
+    standings = get_faction_standings(faction_id, player_ids)
+    for e in entries:
+        e["name"] = names.get(e["player_id"], "Unknown")
+        e["standing"] = round(standings.get(e["player_id"], 0.0))
+        e["tier"] = get_standing_tier(e["standing"])
+    return {"faction_id": faction_id, "entries": entries, "next_cursor": next_cursor}
+
+
+@app.get("/leaderboards/{faction_id}/players/{player_id}")
+def leaderboard_rank(faction_id: str, player_id: str):
+    """A player's rank and total with a faction."""
+    if faction_id not in FACTIONS:
+        raise HTTPException(status_code=404, detail="Unknown faction.")
+    rank, total = LEADERBOARDS.rank(faction_id, player_id)
+    standing = round(calculate_standing(player_id, faction_id))
+    return {
+        "faction_id": faction_id,
+        "player_id": player_id,
+        "rank": rank,
+        "total": total or 0,
+        "standing": standing,
+        "tier": get_standing_tier(standing),
+    }
+
+
+# Game logic is blocking sqlite work; it runs on the dedicated game executor
+SATURATED = HTTPException(status_code=503, detail="Server busy, try again.", headers={"Retry-After": "1"})
+
+
+def _run_action(player_id: str | None, req_json) -> dict:
+    """Apply one action here or on the shard hosting the player. Blocking."""
+    if SHARD_ROUTER.running:
+        return SHARD_ROUTER.execute(player_id, req_json)
+    return apply_action(player_id=player_id, req_json=req_json).model_dump()
+
+
+def _run_actions(player_id: str | None, commands: list, stop_on_error: bool) -> dict:
+    if SHARD_ROUTER.running:
+        return SHARD_ROUTER.execute_batch(player_id, commands, stop_on_error)
+    return apply_actions(player_id=player_id, commands=commands, stop_on_error=stop_on_error).model_dump()
+
+
+def _client_ip(connection: Request | WebSocket) -> str | None:
+    return connection.client.host if connection.client else None
+
+
+def _command_action(command) -> str | None:
+    """Action name of a text command or payload, or None if it doesn't parse."""
+    if isinstance(command, dict):
+        return command.get("action")
+    try:
+        return parse_command(command).get("action")
+    except ParseError:
+        return None
+
+
+async def _admit_and_run(
+    player_id: str | None,
+    client_ip: str | None,
+    actions: list,
+    fn,
+    *args,
+    idempotency_key: str | None = None,
+    request=None,
+):
+    """
+    Rate-limit and admit the commands (see rate_limit.py), then run fn on
+    the game executor. With an Idempotency-Key, a retry of the same request
+    gets the first response instead (see idempotency.py).
+    """
+    async def execute(call, *call_args):
+        with ADMISSION.admit(player_id, client_ip, action_class(actions), cost=len(actions)):
+            return await GAME_EXECUTOR.run(call, *call_args)
+
+    try:
+        if idempotency_key is None:
+            return await execute(fn, *args)
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters.")
+        return await IDEMPOTENCY.run(
+            player_id, client_ip, idempotency_key, request_fingerprint(request), execute, fn, *args
+        )
+    except Throttled as e:
+        raise HTTPException(status_code=429, detail=e.message, headers={"Retry-After": str(e.retry_after)})
+    except ExecutorSaturated:
+        raise SATURATED
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
 @app.post("/action")
-def action(req: dict, x_player_id: str | None = Header(default=None)):
-    result = apply_action(player_id=x_player_id, req_json=req)
-    # FastAPI will serialize pydantic model
-    return result
+async def action(
+    request: Request,
+    req: dict,
+    x_player_id: str | None = Header(default=None),
+    idempotency_key: str | None = Header(default=None),
+):
+    return await _admit_and_run(
+        x_player_id, _client_ip(request), [req.get("action")], _run_action, x_player_id, req,
+        idempotency_key=idempotency_key, request=req,
+    )
 
 @app.post("/command")
-def command(
+async def command(
+    request: Request,
     text: str = Body(embed=True),
     x_player_id: str | None = Header(default=None),
+    idempotency_key: str | None = Header(default=None),
 ):
     """
-    Accepts raw text commands (SMS / CLI / web input).
+    Accepts raw text commands (SMS / CLI / web input). Send an
+    Idempotency-Key header to make retries safe.
     """
     try:
         action_req = parse_command(text)
     except ParseError as e:
         return {"ok": False, "messages": [], "error": str(e)}
 
-    return apply_action(player_id=x_player_id, req_json=action_req)
+    return await _admit_and_run(
+        x_player_id, _client_ip(request), [action_req.get("action")], _run_action, x_player_id, action_req,
+        idempotency_key=idempotency_key, request={"text": text},
+    )
+
+
+@app.post("/commands")
+async def commands(
+    request: Request,
+    commands: list[str | dict] = Body(embed=True),
+    continue_on_error: bool = Body(default=False, embed=True),
+    x_player_id: str | None = Header(default=None),
+    idempotency_key: str | None = Header(default=None),
+):
+    """
+    Run an ordered batch of text commands and/or action payloads for one
+    player in a single round trip and transaction. Returns per-command
+    results and one final state. Costs one rate-limit token per command.
+    """
+    return await _admit_and_run(
+        x_player_id,
+        _client_ip(request),
+        [_command_action(c) for c in commands] or [None],
+        _run_actions,
+        x_player_id,
+        commands,
+        not continue_on_error,
+        idempotency_key=idempotency_key,
+        request={"commands": commands, "continue_on_error": continue_on_error},
+    )
+
+
+WS_AUTH_TIMEOUT_SECONDS = 10
+
+
+@app.websocket("/ws")
+async def ws(websocket: WebSocket):
+    """
+    Persistent session: authenticate once, then send commands and receive
+    pushed events (see sessions.py).
+
+    Client -> server:
+      {"type": "auth", "player_id": "..."}                       (first message)
+      {"type": "command", "text": "go north", "id": 1}
+      {"type": "action", "action": "move", "args": {...}, "id": 2}
+    Server -> client:
+      {"type": "welcome", "messages": [...], "state": {...}}
+      {"type": "result", "id": 1, "result": <ActionResponse>}
+      {"type": "event", "event": "presence", "message": "...", "data": {...}}
+    """
+    await websocket.accept()
+    try:
+        hello = await asyncio.wait_for(websocket.receive_json(), timeout=WS_AUTH_TIMEOUT_SECONDS)
+    except (asyncio.TimeoutError, ValueError, WebSocketDisconnect):
+        await websocket.close(code=1008)
+        return
+    player_id = hello.get("player_id") if isinstance(hello, dict) and hello.get("type") == "auth" else None
+    try:
+        player = await GAME_EXECUTOR.run(get_player, player_id) if player_id else None
+    except ExecutorSaturated:
+        await websocket.close(code=1013)  # Try again later
+        return
+    if not player:
+        await websocket.send_json({"type": "error", "error": "Unknown player_id."})
+        await websocket.close(code=1008)
+        return
+
+    client_ip = _client_ip(websocket)
+    session = Session(player.player_id, asyncio.get_running_loop())
+    SESSIONS.register(session)
+    session.reply({
+        "type": "welcome",
+        "messages": drain_notices(player.player_id),
+        "state": await GAME_EXECUTOR.run(build_action_state, player),
+    })
+    sender = asyncio.create_task(_ws_send_loop(websocket, session))
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                msg = json.loads(text)
+            except ValueError:
+                msg = None
+            request_id = msg.get("id") if isinstance(msg, dict) else None
+            try:
+                with ADMISSION.admit(session.player_id, client_ip, action_class([_ws_action(msg)])):
+                    result = await GAME_EXECUTOR.run(_ws_handle, session.player_id, msg)
+            except Throttled as e:
+                result = {"ok": False, "messages": [], "error": e.message, "retry_after": e.retry_after}
+            except ExecutorSaturated:
+                result = {"ok": False, "messages": [], "error": "Server busy, try again."}
+            session.reply({"type": "result", "id": request_id, "result": result})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        SESSIONS.unregister(session)
+        sender.cancel()
+
+
+async def _ws_send_loop(websocket: WebSocket, session: Session) -> None:
+    try:
+        while True:
+            await websocket.send_json(await session.next_message())
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+
+def _ws_action(msg) -> str | None:
+    if not isinstance(msg, dict):
+        return None
+    if msg.get("type") == "command":
+        return _command_action(str(msg.get("text", "")))
+    return msg.get("action")
+
 
+def _ws_handle(player_id: str, msg) -> dict:
+    """Run one command or action for a session's player. Blocking; runs on the game executor."""
+    if not isinstance(msg, dict):
+        return {"ok": False, "messages": [], "error": "Messages must be JSON objects."}
+    if msg.get("type") == "command":
+        try:
+            req = parse_command(str(msg.get("text", "")))
+        except ParseError as e:
+            return {"ok": False, "messages": [], "error": str(e)}
+    elif msg.get("type") == "action":
+        req = {"action": msg.get("action"), "args": msg.get("args")}
+        if req["args"] is None:
+            del req["args"]
+    else:
+        return {"ok": False, "messages": [], "error": "Unknown message type."}
+    if req.get("action") == "create_player":
+        return {"ok": False, "messages": [], "error": "You are already playing. Open a new session to switch characters."}
+    return _run_action(player_id, req)
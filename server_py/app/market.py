@@ -0,0 +1,368 @@
+"""
+Phase 11: Global Marketplace
+
+Limit buy and sell orders for items, matched with price-time priority.
+Each item has an in-memory order book: a max-heap of bids keyed
+(-price, order_id) and a min-heap of asks keyed (price, order_id), so the
+best resting order is always at the top and order_id (assigned by SQLite
+in arrival order) breaks price ties. Matching pops from the opposing heap
+until the limit no longer crosses; each step is O(log n) in the size of
+the book. Cancelled and filled orders are dropped from the order map and
+skipped lazily when they surface at the top of a heap.
+
+The books are a cache of market_orders: they are rebuilt from the open
+rows at startup, and an order only changes in memory after
+execute_market_order / cancel_market_order has written the escrow, fills
+and inventory changes in a single transaction. Inside an action that
+transaction is part of the action's, so the book change registers an
+on_rollback undo for exactly the orders it touched.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .db import (
+    MARKET_CURRENCY,
+    MarketError,
+    cancel_market_order,
+    execute_market_order,
+    load_open_market_orders,
+    on_rollback,
+)
+from .notices import queue_notice
+from .types import Player
+
+
+MAX_OPEN_ORDERS_PER_PLAYER = 50
+MAX_ORDER_QUANTITY = 10_000
+MAX_ORDER_PRICE = 1_000_000
+BOOK_DEPTH_LEVELS = 5
+
+_ITEM_NAME = re.compile(r"^[a-z0-9_]{1,64}$")
+
+
+class RestingOrder:
+    __slots__ = ("order_id", "player_id", "item", "side", "price", "remaining")
+
+    def __init__(self, order_id: int, player_id: str, item: str, side: str, price: int, remaining: int):
+        self.order_id = order_id
+        self.player_id = player_id
+        self.item = item
+        self.side = side
+        self.price = price
+        self.remaining = remaining
+
+    def copy(self) -> "RestingOrder":
+        return RestingOrder(self.order_id, self.player_id, self.item, self.side, self.price, self.remaining)
+
+
+class OrderBook:
+    """Bids and asks for one item."""
+
+    def __init__(self, item: str):
+        self.item = item
+        self._bids: List[Tuple[int, int]] = []  # (-price, order_id)
+        self._asks: List[Tuple[int, int]] = []  # (price, order_id)
+        self._orders: Dict[int, RestingOrder] = {}
+        # Quantity resting at each price, for the depth view
+        self._levels: Dict[str, Dict[int, int]] = {"buy": {}, "sell": {}}
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._orders
+
+    def load(self, orders: List[RestingOrder]) -> None:
+        """Bulk build from resting orders: O(n) heapify instead of n pushes."""
+        for order in orders:
+            self._orders[order.order_id] = order
+            levels = self._levels[order.side]
+            levels[order.price] = levels.get(order.price, 0) + order.remaining
+        self._bids = [(-o.price, o.order_id) for o in orders if o.side == "buy"]
+        self._asks = [(o.price, o.order_id) for o in orders if o.side == "sell"]
+        heapq.heapify(self._bids)
+        heapq.heapify(self._asks)
+
+    def add(self, order: RestingOrder) -> None:
+        self._orders[order.order_id] = order
+        if order.side == "buy":
+            heapq.heappush(self._bids, (-order.price, order.order_id))
+        else:
+            heapq.heappush(self._asks, (order.price, order.order_id))
+        levels = self._levels[order.side]
+        levels[order.price] = levels.get(order.price, 0) + order.remaining
+
+    def remove(self, order_id: int) -> Optional[RestingOrder]:
+        """Drop an order; its heap entry is discarded when it reaches the top."""
+        order = self._orders.pop(order_id, None)
+        if order:
+            self._reduce_level(order.side, order.price, order.remaining)
+        return order
+
+    def copies(self, order_ids: List[int]) -> List[RestingOrder]:
+        """Snapshots of resting orders, to reinstate if a fill is rolled back."""
+        return [self._orders[order_id].copy() for order_id in order_ids]
+
+    def reinstate(self, order: RestingOrder) -> None:
+        """
+        Put an order back as it was before a rolled-back fill or cancel. Its
+        old heap entry may still be queued; match drops the duplicate.
+        """
+        self.remove(order.order_id)
+        self.add(order)
+
+    def match(self, side: str, price: int, quantity: int, player_id: str) -> Tuple[List[Dict[str, Any]], List[Tuple[int, int]]]:
+        """
+        Plan fills for an incoming order without changing the book.
+
+        Returns (fills, popped): fills in priority order as dicts with
+        order_id, player_id, price and quantity, and the heap entries that
+        were popped to find them. The caller must pass popped to either
+        apply_fills (after the fills are persisted) or restore.
+
+        Self-trade prevention: if the order would reach one of the player's
+        own resting orders, nothing is planned and MarketError is raised
+        (resting the order would leave the book crossed).
+        """
+        heap = self._asks if side == "buy" else self._bids
+        fills: List[Dict[str, Any]] = []
+        popped: List[Tuple[int, int]] = []
+        wanted = quantity
+        while wanted and heap:
+            _, order_id = heap[0]
+            order = self._orders.get(order_id)
+            if order is None or any(entry[1] == order_id for entry in popped):
+                heapq.heappop(heap)  # Stale (cancelled or filled), or a duplicate left by reinstate
+                continue
+            if (side == "buy" and order.price > price) or (side == "sell" and order.price < price):
+                break
+            if order.player_id == player_id:
+                self.restore(side, popped)
+                raise MarketError(
+                    f"That would trade with your own order #{order_id}. Cancel it first or change the price."
+                )
+            popped.append(heapq.heappop(heap))
+            qty = min(wanted, order.remaining)
+            fills.append({
+                "order_id": order_id,
+                "player_id": order.player_id,
+                "price": order.price,
+                "quantity": qty,
+            })
+            wanted -= qty
+        return fills, popped
+
+    def apply_fills(self, side: str, fills: List[Dict[str, Any]], popped: List[Tuple[int, int]]) -> None:
+        for fill in fills:
+            order = self._orders[fill["order_id"]]
+            order.remaining -= fill["quantity"]
+            self._reduce_level(order.side, order.price, fill["quantity"])
+            if order.remaining == 0:
+                del self._orders[order.order_id]
+        self.restore(side, popped)
+
+    def restore(self, side: str, popped: List[Tuple[int, int]]) -> None:
+        """Push popped entries for orders that are still resting back onto the heap."""
+        heap = self._asks if side == "buy" else self._bids
+        for entry in popped:
+            if entry[1] in self._orders:
+                heapq.heappush(heap, entry)
+
+    def depth(self, levels: int = BOOK_DEPTH_LEVELS) -> Dict[str, List[Dict[str, int]]]:
+        """Best price levels per side: bids high to low, asks low to high."""
+        bids = sorted(self._levels["buy"].items(), reverse=True)[:levels]
+        asks = sorted(self._levels["sell"].items())[:levels]
+        return {
+            "bids": [{"price": p, "quantity": q} for p, q in bids],
+            "asks": [{"price": p, "quantity": q} for p, q in asks],
+        }
+
+    def _reduce_level(self, side: str, price: int, quantity: int) -> None:
+        levels = self._levels[side]
+        left = levels.get(price, 0) - quantity
+        if left > 0:
+            levels[price] = left
+        else:
+            levels.pop(price, None)
+
+
+class Market:
+    """
+    All order books. Each item has its own lock, held across matching and
+    the database write so two orders for the same item can't both fill
+    against the same resting quantity.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._books: Dict[str, OrderBook] = {}
+        self._item_locks: Dict[str, threading.Lock] = {}
+        self._open_by_player: Dict[str, Set[int]] = {}
+        self._order_items: Dict[int, str] = {}
+        self.loaded = False
+
+    def load(self) -> None:
+        by_item: Dict[str, List[RestingOrder]] = {}
+        open_by_player: Dict[str, Set[int]] = {}
+        order_items: Dict[int, str] = {}
+        for row in load_open_market_orders():
+            by_item.setdefault(row["item"], []).append(RestingOrder(
+                row["order_id"], row["player_id"], row["item"], row["side"], row["price"], row["remaining"]
+            ))
+            open_by_player.setdefault(row["player_id"], set()).add(row["order_id"])
+            order_items[row["order_id"]] = row["item"]
+        books: Dict[str, OrderBook] = {}
+        for item, orders in by_item.items():
+            books[item] = OrderBook(item)
+            books[item].load(orders)
+        with self._lock:
+            self._books = books
+            self._open_by_player = open_by_player
+            self._order_items = order_items
+            self.loaded = True
+        print(f"[MARKET] Loaded {len(order_items)} open orders across {len(books)} items")
+
+    def ensure_loaded(self) -> None:
+        if not self.loaded:
+            self.load()
+
+    def _book(self, item: str) -> Tuple[OrderBook, threading.Lock]:
+        with self._lock:
+            book = self._books.get(item)
+            if book is None:
+                book = self._books[item] = OrderBook(item)
+            lock = self._item_locks.get(item)
+            if lock is None:
+                lock = self._item_locks[item] = threading.Lock()
+            return book, lock
+
+    def place_order(
+        self,
+        player: Player,
+        item: str,
+        side: str,
+        price: int,
+        quantity: int,
+    ) -> Tuple[int, List[Dict[str, Any]], Player]:
+        """
+        Match a limit order against the book and rest any remainder.
+
+        Returns (order_id, fills, player as saved). Raises MarketError for
+        bad orders or missing escrow; nothing is written in that case.
+        """
+        self.ensure_loaded()
+        item = item.strip().lower()
+        if side not in ("buy", "sell"):
+            raise MarketError("Orders are either buy or sell.")
+        if not _ITEM_NAME.match(item) or item == MARKET_CURRENCY:
+            raise MarketError(f"'{item}' can't be traded on the market.")
+        if not 1 <= quantity <= MAX_ORDER_QUANTITY:
+            raise MarketError(f"Quantity must be between 1 and {MAX_ORDER_QUANTITY}.")
+        if not 1 <= price <= MAX_ORDER_PRICE:
+            raise MarketError(f"Price must be between 1 and {MAX_ORDER_PRICE} {MARKET_CURRENCY}.")
+        with self._lock:
+            open_count = len(self._open_by_player.get(player.player_id, ()))
+        if open_count >= MAX_OPEN_ORDERS_PER_PLAYER:
+            raise MarketError(f"You already have {open_count} open orders. Cancel some first.")
+
+        book, lock = self._book(item)
+        with lock:
+            fills, popped = book.match(side, price, quantity, player.player_id)
+            try:
+                order_id, saved, _ = execute_market_order(
+                    player.player_id, item, side, price, quantity, fills
+                )
+            except Exception:
+                book.restore(side, popped)
+                raise
+            filled_orders = book.copies([fill["order_id"] for fill in fills])
+            book.apply_fills(side, fills, popped)
+
+            remaining = quantity - sum(f["quantity"] for f in fills)
+            if remaining:
+                book.add(RestingOrder(order_id, player.player_id, item, side, price, remaining))
+            with self._lock:
+                if remaining:
+                    self._open_by_player.setdefault(player.player_id, set()).add(order_id)
+                    self._order_items[order_id] = item
+                for fill in fills:
+                    if fill["order_id"] not in book:
+                        self._forget(fill["player_id"], fill["order_id"])
+
+        def undo() -> None:
+            with lock:
+                book.remove(order_id)
+                for order in filled_orders:
+                    book.reinstate(order)
+                with self._lock:
+                    self._forget(player.player_id, order_id)
+                    for order in filled_orders:
+                        self._remember(order)
+        on_rollback(undo)
+
+        verb = "sold" if side == "buy" else "bought"
+        for fill in fills:
+            queue_notice(
+                [fill["player_id"]],
+                f"[Market] Order #{fill['order_id']} {verb} {fill['quantity']} {item} "
+                f"at {fill['price']} {MARKET_CURRENCY} each.",
+            )
+        return order_id, fills, saved
+
+    def cancel_order(self, player: Player, order_id: int) -> Tuple[Dict[str, Any], Player]:
+        """Cancel an open order and refund its escrow. Returns (order, player as saved)."""
+        self.ensure_loaded()
+        with self._lock:
+            owned = order_id in self._open_by_player.get(player.player_id, ())
+            item = self._order_items.get(order_id)
+        if not owned or item is None:
+            raise MarketError(f"You have no open order #{order_id}.")
+        book, lock = self._book(item)
+        with lock:
+            order, saved = cancel_market_order(order_id, player.player_id)
+            cancelled = book.remove(order_id)
+            with self._lock:
+                self._forget(player.player_id, order_id)
+
+        def undo() -> None:
+            if cancelled is None:
+                return
+            with lock:
+                book.reinstate(cancelled)
+                with self._lock:
+                    self._remember(cancelled)
+        on_rollback(undo)
+        return order, saved
+
+    def book_summary(self, item: str, levels: int = BOOK_DEPTH_LEVELS) -> Dict[str, Any]:
+        self.ensure_loaded()
+        item = item.strip().lower()
+        with self._lock:
+            known = item in self._books
+        if not known:
+            return {"item": item, "open_orders": 0, "bids": [], "asks": []}
+        book, lock = self._book(item)
+        with lock:
+            return {"item": item, "open_orders": len(book), **book.depth(levels)}
+
+    def _remember(self, order: RestingOrder) -> None:
+        # Caller holds self._lock
+        self._open_by_player.setdefault(order.player_id, set()).add(order.order_id)
+        self._order_items[order.order_id] = order.item
+
+    def _forget(self, player_id: str, order_id: int) -> None:
+        # Caller holds self._lock
+        self._order_items.pop(order_id, None)
+        ids = self._open_by_player.get(player_id)
+        if ids is not None:
+            ids.discard(order_id)
+            if not ids:
+                del self._open_by_player[player_id]
+
+
+MARKET = Market()
@@ -0,0 +1,54 @@
+"""
+Phase 8: Player Notices
+
+Out-of-band messages for players (e.g. "[World changed: ...]") produced by
+background work. Notices queue per player and are delivered with that
+player's next action response. Players with a live session (see
+sessions.py) get them pushed immediately instead. Notices queued inside
+a db transaction wait for it to commit, and are dropped if it rolls back.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+# Cap per player so an idle player's queue can't grow without bound
+MAX_NOTICES_PER_PLAYER = 20
+
+_lock = threading.Lock()
+_notices: Dict[str, List[str]] = {}
+
+# Delivers a notice right away; returns the player_ids it reached
+_push_handler: Optional[Callable[[List[str], str], Set[str]]] = None
+
+
+def set_push_handler(handler: Optional[Callable[[List[str], str], Set[str]]]) -> None:
+    global _push_handler
+    _push_handler = handler
+
+
+def queue_notice(player_ids: Iterable[str], message: str) -> None:
+    """Queue a notice for each of the given players (pushing it to any with a live session)."""
+    from .db import after_commit, in_transaction
+
+    player_ids = list(player_ids)
+    if in_transaction():
+        after_commit(lambda: queue_notice(player_ids, message))
+        return
+    if _push_handler is not None:
+        pushed = _push_handler(player_ids, message)
+        player_ids = [pid for pid in player_ids if pid not in pushed]
+    with _lock:
+        for player_id in player_ids:
+            queue = _notices.setdefault(player_id, [])
+            queue.append(message)
+            if len(queue) > MAX_NOTICES_PER_PLAYER:
+                del queue[: len(queue) - MAX_NOTICES_PER_PLAYER]
+
+
+def drain_notices(player_id: str) -> List[str]:
+    """Remove and return all pending notices for a player."""
+    with _lock:
+        return _notices.pop(player_id, [])
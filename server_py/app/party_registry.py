@@ -0,0 +1,97 @@
+"""
+Phase 10: In-Memory Party Registry
+
+Parties are small and change rarely, but party lookups sit on hot paths
+(state building, quest progress, invites). The registry mirrors the
+parties and party_members tables in memory: party_id -> party (leader,
+members) and player_id -> party_id. It is loaded at startup and updated
+by the db party functions as soon as they write, so the rest of an action
+(or batch) sees its own party changes; each of them registers an
+on_rollback hook that undoes just its own entry if the action's
+transaction rolls back. Lookups are dictionary hits. Until it is loaded,
+the db functions fall back to SQL.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class PartyRegistry:
+    """Party membership index kept in step with the database."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parties: Dict[str, Dict[str, Any]] = {}
+        self._member_party: Dict[str, str] = {}
+        self.loaded = False
+
+    def load(self) -> None:
+        from .db import load_parties
+
+        parties = {party["party_id"]: party for party in load_parties()}
+        member_party = {
+            player_id: party_id
+            for party_id, party in parties.items()
+            for player_id in party["members"]
+        }
+        with self._lock:
+            self._parties = parties
+            self._member_party = member_party
+            self.loaded = True
+
+    def get_party(self, party_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._copy(self._parties.get(party_id))
+
+    def get_player_party(self, player_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            party_id = self._member_party.get(player_id)
+            return self._copy(self._parties.get(party_id)) if party_id else None
+
+    # --- Write-through hooks, called by the db party functions (and to undo them) ---
+
+    def party_created(self, party: Dict[str, Any]) -> None:
+        with self._lock:
+            if not self.loaded:
+                return
+            self._parties[party["party_id"]] = self._copy(party)
+            for player_id in party["members"]:
+                self._member_party[player_id] = party["party_id"]
+
+    def member_added(self, party_id: str, player_id: str) -> None:
+        with self._lock:
+            party = self._parties.get(party_id)
+            if not party:
+                return
+            if player_id not in party["members"]:
+                party["members"].append(player_id)
+            self._member_party[player_id] = party_id
+
+    def member_removed(self, party_id: str, player_id: str) -> None:
+        with self._lock:
+            party = self._parties.get(party_id)
+            if party and player_id in party["members"]:
+                party["members"].remove(player_id)
+            if self._member_party.get(player_id) == party_id:
+                del self._member_party[player_id]
+
+    def party_deleted(self, party_id: str) -> None:
+        with self._lock:
+            party = self._parties.pop(party_id, None)
+            if not party:
+                return
+            for player_id in party["members"]:
+                if self._member_party.get(player_id) == party_id:
+                    del self._member_party[player_id]
+
+    @staticmethod
+    def _copy(party: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        # Callers get their own members list so they can't mutate the registry
+        if party is None:
+            return None
+        return {**party, "members": list(party["members"])}
+
+
+PARTY_REGISTRY = PartyRegistry()
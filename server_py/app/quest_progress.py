@@ -0,0 +1,273 @@
+"""
+Quest Progress Dispatcher
+
+Quest objectives subscribe to the events that advance them. The index maps
+(objective type, normalized target) -> player_id -> {(quest_id, objective
+index)} and is kept in step as quests are accepted and completed, so a kill
+or an inventory change touches only the quests waiting for it instead of
+scanning every active quest of every affected player.
+
+- kill objectives advance by one per matching kill, for the killer and
+  every member of their party.
+- collect objectives track how many of the target item the player holds
+  and are re-evaluated whenever that item's count changes.
+
+The index only holds references; quests themselves live on the Player.
+A reference whose quest is gone (turned in elsewhere, a failed save) is
+dropped the next time an event reaches it. Changes made inside an action's
+transaction are undone reference by reference if it rolls back.
+
+Shard workers (see sharding.py) disable the index, since quests are
+accepted in other processes too; events then scan the active quests of
+the players they reach.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .types import Player
+from .types_quests import Quest
+
+
+ObjectiveRef = Tuple[str, int]  # (quest_id, objective index)
+SubscriptionKey = Tuple[str, str]  # (objective type, normalized target)
+
+
+def normalize_target(target: str) -> str:
+    return target.strip().lower()
+
+
+class QuestObjectiveIndex:
+    """Subscriptions from objective (type, target) to the quests waiting on it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: Dict[SubscriptionKey, Dict[str, Set[ObjectiveRef]]] = {}
+        self.loaded = False
+        self.enabled = True
+
+    def load(self) -> None:
+        from .db import load_active_quests
+
+        subs: Dict[SubscriptionKey, Dict[str, Set[ObjectiveRef]]] = {}
+        for player_id, quests in load_active_quests().items():
+            for quest in quests.values():
+                self._add(subs, player_id, quest)
+        with self._lock:
+            self._subs = subs
+            self.loaded = True
+
+    def ensure_loaded(self) -> None:
+        if self.enabled and not self.loaded:
+            self.load()
+
+    def disable(self) -> None:
+        """Stop indexing; callers fall back to scanning players (see scan_subscriptions)."""
+        with self._lock:
+            self._subs = {}
+            self.loaded = False
+            self.enabled = False
+
+    def subscribe(self, player_id: str, quest: Quest) -> None:
+        """Subscribe a newly accepted quest's unfinished objectives."""
+        if not self.enabled:
+            return
+        self.ensure_loaded()
+        with self._lock:
+            added = [(key, ref) for key, ref in self._refs(quest) if self._insert(key, player_id, ref)]
+        self._undo_on_rollback(player_id, added, restore=False)
+
+    def unsubscribe(self, player_id: str, quest: Quest) -> None:
+        """Drop every subscription for a quest (completed, turned in or abandoned)."""
+        refs = [
+            ((objective.type, normalize_target(objective.target)), (quest.quest_id, idx))
+            for idx, objective in enumerate(quest.objectives)
+        ]
+        with self._lock:
+            removed = [(key, ref) for key, ref in refs if self._discard(key, player_id, ref)]
+        self._undo_on_rollback(player_id, removed, restore=True)
+
+    def unsubscribe_objective(self, player_id: str, key: SubscriptionKey, ref: ObjectiveRef) -> None:
+        with self._lock:
+            removed = self._discard(key, player_id, ref)
+        if removed:
+            self._undo_on_rollback(player_id, [(key, ref)], restore=True)
+
+    def subscribers(
+        self,
+        objective_type: str,
+        target: str,
+        player_ids: Optional[Iterable[str]] = None,
+    ) -> Dict[str, List[ObjectiveRef]]:
+        """Subscribed objectives per player for one (type, target), optionally limited to some players."""
+        with self._lock:
+            by_player = self._subs.get((objective_type, normalize_target(target)), {})
+            ids = by_player if player_ids is None else [pid for pid in player_ids if pid in by_player]
+            return {pid: sorted(by_player[pid]) for pid in ids}
+
+    @staticmethod
+    def _refs(quest: Quest) -> Iterator[Tuple[SubscriptionKey, ObjectiveRef]]:
+        """The (key, ref) of each objective of an accepted quest that still waits for events."""
+        if quest.status != "accepted":
+            return
+        for idx, objective in enumerate(quest.objectives):
+            if objective.type == "kill" and objective.progress >= objective.required:
+                continue
+            yield (objective.type, normalize_target(objective.target)), (quest.quest_id, idx)
+
+    @classmethod
+    def _add(cls, subs: Dict[SubscriptionKey, Dict[str, Set[ObjectiveRef]]], player_id: str, quest: Quest) -> None:
+        for key, ref in cls._refs(quest):
+            subs.setdefault(key, {}).setdefault(player_id, set()).add(ref)
+
+    def _insert(self, key: SubscriptionKey, player_id: str, ref: ObjectiveRef) -> bool:
+        # Caller holds self._lock. Returns whether the ref was new
+        refs = self._subs.setdefault(key, {}).setdefault(player_id, set())
+        if ref in refs:
+            return False
+        refs.add(ref)
+        return True
+
+    def _discard(self, key: SubscriptionKey, player_id: str, ref: ObjectiveRef) -> bool:
+        # Caller holds self._lock. Returns whether the ref was there
+        by_player = self._subs.get(key)
+        if not by_player or ref not in by_player.get(player_id, ()):
+            return False
+        by_player[player_id].discard(ref)
+        if not by_player[player_id]:
+            del by_player[player_id]
+        if not by_player:
+            del self._subs[key]
+        return True
+
+    def _undo_on_rollback(
+        self, player_id: str, changed: List[Tuple[SubscriptionKey, ObjectiveRef]], restore: bool
+    ) -> None:
+        """If the enclosing transaction rolls back, re-add (restore) or drop exactly these refs."""
+        from .db import on_rollback
+
+        if not changed:
+            return
+
+        def undo() -> None:
+            with self._lock:
+                for key, ref in changed:
+                    if restore:
+                        self._insert(key, player_id, ref)
+                    else:
+                        self._discard(key, player_id, ref)
+        on_rollback(undo)
+
+
+QUEST_INDEX = QuestObjectiveIndex()
+
+
+def scan_subscriptions(players: Iterable[Player], objective_type: str, target: str) -> Dict[str, List[ObjectiveRef]]:
+    """What QUEST_INDEX.subscribers would return, computed from the players' active quests."""
+    key = (objective_type, normalize_target(target))
+    found: Dict[str, List[ObjectiveRef]] = {}
+    for player in players:
+        subs: Dict[SubscriptionKey, Dict[str, Set[ObjectiveRef]]] = {}
+        for quest in player.active_quests.values():
+            QuestObjectiveIndex._add(subs, player.player_id, quest)
+        refs = subs.get(key, {}).get(player.player_id)
+        if refs:
+            found[player.player_id] = sorted(refs)
+    return found
+
+
+def _advance(player: Player, refs: List[ObjectiveRef], objective_type: str, target: str) -> List[str]:
+    """Apply one event to a player's subscribed objectives in memory. Returns progress messages."""
+    key = (objective_type, normalize_target(target))
+    messages = []
+    advanced_quests = set()
+
+    for quest_id, idx in refs:
+        quest = player.active_quests.get(quest_id)
+        if not quest or quest.status != "accepted" or idx >= len(quest.objectives):
+            QUEST_INDEX.unsubscribe_objective(player.player_id, key, (quest_id, idx))
+            continue
+        if quest_id in advanced_quests:
+            continue  # One event advances at most one objective per quest
+        objective = quest.objectives[idx]
+
+        if objective_type == "kill":
+            if objective.progress >= objective.required:
+                QUEST_INDEX.unsubscribe_objective(player.player_id, key, (quest_id, idx))
+                continue
+            objective.progress += 1
+            if objective.progress >= objective.required:
+                QUEST_INDEX.unsubscribe_objective(player.player_id, key, (quest_id, idx))
+        else:
+            held = min(player.inventory.get(target, 0), objective.required)
+            if held == objective.progress:
+                continue
+            objective.progress = held
+
+        advanced_quests.add(quest_id)
+        messages.append(f"Quest progress: {quest.name} ({objective.progress}/{objective.required})")
+
+        # Check if all objectives are complete
+        if all(obj.progress >= obj.required for obj in quest.objectives):
+            quest.status = "completed"
+            quest.completed_at = int(time.time() * 1000)
+            player.completed_quests[quest_id] = quest
+            del player.active_quests[quest_id]
+            QUEST_INDEX.unsubscribe(player.player_id, quest)
+            messages.append(f"Quest completed: {quest.name}! Return to the quest giver to turn it in.")
+
+    return messages
+
+
+def record_kill(player: Player, target_name: str) -> List[str]:
+    """
+    Advance kill objectives for the killer and their party. Only party members
+    subscribed to this target are loaded; they are written back in one
+    optimistic transaction. The killer is saved by the caller.
+    """
+    from .db import get_player_party, get_players, modify_players
+
+    QUEST_INDEX.ensure_loaded()
+    party = get_player_party(player.player_id)
+    candidate_ids = party["members"] if party else [player.player_id]
+    if QUEST_INDEX.enabled:
+        subs = QUEST_INDEX.subscribers("kill", target_name, candidate_ids)
+    else:
+        members = get_players([pid for pid in candidate_ids if pid != player.player_id])
+        subs = scan_subscriptions([player, *members], "kill", target_name)
+
+    messages = _advance(player, subs.pop(player.player_id, []), "kill", target_name)
+
+    for member, member_messages in modify_players(
+        list(subs), lambda member: _advance(member, subs[member.player_id], "kill", target_name)
+    ):
+        messages.extend(f"[Party] {member.name}: {msg}" for msg in member_messages)
+    return messages
+
+
+def record_inventory_change(player: Player, item_names: Iterable[str]) -> List[str]:
+    """
+    Re-evaluate collect objectives for items whose count changed in the
+    player's inventory. Mutates the player in memory; the caller saves it.
+    """
+    QUEST_INDEX.ensure_loaded()
+    messages = []
+    for item_name in dict.fromkeys(item_names):
+        if QUEST_INDEX.enabled:
+            refs = QUEST_INDEX.subscribers("collect", item_name, [player.player_id]).get(player.player_id)
+        else:
+            refs = scan_subscriptions([player], "collect", item_name).get(player.player_id)
+        if refs:
+            messages.extend(_advance(player, refs, "collect", item_name))
+    return messages
+
+
+def record_quest_accepted(player: Player, quest: Quest) -> List[str]:
+    """Subscribe a newly accepted quest; collect objectives count items already held."""
+    QUEST_INDEX.subscribe(player.player_id, quest)
+    return record_inventory_change(
+        player, [objective.target for objective in quest.objectives if objective.type == "collect"]
+    )
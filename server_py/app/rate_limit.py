@@ -0,0 +1,173 @@
+"""
+Phase 11: Admission Control
+
+Every game request does a dozen database round trips, so a few clients
+sending commands as fast as they can would crowd everyone else out of the
+game executor. Before a command is queued it has to pass two checks:
+
+- Token buckets per x-player-id and per client IP. A bucket holds up to
+  `burst` tokens and refills at `rate` per second. Passive commands (look,
+  stats, ...) and mutating commands have separate buckets and limits, and
+  an IP's limits are higher than a player's since players can share an
+  address. A batch costs one token per command.
+- A global gate on commands admitted and not yet finished, weighted like
+  the buckets: a batch holds one slot per command. A request that would
+  take the count past MAX_IN_FLIGHT_ACTIONS is turned away at once
+  instead of queueing behind the backlog.
+
+Rejections raise Throttled, which the endpoints turn into 429 with a
+Retry-After. Counts of admitted and throttled commands (by reason and
+action class) are reported in /metrics.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Rate:
+    rate: float  # Tokens per second
+    burst: int  # Bucket size
+
+
+# (key kind, action class) -> limit
+RATE_LIMITS: Dict[Tuple[str, str], Rate] = {
+    ("player", "passive"): Rate(rate=10, burst=20),
+    ("player", "mutating"): Rate(rate=4, burst=8),
+    ("ip", "passive"): Rate(rate=40, burst=80),
+    ("ip", "mutating"): Rate(rate=20, burst=40),
+}
+MAX_IN_FLIGHT_ACTIONS = 64
+MAX_TRACKED_KEYS = 10_000  # Idle buckets past this are forgotten (a new bucket starts full)
+
+
+class Throttled(Exception):
+    """A command was not admitted; retry after retry_after seconds."""
+
+    def __init__(self, reason: str, retry_after: int, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.message = message
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, limit: Rate, now: float):
+        self.rate = limit.rate
+        self.burst = limit.burst
+        self.tokens = float(limit.burst)
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, cost: int) -> float:
+        """Seconds until cost can be taken (0 if it can be now). Call refill first."""
+        # A batch bigger than the bucket is admitted from a full bucket and leaves it in debt
+        needed = min(cost, self.burst)
+        return 0.0 if self.tokens >= needed else (needed - self.tokens) / self.rate
+
+
+def action_class(actions: Iterable[Optional[str]]) -> str:
+    """'passive' if every action only reads, else 'mutating'."""
+    from .engine.apply_action import PASSIVE_ACTIONS
+
+    return "passive" if all(action in PASSIVE_ACTIONS for action in actions) else "mutating"
+
+
+class AdmissionControl:
+    """Token buckets per player and IP, plus the global gate on in-flight commands."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[Tuple[str, str], Rate]] = None,
+        max_in_flight: int = MAX_IN_FLIGHT_ACTIONS,
+        max_tracked_keys: int = MAX_TRACKED_KEYS,
+    ):
+        self.limits = dict(limits or RATE_LIMITS)
+        self.max_in_flight = max_in_flight
+        self.max_tracked_keys = max_tracked_keys
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[Tuple[str, str, str], TokenBucket]" = OrderedDict()
+        self._in_flight = 0
+        self.metrics: Dict[str, Any] = {
+            "in_flight": 0,
+            "admitted": {"passive": 0, "mutating": 0},
+            "throttled": {"player": 0, "ip": 0, "busy": 0},
+            "throttled_by_class": {"passive": 0, "mutating": 0},
+        }
+
+    @contextmanager
+    def admit(
+        self,
+        player_id: Optional[str],
+        client_ip: Optional[str],
+        klass: str,
+        cost: int = 1,
+    ) -> Iterator[None]:
+        """Hold cost in-flight slots for the block, or raise Throttled without running it."""
+        if not self.enabled:
+            yield
+            return
+        # Like the buckets, a batch bigger than the gate still fits when it is empty
+        slots = min(cost, self.max_in_flight)
+        with self._lock:
+            if self._in_flight + slots > self.max_in_flight:
+                self._throttled("busy", klass)
+                raise Throttled("busy", 1, "Server busy, try again.")
+            self._take(player_id, client_ip, klass, cost)
+            self._in_flight += slots
+            self.metrics["in_flight"] = self._in_flight
+            self.metrics["admitted"][klass] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= slots
+                self.metrics["in_flight"] = self._in_flight
+
+    def _take(self, player_id: Optional[str], client_ip: Optional[str], klass: str, cost: int) -> None:
+        # Caller holds self._lock. Check every bucket before taking from any
+        now = time.monotonic()
+        buckets = []
+        for kind, key in (("player", player_id), ("ip", client_ip)):
+            if not key:
+                continue
+            bucket = self._bucket(kind, key, klass, now)
+            bucket.refill(now)
+            wait = bucket.wait_for(cost)
+            if wait:
+                self._throttled(kind, klass)
+                raise Throttled(kind, max(1, math.ceil(wait)), "Too many commands. Slow down.")
+            buckets.append(bucket)
+        for bucket in buckets:
+            bucket.tokens -= cost
+
+    def _bucket(self, kind: str, key: str, klass: str, now: float) -> TokenBucket:
+        bucket_key = (kind, key, klass)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self._buckets[bucket_key] = TokenBucket(self.limits[(kind, klass)], now)
+            if len(self._buckets) > self.max_tracked_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(bucket_key)
+        return bucket
+
+    def _throttled(self, reason: str, klass: str) -> None:
+        self.metrics["throttled"][reason] += 1
+        self.metrics["throttled_by_class"][klass] += 1
+
+
+ADMISSION = AdmissionControl()
@@ -0,0 +1,333 @@
+"""
+Phase 8: Declarative World Rule Language
+
+World rules can be authored as data (JSON, or YAML when PyYAML is installed)
+and compiled once at load time into WorldRule closures.
+
+Conditions (all compare with "op" against "value"):
+    {"state": key, "op": "==", "value": "true"}       world_state value ("" if unset)
+    {"counter": key, "op": ">=", "value": 10}         world counter (0 if unset)
+    {"monsters": {"location": loc, "match": "rat"},
+     "op": "==", "value": 0}                          monsters at loc whose id contains match
+    {"turns_since": key, "op": ">=", "value": 20}     turns since the turn stored in key
+                                                      (false while key is unset)
+    {"all": [...]}, {"any": [...]}, {"not": {...}}
+
+Actions:
+    {"set": {key: value, ...}}                        set world_state values
+    {"set_turn": key}                                 store the current turn in key
+    {"reset_counter": {key: value, ...}}              reset world counters
+    {"emit": {"event_type": t, "location": loc, "data": {...}}}
+    {"spawn": {"location": loc, "entities": [Entity fields, ...]}}
+    {"schedule": {"after_turns": n, "name": name, "location": loc,
+                  "when": {...}, "then": [...],
+                  "else": [...]}}                     run actions n turns from now
+                                                      ("when" is checked when it fires;
+                                                      "else" runs if it is false)
+
+Rule inputs (depends_on) are derived from the condition; a rule may list extra
+domain events under "depends_on".
+"""
+
+from __future__ import annotations
+
+import json
+import operator
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from pydantic import ValidationError
+
+from .types_entities import Entity
+
+
+class RuleDSLError(ValueError):
+    pass
+
+
+_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+}
+
+_RULE_FIELDS = {"id", "name", "description", "location", "when", "then", "depends_on"}
+
+Condition = Callable[[Any], bool]
+Action = Callable[[Any, Any], None]
+
+
+def _require(cond: bool, path: str, message: str) -> None:
+    if not cond:
+        raise RuleDSLError(f"{path}: {message}")
+
+
+def _compile_comparison(spec: Dict[str, Any], path: str, expect: type) -> Tuple[Callable[[Any, Any], bool], Any]:
+    op = spec.get("op")
+    _require(op in _OPS, path, f"op must be one of {sorted(_OPS)}, got {op!r}")
+    _require("value" in spec, path, "missing 'value'")
+    value = spec["value"]
+    _require(
+        isinstance(value, expect) and not (expect is int and isinstance(value, bool)),
+        path,
+        f"value must be {expect.__name__}, got {value!r}",
+    )
+    return _OPS[op], value
+
+
+def _compile_condition(spec: Any, path: str, deps: Set[str]) -> Condition:
+    from .world_rules import WORLD_TURN_INPUT
+
+    _require(isinstance(spec, dict), path, "condition must be an object")
+
+    if "all" in spec or "any" in spec:
+        key = "all" if "all" in spec else "any"
+        items = spec[key]
+        _require(isinstance(items, list) and items, path, f"'{key}' needs a non-empty list")
+        parts = [_compile_condition(c, f"{path}.{key}[{i}]", deps) for i, c in enumerate(items)]
+        if key == "all":
+            return lambda world: all(p(world) for p in parts)
+        return lambda world: any(p(world) for p in parts)
+
+    if "not" in spec:
+        inner = _compile_condition(spec["not"], f"{path}.not", deps)
+        return lambda world: not inner(world)
+
+    if "state" in spec:
+        key = spec["state"]
+        _require(isinstance(key, str) and key, path, "'state' needs a key")
+        cmp, value = _compile_comparison(spec, path, str)
+        deps.add(key)
+        return lambda world: cmp(world.get(key) or "", value)
+
+    if "counter" in spec:
+        key = spec["counter"]
+        _require(isinstance(key, str) and key, path, "'counter' needs a key")
+        cmp, value = _compile_comparison(spec, path, int)
+        deps.add(key)
+        return lambda world: cmp(world.counter(key), value)
+
+    if "monsters" in spec:
+        target = spec["monsters"]
+        _require(isinstance(target, dict) and target.get("location"), path, "'monsters' needs a location")
+        location = target["location"]
+        match = target.get("match", "")
+        cmp, value = _compile_comparison(spec, path, int)
+        deps.update({f"monster_killed@{location}", f"monster_spawned@{location}"})
+        return lambda world: cmp(world.monster_count(location, match), value)
+
+    if "turns_since" in spec:
+        key = spec["turns_since"]
+        _require(isinstance(key, str) and key, path, "'turns_since' needs a key")
+        cmp, value = _compile_comparison(spec, path, int)
+        deps.update({key, WORLD_TURN_INPUT})
+
+        def turns_since(world: Any) -> bool:
+            recorded = world.get(key)
+            if not recorded:
+                return False
+            return cmp(world.turn - int(recorded), value)
+
+        return turns_since
+
+    raise RuleDSLError(f"{path}: unknown condition {sorted(spec)}")
+
+
+def _compile_action(spec: Any, path: str) -> Action:
+    from .world_rules import emit_domain_event
+    from .world_entities import WORLD_ENTITIES
+
+    _require(isinstance(spec, dict) and len(spec) == 1, path, "action must be an object with one key")
+    kind, body = next(iter(spec.items()))
+
+    if kind == "set":
+        _require(isinstance(body, dict) and body, path, "'set' needs key/value pairs")
+        for key, value in body.items():
+            _require(isinstance(value, str), f"{path}.set.{key}", "values must be strings")
+        updates = dict(body)
+
+        def set_state(world: Any, batch: Any) -> None:
+            for key, value in updates.items():
+                batch.set(key, value)
+
+        return set_state
+
+    if kind == "reset_counter":
+        _require(isinstance(body, dict) and body, path, "'reset_counter' needs key/value pairs")
+        for key, value in body.items():
+            _require(
+                isinstance(value, int) and not isinstance(value, bool),
+                f"{path}.reset_counter.{key}",
+                "values must be integers",
+            )
+        resets = dict(body)
+
+        def reset_counters(world: Any, batch: Any) -> None:
+            for key, value in resets.items():
+                batch.set_counter(key, value)
+
+        return reset_counters
+
+    if kind == "set_turn":
+        _require(isinstance(body, str) and body, path, "'set_turn' needs a key")
+        return lambda world, batch: batch.set(body, str(world.turn))
+
+    if kind == "emit":
+        _require(isinstance(body, dict) and body.get("event_type"), path, "'emit' needs an event_type")
+        event_type = body["event_type"]
+        location = body.get("location")
+        data = dict(body.get("data", {}))
+        return lambda world, batch: batch.emit(event_type, location, dict(data))
+
+    if kind == "spawn":
+        _require(isinstance(body, dict) and body.get("location"), path, "'spawn' needs a location")
+        location = body["location"]
+        specs = body.get("entities")
+        _require(isinstance(specs, list) and specs, path, "'spawn' needs a list of entities")
+        try:
+            for entity in specs:
+                Entity(**entity)
+        except (TypeError, ValidationError) as e:
+            raise RuleDSLError(f"{path}.spawn: invalid entity: {e}") from e
+
+        def spawn() -> None:
+            WORLD_ENTITIES.setdefault(location, []).extend(Entity(**entity) for entity in specs)
+            emit_domain_event("monster_spawned", location)
+
+        # Entities live in memory; only add them once the state change is committed
+        return lambda world, batch: batch.after_commit.append(spawn)
+
+    if kind == "schedule":
+        _require(isinstance(body, dict), path, "'schedule' must be an object")
+        after_turns = body.get("after_turns")
+        _require(
+            isinstance(after_turns, int) and not isinstance(after_turns, bool) and after_turns > 0,
+            path,
+            "'schedule' needs a positive after_turns",
+        )
+        data = {k: v for k, v in body.items() if k != "after_turns"}
+        data.setdefault("name", "scheduled_event")
+        compile_scheduled(data, f"{path}.schedule")  # validate now, not when it fires
+        location = data.get("location")
+
+        def schedule(world: Any, batch: Any) -> None:
+            batch.schedule(world.turn + after_turns, "rule_actions", location, data)
+
+        return schedule
+
+    raise RuleDSLError(f"{path}: unknown action '{kind}'")
+
+
+_scheduled_cache: Dict[str, Tuple[Any, Action]] = {}
+
+
+def compile_scheduled(data: Dict[str, Any], path: str = "scheduled") -> Tuple[Any, Action, Any]:
+    """
+    Compile the payload of a scheduled "rule_actions" event into
+    (condition or None, action, else action or None). Results are cached by payload.
+    """
+    cache_key = json.dumps(data, sort_keys=True)
+    cached = _scheduled_cache.get(cache_key)
+    if cached:
+        return cached
+
+    _require(isinstance(data, dict), path, "scheduled payload must be an object")
+    condition = None
+    if "when" in data:
+        condition = _compile_condition(data["when"], f"{path}.when", set())
+    _require(isinstance(data.get("then"), list) and data["then"], path, "'then' needs a non-empty list")
+    action = _compile_actions(data["then"], f"{path}.then")
+    otherwise = None
+    if "else" in data:
+        _require(isinstance(data["else"], list) and data["else"], path, "'else' needs a non-empty list")
+        otherwise = _compile_actions(data["else"], f"{path}.else")
+
+    _scheduled_cache[cache_key] = (condition, action, otherwise)
+    return condition, action, otherwise
+
+
+def _compile_actions(specs: List[Any], path: str) -> Action:
+    actions = [_compile_action(a, f"{path}[{i}]") for i, a in enumerate(specs)]
+
+    def action(world: Any, batch: Any) -> None:
+        for act in actions:
+            act(world, batch)
+
+    return action
+
+
+def _scheduled_flags(then: List[Any]) -> Dict[str, str]:
+    """
+    world_state keys a rule stamps with set_turn and a scheduled event of
+    the same rule clears back to "", mapped to that event's name. While such
+    a key is set, the rule is waiting for the event.
+    """
+    stamped = {a["set_turn"] for a in then if "set_turn" in a}
+    flags: Dict[str, str] = {}
+    for a in then:
+        if "schedule" not in a:
+            continue
+        scheduled = a["schedule"]
+        for branch in (scheduled.get("then", []), scheduled.get("else", [])):
+            for act in branch:
+                for key, value in act.get("set", {}).items():
+                    if key in stamped and value == "":
+                        flags[key] = scheduled.get("name", "scheduled_event")
+    return flags
+
+
+def compile_rule(spec: Any, path: str = "rule") -> "WorldRule":
+    """Validate a single rule definition and compile it into a WorldRule."""
+    from .world_rules import WorldRule
+
+    _require(isinstance(spec, dict), path, "rule must be an object")
+    unknown = set(spec) - _RULE_FIELDS
+    _require(not unknown, path, f"unknown fields {sorted(unknown)}")
+    for key in ("id", "name", "when", "then"):
+        _require(key in spec, path, f"missing '{key}'")
+    path = f"{path}[{spec['id']}]"
+
+    deps: Set[str] = set(spec.get("depends_on", []))
+    condition = _compile_condition(spec["when"], f"{path}.when", deps)
+
+    _require(isinstance(spec["then"], list) and spec["then"], path, "'then' needs a non-empty list")
+    action = _compile_actions(spec["then"], f"{path}.then")
+
+    return WorldRule(
+        rule_id=spec["id"],
+        name=spec["name"],
+        condition=condition,
+        action=action,
+        description=spec.get("description", ""),
+        depends_on=deps,
+        location_id=spec.get("location"),
+        scheduled_flags=_scheduled_flags(spec["then"]),
+    )
+
+
+def compile_rules(data: Any) -> List["WorldRule"]:
+    """Validate and compile a {"rules": [...]} document."""
+    _require(isinstance(data, dict) and isinstance(data.get("rules"), list), "rules", "expected {\"rules\": [...]}")
+    rules = [compile_rule(spec, f"rules[{i}]") for i, spec in enumerate(data["rules"])]
+
+    seen: Set[str] = set()
+    for rule in rules:
+        _require(rule.rule_id not in seen, "rules", f"duplicate rule id '{rule.rule_id}'")
+        seen.add(rule.rule_id)
+    return rules
+
+
+def load_rules(path: str) -> List["WorldRule"]:
+    """Load and compile rules from a JSON or YAML file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError as e:
+                raise RuleDSLError("YAML rule files require PyYAML to be installed") from e
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    return compile_rules(data)
@@ -0,0 +1,79 @@
+"""
+Phase 8: Scheduled World Events
+
+Delayed world effects ("do X at turn T") are persisted in the
+scheduled_events table and mirrored in an in-memory min-heap keyed by due
+turn. The rules pass pops only events that are due, so pending effects cost
+nothing until they fire and survive restarts.
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .db import get_scheduled_events
+
+
+class ScheduledEventQueue:
+    """In-memory min-heap mirror of the scheduled_events table."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[int, int]] = []  # (due_turn, event_id)
+        self._events: Dict[int, Dict[str, Any]] = {}
+
+    def load(self, keep: Optional[Callable[[Dict[str, Any]], bool]] = None) -> None:
+        """
+        Rebuild the heap from the database (called at startup). A shard
+        passes keep to load only the events at locations it owns.
+        """
+        events = get_scheduled_events()
+        if keep is not None:
+            events = [e for e in events if keep(e)]
+        with self._lock:
+            self._events = {e["id"]: e for e in events}
+            self._heap = [(e["due_turn"], e["id"]) for e in events]
+            heapq.heapify(self._heap)
+
+    def add(self, events: List[Dict[str, Any]]) -> None:
+        """Mirror events that were just persisted."""
+        with self._lock:
+            for e in events:
+                self._events[e["id"]] = e
+                heapq.heappush(self._heap, (e["due_turn"], e["id"]))
+
+    def next_due_turn(self) -> Optional[int]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def has_pending(self, name: str, location_id: Optional[str]) -> bool:
+        """Whether an event with this payload name is waiting at location_id."""
+        with self._lock:
+            return any(
+                e["location_id"] == location_id and e["data"].get("name") == name
+                for e in self._events.values()
+            )
+
+    def has_due(self, turn: int) -> bool:
+        due = self.next_due_turn()
+        return due is not None and due <= turn
+
+    def pop_due(self, turn: int) -> List[Dict[str, Any]]:
+        """Remove and return all events due at or before turn, in due order."""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= turn:
+                _, event_id = heapq.heappop(self._heap)
+                event = self._events.pop(event_id, None)
+                if event:
+                    due.append(event)
+        return due
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+
+SCHEDULED_EVENTS = ScheduledEventQueue()
@@ -0,0 +1,149 @@
+"""
+Phase 11: Live Sessions
+
+Players connected over the /ws endpoint get events pushed to them as they
+happen instead of polling with `look`:
+
+- presence: another player arrived at or left their location
+- trade_offer / party_invite: someone sent them an offer or invite
+- notice: anything that would otherwise wait in the notices queue
+  (world changes, reputation tiers, market fills, expiries, ...)
+
+Every event is {"type": "event", "event": <kind>, "message": str, "data": {...}}.
+Actions run in worker threads, so publish() is thread-safe: it hands each
+event to the session's event loop with call_soon_threadsafe. Each session
+has a bounded backlog; if a client stops reading, the oldest pushes are
+dropped (and counted) rather than growing memory.
+
+In a shard worker (see sharding.py) there are no sockets: publish() hands
+every event to the router process, which owns the sessions.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+
+MAX_PENDING_PUSHES = 100
+
+
+class Session:
+    """One connected client. Its outbox is only touched on its own event loop."""
+
+    def __init__(self, player_id: str, loop: asyncio.AbstractEventLoop):
+        self.player_id = player_id
+        self.loop = loop
+        self._outbox: deque = deque()
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def offer(self, message: Dict[str, Any]) -> None:
+        """Queue a push, dropping the oldest push if the client has fallen behind."""
+        if len(self._outbox) >= MAX_PENDING_PUSHES:
+            self._outbox.popleft()
+            self.dropped += 1
+            SESSIONS.metrics["dropped"] += 1
+        self._outbox.append(message)
+        self._ready.set()
+
+    def reply(self, message: Dict[str, Any]) -> None:
+        """Queue a command result; never dropped."""
+        self._outbox.append(message)
+        self._ready.set()
+
+    async def next_message(self) -> Dict[str, Any]:
+        while not self._outbox:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._outbox.popleft()
+
+
+class SessionHub:
+    """Connected sessions by player_id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Set[Session]] = {}
+        self.metrics = {"connected": 0, "pushed": 0, "dropped": 0}
+        self._forward: Optional[Callable[[List[str], str, str, Dict[str, Any]], None]] = None
+
+    def forward_to(self, forward: Optional[Callable[[List[str], str, str, Dict[str, Any]], None]]) -> None:
+        """Send every publish to forward(player_ids, event, message, data) instead of local sessions."""
+        self._forward = forward
+
+    def register(self, session: Session) -> None:
+        with self._lock:
+            self._sessions.setdefault(session.player_id, set()).add(session)
+            self.metrics["connected"] += 1
+
+    def unregister(self, session: Session) -> None:
+        with self._lock:
+            sessions = self._sessions.get(session.player_id)
+            if sessions and session in sessions:
+                sessions.discard(session)
+                if not sessions:
+                    del self._sessions[session.player_id]
+                self.metrics["connected"] -= 1
+
+    def has_sessions(self) -> bool:
+        return self._forward is not None or bool(self._sessions)
+
+    def is_connected(self, player_id: str) -> bool:
+        return self._forward is not None or player_id in self._sessions
+
+    def publish(self, player_ids: Iterable[str], event: str, message: str, data: Optional[Dict[str, Any]] = None) -> Set[str]:
+        """
+        Push an event to every session of the given players. Returns the
+        players reached. Inside a db transaction the push waits for the
+        commit (and is dropped on rollback); the players connected now are
+        returned.
+        """
+        from .db import after_commit, in_transaction
+
+        player_ids = list(player_ids)
+        if in_transaction():
+            after_commit(lambda: self.publish(player_ids, event, message, data))
+            return {pid for pid in player_ids if self.is_connected(pid)}
+        if self._forward is not None:
+            self._forward(player_ids, event, message, data or {})
+            return set(player_ids)
+        payload = {"type": "event", "event": event, "message": message, "data": data or {}}
+        reached: Set[str] = set()
+        with self._lock:
+            targets: List[Session] = []
+            for player_id in player_ids:
+                sessions = self._sessions.get(player_id)
+                if sessions:
+                    targets.extend(sessions)
+                    reached.add(player_id)
+            self.metrics["pushed"] += len(targets)
+        for session in targets:
+            try:
+                session.loop.call_soon_threadsafe(session.offer, payload)
+            except RuntimeError:
+                pass  # Loop already closed; the session is going away
+        return reached
+
+    def push_notices(self, player_ids: Iterable[str], message: str) -> Set[str]:
+        """Notice push handler (see notices.set_push_handler)."""
+        return self.publish(player_ids, "notice", message)
+
+    def publish_presence(self, entity: Dict[str, Any], location_id: str, change: str) -> None:
+        """Tell the other players at a location that a player arrived or left."""
+        if not self.has_sessions():
+            return
+        from .db import get_player_ids_at_location
+
+        verb = "arrives" if change == "arrived" else "leaves"
+        self.publish(
+            [pid for pid in get_player_ids_at_location(location_id) if pid != entity["id"]],
+            "presence",
+            f"{entity['name']} {verb}.",
+            {"location_id": location_id, "change": change, "entity": entity},
+        )
+
+
+SESSIONS = SessionHub()
@@ -0,0 +1,419 @@
+"""
+Phase 11: Location Shards
+
+The world can be split across worker processes so game logic uses more
+than one core. plan_shards() groups the locations in world.WORLD into
+shards (contiguous runs in breadth-first order from the spawn point, so
+neighbouring locations usually share a shard). Each shard is a process
+that owns the world entities, world rules and scheduled events for its
+locations and runs its own world tick scheduler; it applies the commands
+it is sent one at a time.
+
+The ShardRouter runs in the HTTP process. It reads the player's location
+from SQL for each command and forwards the command to the shard hosting
+it, so after a `move` across a shard boundary (or a respawn by another
+player's attack) the player's next command goes to the new shard (a
+handoff). A batch is split at each handoff: a shard runs the batch until
+the next command belongs elsewhere, commits, and the router sends the
+rest on. New players are created on the spawn point's shard. Market
+orders always go to GLOBAL_SHARD, which holds the only order books.
+
+All shards share the SQLite database; players keep their optimistic
+version checks across processes. Caches that mirror shared tables are
+left unloaded in the workers so they read through to SQL (parties,
+leaderboards, quest subscriptions). A rolled-back command undoes only the
+entries it touched (GLOBAL_SHARD's order books included) through
+db.on_rollback hooks; nothing is rebuilt from SQL. Workers relay notices
+and session pushes to the router, which delivers them to connected
+players and appends queued notices to command results. The router
+refreshes its leaderboards every LEADERBOARD_REFRESH_SECONDS.
+
+Set WORLD_SHARDS=<n> to run the server sharded; unset or 0 keeps
+everything in one process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .world import WORLD
+
+
+SHARD_COUNT_ENV = "WORLD_SHARDS"
+SPAWN_LOCATION = "town_square"
+GLOBAL_SHARD = 0  # Owns unlocated rules and events, maintenance and the market
+GLOBAL_ACTIONS = frozenset({"place_order", "cancel_order", "market_book"})
+SHARD_REQUEST_TIMEOUT_SECONDS = 30.0
+LEADERBOARD_REFRESH_SECONDS = 5.0
+
+
+class ShardError(RuntimeError):
+    """A shard failed to answer a command."""
+
+
+def plan_shards(shard_count: int) -> Dict[str, int]:
+    """Map each location to a shard number in [0, shard_count)."""
+    order: List[str] = []
+    seen = {SPAWN_LOCATION}
+    queue = deque([SPAWN_LOCATION])
+    while queue:
+        location_id = queue.popleft()
+        order.append(location_id)
+        for exit in WORLD[location_id].exits:
+            if exit.to not in seen:
+                seen.add(exit.to)
+                queue.append(exit.to)
+    order.extend(location_id for location_id in WORLD if location_id not in seen)
+
+    shard_count = max(1, min(shard_count, len(order)))
+    return {location_id: i * shard_count // len(order) for i, location_id in enumerate(order)}
+
+
+# -------------------------------------------------
+# Shard worker (runs in its own process)
+# -------------------------------------------------
+
+def _shard_main(shard_id: int, db_path: str, plan: Dict[str, int], requests, responses) -> None:
+    """Process entry point: scope this process to its locations, then serve commands."""
+    from . import db
+    from .market import MARKET
+    from .notices import set_push_handler
+    from .quest_progress import QUEST_INDEX
+    from .scheduled_events import SCHEDULED_EVENTS
+    from .sessions import SESSIONS
+    from .world_entities import WORLD_ENTITIES
+    from .world_rules import backfill_scheduled_flags, scope_world_rules
+    from .world_scheduler import WORLD_SCHEDULER
+
+    db.DB_PATH = db_path
+
+    def owns(location_id: Optional[str]) -> bool:
+        return plan.get(location_id, GLOBAL_SHARD) == shard_id
+
+    def runs_here(action: str, location_id: str) -> bool:
+        return shard_id == GLOBAL_SHARD if action in GLOBAL_ACTIONS else owns(location_id)
+
+    for location_id in list(WORLD_ENTITIES):
+        if not owns(location_id):
+            del WORLD_ENTITIES[location_id]
+    scope_world_rules(owns)
+    SCHEDULED_EVENTS.load(keep=lambda event: owns(event["location_id"]))
+    backfill_scheduled_flags()
+    QUEST_INDEX.disable()
+    WORLD_SCHEDULER.maintenance = shard_id == GLOBAL_SHARD
+    if shard_id == GLOBAL_SHARD:
+        MARKET.load()
+
+    # Connected players live in the router process
+    def forward_notice(player_ids: List[str], message: str):
+        responses.put(("notice", player_ids, message))
+        return set(player_ids)
+
+    def forward_publish(player_ids: List[str], event: str, message: str, data: Dict[str, Any]) -> None:
+        responses.put(("publish", player_ids, event, message, data))
+
+    set_push_handler(forward_notice)
+    SESSIONS.forward_to(forward_publish)
+
+    owned = sorted(location_id for location_id, shard in plan.items() if shard == shard_id)
+    print(f"[SHARD {shard_id}] Serving {', '.join(owned)} (pid {os.getpid()})")
+    asyncio.run(_serve(shard_id, requests, responses, runs_here))
+
+
+async def _serve(shard_id: int, requests, responses, runs_here) -> None:
+    from .world_scheduler import WORLD_SCHEDULER
+
+    await WORLD_SCHEDULER.start()
+    try:
+        while True:
+            message = await asyncio.to_thread(requests.get)
+            if message is None:
+                break
+            request_id, kind, player_id, payload = message
+            try:
+                result, location_id = await asyncio.to_thread(_handle, kind, player_id, payload, runs_here)
+            except Exception as e:
+                print(f"[SHARD {shard_id}] {kind} failed: {e!r}")
+                responses.put(("error", request_id, f"{type(e).__name__}: {e}"))
+            else:
+                responses.put(("result", request_id, result, location_id))
+    finally:
+        await WORLD_SCHEDULER.stop()
+
+
+def _handle(kind: str, player_id: Optional[str], payload: Any, runs_here) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Run one command or batch. Returns (response dict, player's location afterwards).
+    A batch stops at the first command that belongs on another shard; a
+    single command for a player no longer on this shard isn't run (None).
+    """
+    from .db import get_player, get_player_location
+    from .engine.apply_action import apply_action, apply_actions
+
+    if kind == "action" and player_id and isinstance(payload, dict) and payload.get("action") != "create_player":
+        location_id = get_player_location(player_id)
+        if location_id is not None and not runs_here(payload.get("action"), location_id):
+            return None, location_id
+
+    if kind == "batch":
+        response = apply_actions(
+            player_id=player_id,
+            commands=payload["commands"],
+            stop_on_error=payload["stop_on_error"],
+            runs_here=runs_here,
+        )
+    else:
+        response = apply_action(player_id=player_id, req_json=payload)
+    result = response.model_dump()
+
+    player = (result.get("state") or {}).get("player")
+    if player:
+        return result, player["location"]
+    saved = get_player(player_id) if player_id else None
+    return result, saved.location if saved else None
+
+
+# -------------------------------------------------
+# Router (runs in the HTTP process)
+# -------------------------------------------------
+
+class ShardRouter:
+    """Starts the shard processes and routes commands to them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._processes: List[multiprocessing.Process] = []
+        self._requests: List[Any] = []
+        self._responses: Any = None
+        self._reader: Optional[threading.Thread] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        self.plan: Dict[str, int] = {}
+        self.metrics: Dict[str, Any] = {"shards": 0, "routed": [], "handoffs": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._processes)
+
+    def start(self, shard_count: int, db_path: Optional[str] = None) -> None:
+        """Spawn the shard processes. The database must already be initialized."""
+        from . import db
+
+        if self.running:
+            return
+        self.plan = plan_shards(shard_count)
+        shard_count = max(self.plan.values()) + 1
+        context = multiprocessing.get_context("spawn")
+        self._responses = context.Queue()
+        self._stopping.clear()
+        for shard_id in range(shard_count):
+            requests = context.Queue()
+            process = context.Process(
+                target=_shard_main,
+                args=(shard_id, db_path or db.DB_PATH, self.plan, requests, self._responses),
+                name=f"world-shard-{shard_id}",
+                daemon=True,
+            )
+            process.start()
+            self._requests.append(requests)
+            self._processes.append(process)
+        self.metrics["shards"] = shard_count
+        self.metrics["routed"] = [0] * shard_count
+
+        self._reader = threading.Thread(target=self._read_responses, name="shard-router", daemon=True)
+        self._reader.start()
+        self._refresher = threading.Thread(target=self._refresh_leaderboards, name="shard-leaderboards", daemon=True)
+        self._refresher.start()
+        print(f"[SHARD] Started {shard_count} shards: {self.plan}")
+
+    def stop(self) -> None:
+        """Let each shard finish its queue, then stop the processes."""
+        if not self.running:
+            return
+        self._stopping.set()
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._responses.put(None)
+        self._reader.join()
+        self._processes, self._requests = [], []
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(ShardError("Shards stopped."))
+
+    def shard_for_location(self, location_id: Optional[str]) -> int:
+        return self.plan.get(location_id, GLOBAL_SHARD)
+
+    def shard_for_player(self, player_id: Optional[str]) -> int:
+        """
+        Shard hosting the player's location, read from SQL each time: other
+        players' actions can move them (a respawn after a PvP kill).
+        """
+        from .db import get_player_location
+
+        if not player_id:
+            return GLOBAL_SHARD
+        return self.shard_for_location(get_player_location(player_id))
+
+    def shard_for_command(self, command: Any, player_shard: int) -> int:
+        """Shard for one command, given the shard hosting the player's location."""
+        from .engine.parse_command import ParseError, parse_command
+
+        if isinstance(command, str):
+            try:
+                command = parse_command(command)
+            except ParseError:
+                command = None  # The shard reports the parse error
+        action = command.get("action") if isinstance(command, dict) else None
+        if action == "create_player":
+            return self.shard_for_location(SPAWN_LOCATION)
+        if action in GLOBAL_ACTIONS:
+            return GLOBAL_SHARD
+        return player_shard
+
+    def execute(self, player_id: Optional[str], req_json: Any) -> Dict[str, Any]:
+        """Run one action on the right shard. Blocking; returns the ActionResponse as a dict."""
+        # A shard declines (result None) a command for a player who moved off its locations after routing
+        for _ in range(3):
+            before = self.shard_for_player(player_id)
+            shard = self.shard_for_command(req_json if isinstance(req_json, dict) else None, before)
+            result, location_id = self._call(shard, "action", player_id, req_json)
+            if result is not None:
+                break
+        else:
+            raise ShardError("The player kept moving between shards.")
+        state_player = (result.get("state") or {}).get("player")
+        if player_id:
+            self._note_handoff(player_id, before, location_id)
+        elif state_player:
+            player_id = state_player["player_id"]
+        if result.get("ok") and player_id:
+            result["messages"].extend(_drain(player_id))
+        return result
+
+    def execute_batch(self, player_id: Optional[str], commands: List[Union[str, dict]], stop_on_error: bool) -> Dict[str, Any]:
+        """
+        Run a batch, split at handoffs. Each shard runs commands until the
+        next one belongs on another shard (a move across a boundary, or a
+        market order) and commits them as one transaction; the rest goes to
+        the shard that owns it. A batch that never leaves one shard is still
+        one transaction.
+        """
+        results: List[Dict[str, Any]] = []
+        rest = list(commands)
+        # Every pass runs at least one command unless the player moved between routing and running
+        for _ in range(2 * len(commands) + 1):
+            before = self.shard_for_player(player_id)
+            shard = self.shard_for_command(rest[0], before)
+            result, location_id = self._call(shard, "batch", player_id, {"commands": rest, "stop_on_error": stop_on_error})
+            self._note_handoff(player_id, before, location_id)
+            ran = result.get("results") or []
+            results.extend(ran)
+            rest = rest[len(ran):]
+            if not rest or result.get("error") or (ran and not ran[-1]["ok"] and stop_on_error):
+                break
+        else:
+            raise ShardError("The batch kept moving between shards.")
+
+        result["results"] = results
+        result["ok"] = bool(results) and all(r["ok"] for r in results) and len(results) == len(commands)
+        result["retryable"] = not any(r["ok"] for r in results) and any(r["retryable"] for r in results)
+        if results and results[-1]["ok"] and player_id:
+            results[-1]["messages"].extend(_drain(player_id))
+        return result
+
+    def _call(self, shard: int, kind: str, player_id: Optional[str], payload: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Send a command to a shard and wait. Returns (response dict, player's location afterwards)."""
+        if not self.running:
+            raise ShardError("Shards are not running.")
+        future: Future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            self._pending[request_id] = future
+            self.metrics["routed"][shard] += 1
+        self._requests[shard].put((request_id, kind, player_id, payload))
+        try:
+            return future.result(timeout=SHARD_REQUEST_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            with self._lock:
+                self._pending.pop(request_id, None)
+                self.metrics["errors"] += 1
+            raise ShardError(f"Shard {shard} did not answer within {SHARD_REQUEST_TIMEOUT_SECONDS:.0f}s.")
+
+    def _read_responses(self) -> None:
+        from .notices import queue_notice
+        from .sessions import SESSIONS
+
+        while True:
+            message = self._responses.get()
+            if message is None:
+                return
+            kind = message[0]
+            if kind == "notice":
+                queue_notice(message[1], message[2])
+            elif kind == "publish":
+                SESSIONS.publish(*message[1:])
+            elif kind in ("result", "error"):
+                with self._lock:
+                    future = self._pending.pop(message[1], None)
+                if future is None:
+                    continue  # Caller timed out
+                if kind == "error":
+                    with self._lock:
+                        self.metrics["errors"] += 1
+                    future.set_exception(ShardError(message[2]))
+                    continue
+                future.set_result((message[2], message[3]))
+
+    def _note_handoff(self, player_id: Optional[str], before: int, location_id: Optional[str]) -> None:
+        """Count a handoff when a command left the player on another shard's location."""
+        if not player_id or location_id is None:
+            return
+        shard = self.shard_for_location(location_id)
+        if shard == before:
+            return
+        with self._lock:
+            self.metrics["handoffs"] += 1
+        print(f"[SHARD] Handed {player_id} off from shard {before} to {shard}")
+
+    def _refresh_leaderboards(self) -> None:
+        # Reputation changes are logged by the shards; rebuild the router's copy periodically
+        from .factions import FACTIONS
+        from .leaderboards import LEADERBOARDS
+
+        while not self._stopping.wait(LEADERBOARD_REFRESH_SECONDS):
+            if LEADERBOARDS.loaded:
+                try:
+                    LEADERBOARDS.load(list(FACTIONS))
+                except Exception as e:
+                    print(f"[SHARD] Leaderboard refresh failed: {e}")
+
+
+def _drain(player_id: str) -> List[str]:
+    from .notices import drain_notices
+
+    return drain_notices(player_id)
+
+
+def configured_shard_count() -> int:
+    """Shard count from the WORLD_SHARDS environment variable (0 = unsharded)."""
+    try:
+        return max(0, int(os.environ.get(SHARD_COUNT_ENV, "0") or 0))
+    except ValueError:
+        return 0
+
+
+SHARD_ROUTER = ShardRouter()
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Literal, Optional, Union, List
+from typing import Literal, Optional, List
 from pydantic import BaseModel, Field
 from .types_quests import Quest
 
@@ -38,6 +38,8 @@ class Player(BaseModel):
     last_defeated_at: Optional[int] = None
     last_attacked_target: Optional[str] = None
     last_attacked_at: Optional[int] = None
+    # Optimistic concurrency: bumped on every write, checked by upsert_player
+    version: int = 0
 
 class AttackArgs(BaseModel):
     target: str
@@ -135,9 +137,14 @@ class AcceptTradeReq(BaseModel):
     args: AcceptTradeArgs
 
 
+class ListTradesArgs(BaseModel):
+    cursor: Optional[str] = Field(default=None, max_length=128)
+    limit: Optional[int] = Field(default=None, ge=1, le=50)
+
+
 class ListTradesReq(BaseModel):
     action: Literal["list_trades"]
-    args: Optional[dict] = None
+    args: Optional[ListTradesArgs] = None
 
 
 class CancelTradeArgs(BaseModel):
@@ -182,28 +189,39 @@ class ReputationReq(BaseModel):
     args: Optional[dict] = None
 
 
-ActionRequest = Union[
-    CreatePlayerReq,
-    LookReq,
-    MoveReq,
-    AttackReq,
-    StatsReq,
-    InventoryReq,
-    UseReq,
-    TalkReq,
-    BuyReq,
-    AcceptQuestReq,
-    TurnInQuestReq,
-    OfferTradeReq,
-    AcceptTradeReq,
-    ListTradesReq,
-    CancelTradeReq,
-    PartyInviteReq,
-    AcceptPartyInviteReq,
-    LeavePartyReq,
-    PartyStatusReq,
-    ReputationReq
-]
+class PlaceOrderArgs(BaseModel):
+    item: str = Field(min_length=1, max_length=64)
+    side: Literal["buy", "sell"]
+    price: int = Field(ge=1)
+    quantity: int = Field(ge=1)
+
+
+class PlaceOrderReq(BaseModel):
+    action: Literal["place_order"]
+    args: PlaceOrderArgs
+
+
+class CancelOrderArgs(BaseModel):
+    order_id: int
+
+
+class CancelOrderReq(BaseModel):
+    action: Literal["cancel_order"]
+    args: CancelOrderArgs
+
+
+class MarketBookArgs(BaseModel):
+    item: str = Field(min_length=1, max_length=64)
+
+
+class MarketBookReq(BaseModel):
+    action: Literal["market_book"]
+    args: MarketBookArgs
+
+
+class MarketOrdersReq(BaseModel):
+    action: Literal["market_orders"]
+    args: Optional[dict] = None
 
 
 class ActionResponse(BaseModel):
@@ -211,3 +229,12 @@ class ActionResponse(BaseModel):
     messages: List[str] = Field(default_factory=list)
     state: Optional[dict] = None
     error: Optional[str] = None
+    retryable: bool = False  # Failed on a transient conflict; nothing was kept, so the same request may succeed
+
+
+class BatchResponse(BaseModel):
+    ok: bool
+    results: List[ActionResponse] = Field(default_factory=list)
+    state: Optional[dict] = None
+    error: Optional[str] = None
+    retryable: bool = False  # No command succeeded and at least one hit a transient conflict
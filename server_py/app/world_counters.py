@@ -0,0 +1,65 @@
+"""
+Phase 8: World Counters
+
+Hot world counters (e.g. forest_rat_turns) are aggregated in memory and
+flushed to the typed world_counters table in one transaction, instead of a
+read-parse-write of world_state strings on every move or kill.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional, Tuple
+
+from .db import apply_world_counter_updates, get_world_counter
+
+
+class CounterBuffer:
+    """Thread-safe buffer of pending counter resets and increments."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Serializes flushes with value() reads
+        # key -> (reset_value or None, delta applied after the reset)
+        self._pending: Dict[str, Tuple[Optional[int], int]] = {}
+
+    def add(self, key: str, delta: int = 1) -> None:
+        with self._lock:
+            reset, pending = self._pending.get(key, (None, 0))
+            self._pending[key] = (reset, pending + delta)
+
+    def reset(self, key: str, value: int = 0) -> None:
+        with self._lock:
+            self._pending[key] = (value, 0)
+
+    def value(self, key: str) -> int:
+        """Current value: persisted value plus anything not yet flushed."""
+        with self._flush_lock:
+            with self._lock:
+                reset, delta = self._pending.get(key, (None, 0))
+            base = reset if reset is not None else get_world_counter(key)
+            return base + delta
+
+    def flush(self) -> int:
+        """Write pending updates in one transaction; returns the number of keys flushed."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            try:
+                apply_world_counter_updates(pending)
+            except Exception:
+                # Put the updates back, merging with anything added meanwhile
+                with self._lock:
+                    for key, (reset, delta) in pending.items():
+                        newer = self._pending.get(key)
+                        if newer is None:
+                            self._pending[key] = (reset, delta)
+                        elif newer[0] is None:
+                            self._pending[key] = (reset, delta + newer[1])
+                raise
+            return len(pending)
+
+
+WORLD_COUNTERS = CounterBuffer()
@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import Tuple
 from .types_quests import Quest, QuestObjective
 from .db import get_world_state
+from .world_counters import WORLD_COUNTERS
 from .engine.entities import get_world_entities_at
 
 
@@ -22,6 +23,7 @@ QUEST_TEMPLATES = {
             "healing_herb": 1,
         },
         repeatable=True,
+        giver_npc_id="warden",
     )
 }
 
@@ -39,7 +41,7 @@ def is_quest_available(quest_id: str) -> Tuple[bool, str]:
         if rat_count == 0:
             # Check if forest was recently cleared
             is_cleared = get_world_state("forest_infested") == "false"
-            if is_cleared or get_world_state("forest_rat_turns") == "0":
+            if is_cleared or WORLD_COUNTERS.value("forest_rat_turns") == 0:
                 return False, "The forest is much safer now. The rats have been dealt with, at least for the time being."
             else:
                 return False, "The forest is clear at the moment. Perhaps check back later."
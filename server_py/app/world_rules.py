@@ -3,18 +3,104 @@ Phase 8: World Evolution Rules Engine
 
 This module contains the rule-based logic for world state evolution.
 Rules are deterministic and run after certain turns or events.
+
+Each rule declares the inputs it depends on: world_state and counter keys
+(e.g. "forest_rat_turns") and domain events written as "<event>@<location>"
+(e.g. "monster_killed@forest", "pvp@town_square"). Changes mark inputs
+dirty, and evaluate_world_rules() only re-runs the rules subscribed to
+inputs that changed since the last evaluation.
+
+Rules are defined in world_rules.json and compiled by rule_dsl.py.
 """
 
 from __future__ import annotations
 
-from typing import Dict, Any, List, Callable
+import os
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Callable, Optional, Set, Tuple
+from dataclasses import dataclass, field
+from types import MappingProxyType
 from .db import (
-    get_world_state,
-    set_world_state,
-    get_world_turn,
-    log_world_event,
+    after_commit,
+    load_world_snapshot,
+    apply_world_batch,
 )
 from .engine.entities import get_world_entities_at
+from .world_counters import WORLD_COUNTERS
+from .scheduled_events import SCHEDULED_EVENTS
+from .rule_dsl import load_rules
+
+
+@dataclass(frozen=True)
+class WorldSnapshot:
+    """Immutable view of the world taken once per rules pass."""
+    turn: int
+    state: MappingProxyType  # world_state key -> value
+    monsters: MappingProxyType  # location_id -> tuple of monster entity_ids
+    counters: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))  # counter key -> value
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.state.get(key, default)
+
+    def counter(self, key: str) -> int:
+        return self.counters.get(key, 0)
+
+    def monster_count(self, location_id: str, match: str = "") -> int:
+        """Count monsters at a location whose entity_id contains match."""
+        match = match.lower()
+        return sum(1 for entity_id in self.monsters.get(location_id, ()) if match in entity_id.lower())
+
+
+@dataclass
+class WorldBatch:
+    """State mutations and events emitted by rule actions, applied in one transaction."""
+    state: Dict[str, str] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)  # counter resets
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    scheduled: List[Dict[str, Any]] = field(default_factory=list)  # new future events
+    fired_event_ids: List[int] = field(default_factory=list)  # scheduled events to remove
+    after_commit: List[Callable[[], None]] = field(default_factory=list)
+
+    def set(self, key: str, value: str) -> None:
+        self.state[key] = value
+
+    def set_counter(self, key: str, value: int) -> None:
+        self.counters[key] = value
+
+    def emit(self, event_type: str, location_id: Optional[str], data: Dict[str, Any]) -> None:
+        self.events.append({"event_type": event_type, "location_id": location_id, "data": data})
+
+    def schedule(self, due_turn: int, event_type: str, location_id: Optional[str], data: Dict[str, Any]) -> None:
+        self.scheduled.append({
+            "due_turn": due_turn,
+            "event_type": event_type,
+            "location_id": location_id,
+            "data": data,
+        })
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.state or self.counters or self.events
+            or self.scheduled or self.fired_event_ids or self.after_commit
+        )
+
+
+def take_world_snapshot() -> WorldSnapshot:
+    """Load world_state, counters and the turn in one query; entity counts come from memory."""
+    from .world_entities import WORLD_ENTITIES
+
+    turn, state, counters = load_world_snapshot()
+    monsters = {
+        location_id: tuple(e.entity_id for e in entities if e.type == "monster")
+        for location_id, entities in WORLD_ENTITIES.items()
+    }
+    return WorldSnapshot(
+        turn=turn,
+        state=MappingProxyType(state),
+        monsters=MappingProxyType(monsters),
+        counters=MappingProxyType(counters),
+    )
 
 
 class WorldRule:
@@ -24,221 +110,226 @@ class WorldRule:
         self,
         rule_id: str,
         name: str,
-        condition: Callable[[], bool],
-        action: Callable[[], None],
+        condition: Callable[[WorldSnapshot], bool],
+        action: Callable[[WorldSnapshot, WorldBatch], None],
         description: str,
+        depends_on: Iterable[str] = (),
+        location_id: Optional[str] = None,
+        scheduled_flags: Optional[Dict[str, str]] = None,
     ):
         self.rule_id = rule_id
         self.name = name
         self.condition = condition
         self.action = action
         self.description = description
+        self.depends_on = frozenset(depends_on)
+        self.location_id = location_id  # Where players are notified when it fires
+        # world_state key -> name of the scheduled event that clears it (see backfill_scheduled_flags)
+        self.scheduled_flags = dict(scheduled_flags or {})
     
-    def evaluate(self) -> bool:
-        """Check if the rule's condition is met and execute action if so."""
-        if self.condition():
-            self.action()
+    def evaluate(self, snapshot: WorldSnapshot, batch: WorldBatch) -> bool:
+        """Check the condition against the snapshot and queue the action's mutations if met."""
+        if self.condition(snapshot):
+            self.action(snapshot, batch)
             return True
         return False
 
 
-# Define world evolution rules
+# Input marked dirty every time the world clock advances
+WORLD_TURN_INPUT = "world_turn"
+_latest_turn = 0  # Last turn reported by note_world_turn()
 
-def _check_forest_infestation() -> bool:
-    """Check if forest should become infested."""
-    # Check if rats have been alive in forest for N turns
-    state = get_world_state("forest_rat_turns")
-    if not state:
-        return False
-    
-    rat_turns = int(state)
-    return rat_turns >= 10  # Infestation after 10 turns
-
-
-def _apply_forest_infestation() -> None:
-    """Make forest more dangerous."""
-    set_world_state("forest_infested", "true")
-    log_world_event(
-        event_type="world_evolution",
-        location_id="forest",
-        data={
-            "change": "forest_infested",
-            "description": "The forest became more dangerous as rats multiplied."
-        }
-    )
+_dirty_lock = threading.Lock()
+_dirty_inputs: Set[str] = set()
+_evaluate_all = True  # First evaluation after startup checks every rule
 
 
-def _check_forest_cleared() -> bool:
-    """Check if forest should be cleared."""
-    # Check if enough rats have been killed
-    entities = get_world_entities_at("forest")
-    rat_count = sum(1 for e in entities if e.type == "monster" and "rat" in e.entity_id.lower())
-
-    # Check if forest was previously populated with rats
-    cleared_turn = get_world_state("forest_cleared_turn")
-
-    # Trigger if rats are all dead and we haven't already recorded this clear
-    # (cleared_turn being set means we already handled this clear event)
-    return rat_count == 0 and not cleared_turn
-
-
-def _apply_forest_cleared() -> None:
-    """Clear the forest infestation."""
-    set_world_state("forest_infested", "false")
-    set_world_state("forest_rat_turns", "0")
-    # Record when forest was cleared for respawn timer
-    current_turn = get_world_turn()
-    set_world_state("forest_cleared_turn", str(current_turn))
-    log_world_event(
-        event_type="world_evolution",
-        location_id="forest",
-        data={
-            "change": "forest_cleared",
-            "description": "The forest is now safer after the rats were cleared."
-        }
-    )
+def mark_world_dirty(*inputs: str) -> None:
+    """Mark world_state keys or domain events as changed since the last evaluation."""
+    with _dirty_lock:
+        _dirty_inputs.update(inputs)
 
 
-def _check_town_security() -> bool:
-    """Check if town security should change based on PvP activity."""
-    # This would check action logs for PvP in town
-    # For now, return False as placeholder
-    return False
+def note_world_turn(turn: int) -> None:
+    """Record that the world clock advanced to turn."""
+    global _latest_turn
+    _latest_turn = max(_latest_turn, turn)
+    mark_world_dirty(WORLD_TURN_INPUT)
 
 
-def _apply_town_guards() -> None:
-    """Spawn guards in town."""
-    set_world_state("town_security_level", "high")
-    log_world_event(
-        event_type="world_evolution",
-        location_id="town_square",
-        data={
-            "change": "guards_deployed",
-            "description": "Town guards have been deployed due to recent violence."
-        }
-    )
+def emit_domain_event(event_type: str, location_id: str) -> None:
+    """Record a domain event (e.g. monster_killed@forest) for subscribed rules, once its transaction commits."""
+    after_commit(lambda: mark_world_dirty(f"{event_type}@{location_id}"))
 
 
-def _check_rat_respawn() -> bool:
-    """Check if rats should respawn in the forest."""
-    # Check if forest is clear and enough turns have passed
-    entities = get_world_entities_at("forest")
-    rat_count = sum(1 for e in entities if e.type == "monster" and "rat" in e.entity_id.lower())
+def increment_counter(key: str, delta: int = 1) -> None:
+    """Buffer a counter increment and mark it dirty for dependent rules, once its transaction commits."""
+    def add() -> None:
+        WORLD_COUNTERS.add(key, delta)
+        mark_world_dirty(key)
+    after_commit(add)
 
-    print(f"[RAT RESPAWN CHECK] Rat count: {rat_count}")
 
-    if rat_count > 0:
-        print(f"[RAT RESPAWN CHECK] Rats exist, not respawning")
-        return False  # Rats already exist
+def reset_counter(key: str, value: int = 0) -> None:
+    """Buffer a counter reset and mark it dirty for dependent rules, once its transaction commits."""
+    def reset() -> None:
+        WORLD_COUNTERS.reset(key, value)
+        mark_world_dirty(key)
+    after_commit(reset)
 
-    # Check how long rats have been gone
-    cleared_state = get_world_state("forest_cleared_turn")
-    if not cleared_state:
-        print(f"[RAT RESPAWN CHECK] No cleared_turn set")
-        return False  # Forest hasn't been cleared yet
 
-    cleared_turn = int(cleared_state)
-    current_turn = get_world_turn()
-    turns_since_clear = current_turn - cleared_turn
+# Registry of all world rules, authored as data (see rule_dsl.py)
+RULES_PATH = os.path.join(os.path.dirname(__file__), "world_rules.json")
+WORLD_RULES: List[WorldRule] = load_rules(RULES_PATH)
 
-    print(f"[RAT RESPAWN CHECK] Current turn: {current_turn}, Cleared turn: {cleared_turn}, Turns since: {turns_since_clear}")
 
-    # Respawn after 20 turns
-    should_respawn = turns_since_clear >= 20
-    print(f"[RAT RESPAWN CHECK] Should respawn: {should_respawn}")
-    return should_respawn
+def _build_dependency_index(rules: List[WorldRule]) -> Dict[str, List[WorldRule]]:
+    """Map each input to the rules that depend on it."""
+    index: Dict[str, List[WorldRule]] = {}
+    for rule in rules:
+        for dep in rule.depends_on:
+            index.setdefault(dep, []).append(rule)
+    return index
 
 
-def _apply_rat_respawn() -> None:
-    """Respawn rats in the forest."""
-    from .world_entities import WORLD_ENTITIES
-    from .types_entities import Entity
-
-    # Add new rats back to the forest
-    if "forest" not in WORLD_ENTITIES:
-        WORLD_ENTITIES["forest"] = []
-
-    WORLD_ENTITIES["forest"].extend([
-        Entity(
-            entity_id="rat_1",
-            name="Rat",
-            type="monster",
-            hp=5,
-            attack=2,
-            xp_reward=2,
-            loot={"coin": 1, "healing_herb": 1},
-        ),
-        Entity(
-            entity_id="rat_2",
-            name="Rat",
-            type="monster",
-            hp=5,
-            attack=2,
-            xp_reward=2,
-            loot={"coin": 1, "healing_herb": 1},
-        ),
-    ])
-
-    # Reset the cleared turn tracker
-    set_world_state("forest_cleared_turn", "")
-    set_world_state("forest_rat_turns", "0")
-
-    log_world_event(
-        event_type="world_evolution",
-        location_id="forest",
-        data={
-            "change": "rats_respawned",
-            "description": "Rats have returned to the forest."
-        }
-    )
+# Dependency index: input -> rules subscribed to it
+RULE_INDEX: Dict[str, List[WorldRule]] = _build_dependency_index(WORLD_RULES)
+_RULE_ORDER: Dict[str, int] = {rule.rule_id: i for i, rule in enumerate(WORLD_RULES)}
 
 
-# Registry of all world rules
-WORLD_RULES: List[WorldRule] = [
-    WorldRule(
-        rule_id="forest_infestation",
-        name="Forest Infestation",
-        condition=_check_forest_infestation,
-        action=_apply_forest_infestation,
-        description="Forest becomes infested if rats survive too long",
-    ),
-    WorldRule(
-        rule_id="forest_cleared",
-        name="Forest Cleared",
-        condition=_check_forest_cleared,
-        action=_apply_forest_cleared,
-        description="Forest clears when all rats are defeated",
-    ),
-    WorldRule(
-        rule_id="rat_respawn",
-        name="Rat Respawn",
-        condition=_check_rat_respawn,
-        action=_apply_rat_respawn,
-        description="Rats respawn after 20 turns",
-    ),
-    WorldRule(
-        rule_id="town_security",
-        name="Town Security",
-        condition=_check_town_security,
-        action=_apply_town_guards,
-        description="Guards appear if too much PvP happens in town",
-    ),
-]
-
-
-def evaluate_world_rules() -> List[str]:
+def scope_world_rules(owns: Callable[[Optional[str]], bool]) -> None:
+    """Keep only the rules whose location this process owns (shard workers, see sharding.py)."""
+    global WORLD_RULES, RULE_INDEX
+    WORLD_RULES = [rule for rule in WORLD_RULES if owns(rule.location_id)]
+    RULE_INDEX = _build_dependency_index(WORLD_RULES)
+
+
+def backfill_scheduled_flags() -> List[str]:
     """
-    Evaluate all world rules and return list of triggered rule names.
-    This should be called periodically (e.g., every N turns or after certain actions).
+    Clear flags whose scheduled event is gone (called at startup, after
+    SCHEDULED_EVENTS.load()). A rule like forest_cleared stamps a flag and
+    schedules the event that clears it again; databases from before the
+    event existed, or that lost it, would otherwise wait forever. Clearing
+    the flag lets the rule fire (and schedule the event) again. Returns the
+    keys cleared.
     """
-    print(f"[WORLD RULES] Evaluating {len(WORLD_RULES)} rules")
-    triggered = []
+    snapshot = take_world_snapshot()
+    cleared = []
     for rule in WORLD_RULES:
-        print(f"[WORLD RULES] Checking rule: {rule.name}")
-        if rule.evaluate():
-            print(f"[WORLD RULES] Rule triggered: {rule.name}")
-            triggered.append(rule.name)
-    print(f"[WORLD RULES] Triggered rules: {triggered}")
+        for key, event_name in rule.scheduled_flags.items():
+            if snapshot.get(key, "") and not SCHEDULED_EVENTS.has_pending(event_name, rule.location_id):
+                cleared.append(key)
+    if cleared:
+        apply_world_batch({key: "" for key in cleared}, [])
+        mark_world_dirty(*cleared)
+        print(f"[WORLD RULES] Cleared flags with no pending scheduled event: {cleared}")
+    return cleared
+
+
+def _take_affected_rules() -> List[WorldRule]:
+    """Drain the dirty set and return affected rules in registry order."""
+    global _evaluate_all
+    with _dirty_lock:
+        dirty = set(_dirty_inputs)
+        _dirty_inputs.clear()
+        evaluate_all = _evaluate_all
+        _evaluate_all = False
+
+    if evaluate_all:
+        return list(WORLD_RULES)
+
+    affected: Dict[str, WorldRule] = {}
+    for key in dirty:
+        for rule in RULE_INDEX.get(key, ()):
+            affected[rule.rule_id] = rule
+    return sorted(affected.values(), key=lambda r: _RULE_ORDER[r.rule_id])
+
+
+def _run_rule_actions(world: WorldSnapshot, batch: WorldBatch, event: Dict[str, Any]) -> bool:
+    """Run a scheduled DSL action list (or its "else" list if "when" is false); returns whether it fired."""
+    from .rule_dsl import compile_scheduled
+
+    condition, action, otherwise = compile_scheduled(event["data"])
+    if condition is not None and not condition(world):
+        if otherwise is not None:
+            otherwise(world, batch)
+        return False
+    action(world, batch)
+    return True
+
+
+# Scheduled event type -> handler(snapshot, batch, event) -> fired
+SCHEDULED_EVENT_HANDLERS: Dict[str, Callable[[WorldSnapshot, WorldBatch, Dict[str, Any]], bool]] = {
+    "rule_actions": _run_rule_actions,
+}
+
+
+def evaluate_world_rules(budget_seconds: Optional[float] = None) -> List[Tuple[str, Optional[str]]]:
+    """
+    Evaluate rules whose inputs changed and fire scheduled events that are due.
+    Returns (name, location_id) for each rule or scheduled event that triggered.
+    This should be called periodically (e.g., every N turns or after certain actions).
+
+    Rules run against one immutable snapshot (a single read) and their mutations
+    are applied in one transaction at the end of the pass. Inputs changed by
+    triggered rules are picked up on the next evaluation.
+    If budget_seconds runs out, the remaining rules stay pending for the next call.
+    """
+    rules = _take_affected_rules()
+    print(f"[WORLD RULES] Evaluating {len(rules)} of {len(WORLD_RULES)} rules")
+    if not rules and not SCHEDULED_EVENTS.has_due(_latest_turn):
+        return []
+
+    due_events: List[Dict[str, Any]] = []
+    try:
+        # Buffered counter updates must be visible to this pass
+        WORLD_COUNTERS.flush()
+        snapshot = take_world_snapshot()
+        batch = WorldBatch()
+        triggered: List[Tuple[str, Optional[str]]] = []
+
+        due_events = SCHEDULED_EVENTS.pop_due(snapshot.turn)
+        for event in due_events:
+            handler = SCHEDULED_EVENT_HANDLERS.get(event["event_type"])
+            if handler and handler(snapshot, batch, event):
+                name = event["data"].get("name", event["event_type"])
+                print(f"[WORLD RULES] Scheduled event fired: {name}")
+                triggered.append((name, event["location_id"]))
+            batch.fired_event_ids.append(event["id"])
+
+        deadline = time.monotonic() + budget_seconds if budget_seconds is not None else None
+        for i, rule in enumerate(rules):
+            if deadline is not None and time.monotonic() > deadline:
+                print(f"[WORLD RULES] Budget exhausted, deferring {len(rules) - i} rules")
+                for pending in rules[i:]:
+                    mark_world_dirty(*pending.depends_on)
+                break
+            print(f"[WORLD RULES] Checking rule: {rule.name}")
+            if rule.evaluate(snapshot, batch):
+                print(f"[WORLD RULES] Rule triggered: {rule.name}")
+                triggered.append((rule.name, rule.location_id))
+        print(f"[WORLD RULES] Triggered: {[name for name, _ in triggered]}")
+
+        created = []
+        if batch:
+            created = apply_world_batch(
+                batch.state,
+                batch.events,
+                batch.counters,
+                batch.scheduled,
+                batch.fired_event_ids,
+            )
+    except Exception:
+        # Nothing was committed: keep every rule in this pass pending and requeue due events
+        for rule in rules:
+            mark_world_dirty(*rule.depends_on)
+        SCHEDULED_EVENTS.add(due_events)
+        raise
+
+    SCHEDULED_EVENTS.add(created)
+    mark_world_dirty(*batch.state, *batch.counters)
+    for effect in batch.after_commit:
+        effect()
     return triggered
 
 
@@ -249,8 +340,6 @@ def track_monster_survival(location_id: str) -> None:
         rat_count = sum(1 for e in entities if e.type == "monster" and "rat" in e.entity_id.lower())
         
         if rat_count > 0:
-            current = get_world_state("forest_rat_turns")
-            turns = int(current) if current else 0
-            set_world_state("forest_rat_turns", str(turns + 1))
+            increment_counter("forest_rat_turns")
         else:
-            set_world_state("forest_rat_turns", "0")
+            reset_counter("forest_rat_turns")
@@ -0,0 +1,247 @@
+"""
+Phase 8: Background World Tick Scheduler
+
+Runs world evolution off the request path. The scheduler ticks on a fixed
+real-time cadence, or early once the world clock has advanced by
+TICK_TURN_DELTA turns. Each tick evaluates world rules within a time
+budget and queues "world changed" notices for players at the affected
+locations. Buffered world counter updates are flushed at the start of
+each rules pass and on shutdown.
+
+Every MAINTENANCE_EVERY_TICKS ticks the scheduler also runs bounded
+housekeeping (e.g. reputation event compaction), one short transaction
+per batch so it never holds the database for long, re-tiers decayed
+reputation standing so players hear when it drifts across a tier, and
+sweeps expired trade offers and party invites, notifying their senders,
+and expired idempotency keys.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .db import (
+    get_player_ids_at_location,
+    log_world_event,
+    compact_reputation_events,
+    reclaim_free_pages,
+    recompute_reputation_tiers,
+    sweep_expired_trades,
+    sweep_expired_party_invites,
+    sweep_expired_idempotency_keys,
+    get_player_names,
+)
+from .factions import FACTIONS
+from .notices import queue_notice
+
+
+TICK_INTERVAL_SECONDS = 5.0  # Real-time cadence
+TICK_TURN_DELTA = 5  # Tick early after this many turns
+TICK_BUDGET_SECONDS = 0.25  # Rules left over are deferred to the next tick
+MAINTENANCE_EVERY_TICKS = 12
+MAINTENANCE_MAX_BATCHES = 10  # Per job, per maintenance run
+
+
+class WorldTickScheduler:
+    """Background task that advances world evolution."""
+
+    def __init__(
+        self,
+        interval_seconds: float = TICK_INTERVAL_SECONDS,
+        turn_delta: int = TICK_TURN_DELTA,
+        budget_seconds: float = TICK_BUDGET_SECONDS,
+    ):
+        self.interval_seconds = interval_seconds
+        self.turn_delta = turn_delta
+        self.budget_seconds = budget_seconds
+        self.maintenance = True  # Only one shard runs housekeeping (see sharding.py)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._turn_lock = threading.Lock()
+        self._latest_turn = 0
+        self._last_tick_turn = 0
+
+        self.metrics: Dict[str, Any] = {
+            "ticks": 0,
+            "overruns": 0,
+            "errors": 0,
+            "failed_ticks": 0,
+            "rules_triggered": 0,
+            "last_tick_ms": 0.0,
+            "max_tick_ms": 0.0,
+            "maintenance_runs": 0,
+            "reputation_events_compacted": 0,
+            "reputation_tier_changes": 0,
+            "offers_expired": 0,
+            "idempotency_keys_expired": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the tick loop on the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="world-tick-scheduler")
+
+    async def stop(self) -> None:
+        """Stop the loop, letting an in-flight tick finish, and flush buffered counters."""
+        from .world_counters import WORLD_COUNTERS
+
+        if self._task:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await asyncio.to_thread(WORLD_COUNTERS.flush)
+
+    def notify_turn(self, turn: int) -> None:
+        """
+        Record that the world clock advanced. Safe to call from request threads;
+        wakes the loop early once turn_delta turns have passed since the last tick
+        or a scheduled event has come due.
+        """
+        from .scheduled_events import SCHEDULED_EVENTS
+
+        with self._turn_lock:
+            self._latest_turn = max(self._latest_turn, turn)
+            due = self._latest_turn - self._last_tick_turn >= self.turn_delta
+        due = due or SCHEDULED_EVENTS.has_due(turn)
+        if due and self._loop and self._wake and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._stopping:
+                break
+            try:
+                await asyncio.to_thread(self.tick)
+            except Exception as e:
+                # e.g. "database is locked" while a batch holds the write lock;
+                # the next tick retries, the loop must not die
+                self.metrics["errors"] += 1
+                self.metrics["failed_ticks"] += 1
+                print(f"[WORLD TICK] Tick failed: {e!r}")
+
+    def tick(self) -> None:
+        """Run one world tick. Blocking; called off the event loop."""
+        from .world_rules import evaluate_world_rules
+
+        with self._turn_lock:
+            self._last_tick_turn = self._latest_turn
+
+        started = time.monotonic()
+        try:
+            triggered_rules = evaluate_world_rules(budget_seconds=self.budget_seconds)
+        except Exception as e:
+            self.metrics["errors"] += 1
+            print(f"[WORLD TICK] World rules error: {e}")
+            log_world_event(
+                event_type="world_rule_error",
+                location_id=None,
+                data={"error": str(e)}
+            )
+            triggered_rules = []
+
+        # Group triggered rules by location so each player gets one notice
+        by_location: Dict[Optional[str], list] = {}
+        for name, location_id in triggered_rules:
+            by_location.setdefault(location_id, []).append(name)
+        for location_id, names in by_location.items():
+            if location_id is None:
+                continue
+            queue_notice(
+                get_player_ids_at_location(location_id),
+                f"[World changed: {', '.join(names)}]",
+            )
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self.metrics["ticks"] += 1
+        self.metrics["rules_triggered"] += len(triggered_rules)
+        self.metrics["last_tick_ms"] = elapsed_ms
+        self.metrics["max_tick_ms"] = max(self.metrics["max_tick_ms"], elapsed_ms)
+        if elapsed_ms > self.budget_seconds * 1000:
+            self.metrics["overruns"] += 1
+            print(f"[WORLD TICK] Tick overran budget: {elapsed_ms:.1f}ms")
+
+        if self.maintenance and self.metrics["ticks"] % MAINTENANCE_EVERY_TICKS == 0:
+            try:
+                self.run_maintenance()
+            except Exception as e:
+                self.metrics["errors"] += 1
+                print(f"[WORLD TICK] Maintenance error: {e}")
+
+    def run_maintenance(self) -> None:
+        """Run housekeeping jobs in bounded batches. Blocking; called off the event loop."""
+        compacted = 0
+        for _ in range(MAINTENANCE_MAX_BATCHES):
+            folded = compact_reputation_events()
+            compacted += folded
+            if not folded:
+                break
+        if compacted:
+            reclaim_free_pages()
+            print(f"[WORLD TICK] Compacted {compacted} reputation events")
+
+        tier_changes = recompute_reputation_tiers()
+        for change in tier_changes:
+            faction = FACTIONS.get(change["faction_id"])
+            faction_name = faction.name if faction else change["faction_id"]
+            queue_notice(
+                [change["player_id"]],
+                f"[Reputation: You are now {change['tier']} with {faction_name}]",
+            )
+
+        expired = self._sweep_expired_offers()
+
+        keys_expired = 0
+        for _ in range(MAINTENANCE_MAX_BATCHES):
+            swept = sweep_expired_idempotency_keys()
+            keys_expired += swept
+            if not swept:
+                break
+
+        self.metrics["maintenance_runs"] += 1
+        self.metrics["reputation_tier_changes"] += len(tier_changes)
+        self.metrics["reputation_events_compacted"] += compacted
+        self.metrics["offers_expired"] += expired
+        self.metrics["idempotency_keys_expired"] += keys_expired
+
+    def _sweep_expired_offers(self) -> int:
+        """Delete expired trade offers and party invites, telling each sender. Returns rows swept."""
+        swept = 0
+        for sweep, describe in (
+            (sweep_expired_trades, lambda row, name: f"[Your trade offer to {name} ({row['trade_id']}) expired]"),
+            (sweep_expired_party_invites, lambda row, name: f"[Your party invite to {name} expired]"),
+        ):
+            for _ in range(MAINTENANCE_MAX_BATCHES):
+                rows = sweep()
+                if not rows:
+                    break
+                swept += len(rows)
+                names = get_player_names([row["to_player_id"] for row in rows])
+                for row in rows:
+                    queue_notice(
+                        [row["from_player_id"]],
+                        describe(row, names.get(row["to_player_id"], "another player")),
+                    )
+        return swept
+
+
+WORLD_SCHEDULER = WorldTickScheduler()
@@ -0,0 +1,111 @@
+"""
+Benchmark: validating and dispatching one action payload.
+
+Compares the way apply_action used to pick an action with the registry:
+
+- union:    TypeAdapter over a plain Union of the request models (pydantic
+            tries the members until one validates), then an if/elif chain
+            over the action names.
+- registry: TypeAdapter discriminated on `action`, then ACTIONS[req.action].
+
+Handlers aren't run; only validation and finding the handler are timed,
+over payloads for every action plus some invalid ones. Also times
+parse_command with the registry's verb table.
+
+Run from server_py/:  python benchmarks/bench_action_dispatch.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import Any, Callable, List, Union
+
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.engine.parse_command import parse_command  # noqa: E402
+from app.engine.registry import load_actions, validate_request  # noqa: E402
+
+
+ROUNDS = 2000
+
+PAYLOADS: List[Any] = [
+    {"action": "create_player", "args": {"name": "Arlen"}},
+    {"action": "look"},
+    {"action": "move", "args": {"to": "north"}},
+    {"action": "attack", "args": {"target": "rat"}},
+    {"action": "stats"},
+    {"action": "inventory"},
+    {"action": "use", "args": {"item": "healing_herb"}},
+    {"action": "talk", "args": {"target": "elder"}},
+    {"action": "buy", "args": {"item": "sword"}},
+    {"action": "accept_quest", "args": {"quest_id": "rat_problem"}},
+    {"action": "turn_in_quest", "args": {"quest_id": "rat_problem"}},
+    {"action": "offer_trade", "args": {"to_player": "Bo", "offer_items": {"sword": 1}, "request_items": {"coin": 5}}},
+    {"action": "accept_trade", "args": {"trade_id": "t1"}},
+    {"action": "list_trades", "args": {"limit": 10}},
+    {"action": "cancel_trade", "args": {"trade_id": "t1"}},
+    {"action": "party_invite", "args": {"target_player": "Bo"}},
+    {"action": "accept_party_invite", "args": {"invite_id": "i1"}},
+    {"action": "leave_party"},
+    {"action": "party_status"},
+    {"action": "reputation"},
+    {"action": "place_order", "args": {"item": "ore", "side": "buy", "price": 5, "quantity": 2}},
+    {"action": "cancel_order", "args": {"order_id": 3}},
+    {"action": "market_book", "args": {"item": "ore"}},
+    {"action": "market_orders"},
+    # Invalid: unknown action, missing args, wrong type
+    {"action": "dance"},
+    {"action": "move"},
+    {"action": "cancel_order", "args": {"order_id": "x"}},
+]
+
+COMMANDS = ["look", "go north", "attack rat", "stats", "market buy 2 ore at 5", "party invite Bo", "offer Bo sword:1 for coin:5"]
+
+
+def union_dispatch() -> Callable[[Any], Any]:
+    actions = load_actions()
+    adapter = TypeAdapter(Union[tuple(spec.request for spec in actions.values())])
+    names = list(actions)
+
+    def run(payload: Any) -> Any:
+        req = adapter.validate_python(payload)
+        for name in names:  # The old if/elif chain
+            if req.action == name:
+                return actions[name].handler
+        return None
+    return run
+
+
+def registry_dispatch() -> Callable[[Any], Any]:
+    actions = load_actions()
+
+    def run(payload: Any) -> Any:
+        return actions[validate_request(payload).action].handler
+    return run
+
+
+def time_per_request(fn: Callable[[Any], Any], inputs: List[Any]) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for item in inputs:
+            try:
+                fn(item)
+            except Exception:
+                pass
+    return (time.perf_counter() - start) / (ROUNDS * len(inputs)) * 1e6
+
+
+def main() -> None:
+    print(f"{len(load_actions())} actions, {len(PAYLOADS)} payloads x {ROUNDS} rounds")
+    for name, fn in (("union", union_dispatch()), ("registry", registry_dispatch())):
+        fn(PAYLOADS[0])  # Warm up
+        print(f"  {name:9s} validate+dispatch {time_per_request(fn, PAYLOADS):6.2f} us/request")
+    print(f"  parse_command             {time_per_request(parse_command, COMMANDS):6.2f} us/command")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: latency for ordinary players while bots hammer /command.
+
+Drives the ASGI app in-process with httpx. BOTS clients, each from its own
+IP, send movement commands back to back; PLAYERS ordinary players (sharing
+one IP, like a household behind NAT) send a command every
+PLAYER_INTERVAL_SECONDS. Runs once with admission control off and once on,
+and prints the ordinary players' latency, the bots' accepted rate and the
+admission metrics.
+
+Run from server_py/:  python benchmarks/bench_admission_control.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.rate_limit import ADMISSION  # noqa: E402
+
+
+BOTS = 4
+PLAYERS = 16
+PLAYER_INTERVAL_SECONDS = 0.5
+DURATION_SECONDS = 6.0
+
+
+def client_for(ip: str) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, client=(ip, 40000))
+    return httpx.AsyncClient(transport=transport, base_url="http://bench")
+
+
+async def create(client: httpx.AsyncClient, name: str) -> str:
+    r = await client.post("/command", json={"text": f"create {name}"})
+    return r.json()["state"]["player"]["player_id"]
+
+
+async def bot_loop(client: httpx.AsyncClient, player_id: str, deadline: float, counts: dict) -> None:
+    moves = ["go north", "go south"]
+    i = 0
+    while time.monotonic() < deadline:
+        r = await client.post("/command", json={"text": moves[i % 2]}, headers={"x-player-id": player_id})
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+        i += 1
+        if r.status_code == 429:
+            await asyncio.sleep(0)  # A rude bot retries immediately
+
+
+async def player_loop(client: httpx.AsyncClient, player_id: str, deadline: float, samples: list, counts: dict) -> None:
+    commands = ["look", "go north", "stats", "go south"]
+    i = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        r = await client.post("/command", json={"text": commands[i % len(commands)]}, headers={"x-player-id": player_id})
+        samples.append((time.perf_counter() - start) * 1000)
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+        i += 1
+        await asyncio.sleep(PLAYER_INTERVAL_SECONDS)
+
+
+async def run(enabled: bool) -> None:
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_admission.sqlite")
+    ADMISSION.enabled = False  # Setup isn't rate limited
+    async with app.router.lifespan_context(app):
+        home = client_for("10.0.0.1")
+        bots = [client_for(f"10.1.0.{i + 1}") for i in range(BOTS)]
+        player_ids = [await create(home, f"Player{i}") for i in range(PLAYERS)]
+        bot_ids = [await create(bot, f"Bot{i}") for i, bot in enumerate(bots)]
+
+        ADMISSION.enabled = enabled
+        bot_counts: dict = {}
+        player_counts: dict = {}
+        samples: list = []
+        deadline = time.monotonic() + DURATION_SECONDS
+        await asyncio.gather(
+            *(bot_loop(bot, pid, deadline, bot_counts) for bot, pid in zip(bots, bot_ids)),
+            *(player_loop(home, pid, deadline, samples, player_counts) for pid in player_ids),
+        )
+        for client in [home, *bots]:
+            await client.aclose()
+
+    samples.sort()
+    print(f"admission control {'on' if enabled else 'off'}:")
+    print(f"  players: p50 {statistics.median(samples):8.1f} ms  p99 {samples[int(len(samples) * 0.99) - 1]:8.1f} ms  "
+          f"max {samples[-1]:8.1f} ms  status {player_counts}")
+    print(f"  bots:    {bot_counts.get(200, 0) / DURATION_SECONDS:.0f} commands/s accepted, status {bot_counts}")
+    if enabled:
+        print(f"  admission: {ADMISSION.metrics}")
+
+
+async def main() -> None:
+    print(f"{BOTS} bots, {PLAYERS} players every {PLAYER_INTERVAL_SECONDS}s, {DURATION_SECONDS:.0f}s per run")
+    await run(enabled=False)
+    await run(enabled=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
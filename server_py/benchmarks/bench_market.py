@@ -0,0 +1,138 @@
+"""
+Benchmark: market order book with 100k resting orders.
+
+Seeds market_orders with 100k open asks and bids for one item, rebuilds the
+book the way startup does, then measures:
+  - matching alone: the heap book vs. a linear scan for the best price
+  - place_order end to end (match + one SQLite transaction), for orders
+    that rest without crossing and orders that fill against the book
+
+Run from server_py/:  python benchmarks/bench_market.py
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import db, market  # noqa: E402
+from app.market import MARKET  # noqa: E402
+from app.types import Player  # noqa: E402
+
+
+RESTING_ORDERS = 100_000
+MAKERS = 1_000
+ITEM = "healing_herb"
+ROUNDS = 500
+
+
+def seed() -> tuple:
+    """Open asks priced 1001-2000 and bids priced 1-1000, plus a funded taker and bidder."""
+    rng = random.Random(7)
+    now = int(time.time() * 1000)
+    rows = []
+    for i in range(RESTING_ORDERS):
+        side = "sell" if i % 2 else "buy"
+        price = rng.randint(1001, 2000) if side == "sell" else rng.randint(1, 1000)
+        qty = rng.randint(1, 20)
+        rows.append((f"maker_{i % MAKERS}", ITEM, side, price, qty, qty, "open", now, now))
+    makers = [
+        Player(player_id=f"maker_{i}", name=f"Maker{i}", location="town_square",
+               level=1, xp=0, hp=10, max_hp=10)
+        for i in range(MAKERS)
+    ]
+    taker, bidder = (
+        Player(
+            player_id=name.lower(), name=name, location="town_square", level=1, xp=0, hp=10, max_hp=10,
+            inventory={"coin": 10**12, ITEM: 10**9},
+        )
+        for name in ("Taker", "Bidder")
+    )
+    db.upsert_players(makers + [taker, bidder])
+    conn = db.get_conn()
+    try:
+        conn.executemany(
+            """
+            INSERT INTO market_orders (
+              player_id, item, side, price, quantity, remaining, status, created_at, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return taker, bidder
+
+
+def linear_best_ask(orders: list) -> dict:
+    """Baseline: scan every resting ask for the lowest price, oldest first."""
+    best = None
+    for order in orders:
+        if order["side"] == "sell" and (best is None or (order["price"], order["order_id"]) < (best["price"], best["order_id"])):
+            best = order
+    return best
+
+
+def timed(fn, rounds: int) -> list:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list) -> None:
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"  {label:<34} p50 {statistics.median(samples):8.3f} ms   p99 {p99:8.3f} ms")
+
+
+def main() -> None:
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_market.sqlite")
+    db.init_db()
+    taker, bidder = seed()
+    # The bidder rests every bid (the taker would self-cross them); lift the per-player cap for the run
+    market.MAX_OPEN_ORDERS_PER_PLAYER = 10**9
+
+    start = time.perf_counter()
+    MARKET.load()
+    print(f"Rebuilt book of {RESTING_ORDERS} orders in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    book, _ = MARKET._book(ITEM)
+    rows = db.load_open_market_orders()
+    print("Matching only (no database):")
+    report("linear scan for best ask", timed(lambda: linear_best_ask(rows), 20))
+
+    def heap_match():
+        fills, popped = book.match("buy", 2000, 5, "taker")
+        book.restore("buy", popped)
+    report("heap match (5 units)", timed(heap_match, ROUNDS))
+
+    print("\nplace_order end to end:")
+    rng = random.Random(11)
+    report("resting bid (no cross)", timed(
+        lambda: MARKET.place_order(bidder, ITEM, "buy", rng.randint(1, 1000), 1), ROUNDS
+    ))
+    report("crossing buy (fills 1-3 asks)", timed(
+        lambda: MARKET.place_order(taker, ITEM, "buy", 2000, rng.randint(1, 30)), ROUNDS
+    ))
+    report("crossing sell (fills 1-3 bids)", timed(
+        lambda: MARKET.place_order(taker, ITEM, "sell", 1, rng.randint(1, 30)), ROUNDS
+    ))
+
+    summary = MARKET.book_summary(ITEM)
+    print(f"\nBook after run: {summary['open_orders']} open orders, "
+          f"best bid {summary['bids'][0]['price']}, best ask {summary['asks'][0]['price']}")
+
+
+if __name__ == "__main__":
+    main()
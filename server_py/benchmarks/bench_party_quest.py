@@ -0,0 +1,115 @@
+"""
+Benchmark: party quest fan-out for 2, 8 and 50 member parties.
+
+Compares the previous per-member path (get_player + upsert_player, one
+connection and commit per member, scanning every active quest) against the
+path used by attack.update_quest_progress and accept_quest (objective
+index, one bulk load, one executemany).
+
+Run from server_py/:  python benchmarks/bench_party_quest.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from copy import deepcopy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import db  # noqa: E402
+from app.engine.actions.accept_quest import accept_quest  # noqa: E402
+from app.engine.actions.attack import update_quest_progress  # noqa: E402
+from app.party_registry import PARTY_REGISTRY  # noqa: E402
+from app.quest_progress import QUEST_INDEX  # noqa: E402
+from app.types import Player  # noqa: E402
+from app.world_quests import QUEST_TEMPLATES  # noqa: E402
+
+
+PARTY_SIZES = (2, 8, 50)
+ROUNDS = 20
+QUEST_ID = "rat_problem"
+
+
+def make_party(size: int) -> Player:
+    """Create a party whose members all hold a kill quest that never completes."""
+    members = []
+    for i in range(size):
+        quest = deepcopy(QUEST_TEMPLATES[QUEST_ID])
+        quest.status = "accepted"
+        quest.objectives[0].required = 10**9
+        members.append(Player(
+            player_id=f"p{size}_{i}", name=f"P{size}_{i}", location="forest",
+            level=1, xp=0, hp=10, max_hp=10, active_quests={QUEST_ID: quest},
+        ))
+    db.upsert_players(members)
+    leader = members[0]
+    db.create_party(f"party_{size}", leader.player_id)
+    for member in members[1:]:
+        db.add_party_member(f"party_{size}", member.player_id)
+    return leader
+
+
+def scan_kill_progress(p: Player, target_name: str) -> None:
+    """The previous progress check: scan every objective of every active quest."""
+    for quest in p.active_quests.values():
+        if quest.status != "accepted":
+            continue
+        for objective in quest.objectives:
+            if objective.type == "kill" and objective.target.lower() == target_name.lower():
+                if objective.progress < objective.required:
+                    objective.progress += 1
+                break
+
+
+def per_member_kill(player: Player, target_name: str) -> None:
+    """The previous fan-out: one get_player and one upsert_player per member."""
+    scan_kill_progress(player, target_name)
+    party = db.get_player_party(player.player_id)
+    for member_id in party["members"]:
+        if member_id == player.player_id:
+            continue
+        member = db.get_player(member_id)
+        scan_kill_progress(member, target_name)
+        db.upsert_player(member)
+
+
+def median_ms(fn, rounds: int = ROUNDS) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def main() -> None:
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db.init_db()
+    PARTY_REGISTRY.load()
+
+    print(f"{'members':>8} {'kill per-member':>16} {'kill bulk':>10} {'accept bulk*':>13}")
+    for size in PARTY_SIZES:
+        leader = make_party(size)
+        QUEST_INDEX.load()  # Quests were written directly, not through accept_quest
+        per_member = median_ms(lambda: per_member_kill(leader, "Rat"))
+        bulk = median_ms(lambda: update_quest_progress(leader, "Rat"))
+
+        def accept() -> None:
+            # Reset everyone so the quest is shared with the whole party each round
+            members = db.get_players(db.get_player_party(leader.player_id)["members"])
+            for m in members:
+                m.active_quests.pop(QUEST_ID, None)
+            db.upsert_players(members)
+            accept_quest(members[0], QUEST_ID)
+        accept_ms = median_ms(accept)
+
+        print(f"{size:>8} {per_member:>14.2f}ms {bulk:>8.2f}ms {accept_ms:>11.2f}ms")
+    print("* includes resetting every member's quest before each accept")
+
+
+if __name__ == "__main__":
+    main()
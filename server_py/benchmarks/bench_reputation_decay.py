@@ -0,0 +1,88 @@
+"""
+Benchmark: re-tier decayed reputation standing for 100,000 (player, faction)
+rows in one set-based UPDATE, and time O(1) standing reads.
+
+Run from server_py/:  python benchmarks/bench_reputation_decay.py
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import db  # noqa: E402
+from app.factions import FACTIONS, REPUTATION_HALF_LIFE_TURNS  # noqa: E402
+
+
+PLAYER_COUNT = 25_000  # x 4 factions = 100,000 standing rows
+READS = 10_000
+
+
+def seed(conn) -> None:
+    rng = random.Random(7)
+    now = int(time.time() * 1000)
+    rows = []
+    for i in range(PLAYER_COUNT):
+        for faction_id in FACTIONS:
+            total = rng.randint(-150, 150)
+            rows.append((f"player_{i}", faction_id, total, now, float(total), rng.randint(0, 1000)))
+    conn.executemany(
+        """
+        INSERT INTO reputation_totals (player_id, faction_id, total, updated_at, standing, standing_turn)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    conn.execute("UPDATE world_clock SET current_turn = 1000")
+    conn.commit()
+
+
+def main() -> None:
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db.init_db()
+    conn = db.get_conn()
+    try:
+        seed(conn)
+    finally:
+        conn.close()
+
+    started = time.perf_counter()
+    changed = db.recompute_reputation_tiers()
+    first_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    unchanged = db.recompute_reputation_tiers()
+    second_ms = (time.perf_counter() - started) * 1000
+
+    conn = db.get_conn()
+    try:
+        conn.execute(f"UPDATE world_clock SET current_turn = {1000 + REPUTATION_HALF_LIFE_TURNS}")
+        conn.commit()
+    finally:
+        conn.close()
+    started = time.perf_counter()
+    drifted = db.recompute_reputation_tiers()
+    drift_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(11)
+    faction_ids = list(FACTIONS)
+    started = time.perf_counter()
+    for _ in range(READS):
+        db.calculate_standing(f"player_{rng.randrange(PLAYER_COUNT)}", rng.choice(faction_ids))
+    read_us = (time.perf_counter() - started) / READS * 1_000_000
+
+    rows = PLAYER_COUNT * len(FACTIONS)
+    print(f"rows={rows}")
+    print(f"initial recompute: {first_ms:.1f}ms ({len(changed)} tier changes)")
+    print(f"idle recompute:    {second_ms:.1f}ms ({len(unchanged)} tier changes)")
+    print(f"after one half-life: {drift_ms:.1f}ms ({len(drifted)} tier changes)")
+    print(f"calculate_standing: {read_us:.0f}us per read")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: /health latency while /command traffic saturates the database.
+
+Drives the ASGI app in-process with httpx: CLIENTS concurrent players
+spam movement commands while a probe hits /health every few ms. Game
+work runs on the dedicated executor, so health checks are answered by
+the event loop without waiting behind sqlite. Prints probe latency,
+command throughput and the executor's queue metrics.
+
+Run from server_py/:  python benchmarks/bench_request_executor.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import db  # noqa: E402
+from app.executor import GAME_EXECUTOR  # noqa: E402
+from app.main import app  # noqa: E402
+from app.rate_limit import ADMISSION  # noqa: E402
+
+
+CLIENTS = 64
+DURATION_SECONDS = 5.0
+PROBE_INTERVAL_SECONDS = 0.01
+
+
+async def player_loop(client: httpx.AsyncClient, player_id: str, deadline: float, counts: dict) -> None:
+    moves = ["go north", "go south"]
+    i = 0
+    while time.monotonic() < deadline:
+        r = await client.post("/command", json={"text": moves[i % 2]}, headers={"x-player-id": player_id})
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+        i += 1
+
+
+async def probe_loop(client: httpx.AsyncClient, deadline: float, samples: list) -> None:
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        await client.get("/health")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+
+
+async def main() -> None:
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_executor.sqlite")
+    # Measure the executor itself; rate limiting would turn most commands away
+    ADMISSION.enabled = False
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            player_ids = []
+            for i in range(CLIENTS):
+                r = await client.post("/command", json={"text": f"create Bench{i}"})
+                player_ids.append(r.json()["state"]["player"]["player_id"])
+
+            counts: dict = {}
+            samples: list = []
+            deadline = time.monotonic() + DURATION_SECONDS
+            await asyncio.gather(
+                probe_loop(client, deadline, samples),
+                *(player_loop(client, pid, deadline, counts) for pid in player_ids),
+            )
+
+    samples.sort()
+    total = sum(counts.values())
+    print(f"{CLIENTS} clients for {DURATION_SECONDS:.0f}s: {total} commands ({total / DURATION_SECONDS:.0f}/s), status codes {counts}")
+    print(f"/health p50 {statistics.median(samples):.2f} ms  p99 {samples[int(len(samples) * 0.99) - 1]:.2f} ms  ({len(samples)} probes)")
+    print(f"executor: {GAME_EXECUTOR.metrics}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+Benchmark: command throughput with 1, 2 and 4 location shards.
+
+Seeds PLAYERS players spread evenly over every location, starts the shard
+router with N shard processes and has CLIENTS threads send commands
+through it for DURATION_SECONDS: mostly look/stats/inventory, plus a
+round-trip move every MOVE_EVERY commands so players are handed off
+between shards. Each shard applies its commands one at a time, so
+throughput should grow with the shard count until the machine runs out
+of cores (or SQLite's single writer becomes the bottleneck).
+
+Run from server_py/:  python benchmarks/bench_sharding.py [shard counts...]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import db  # noqa: E402
+from app.sharding import SHARD_ROUTER, ShardError  # noqa: E402
+from app.types import Player  # noqa: E402
+from app.world import WORLD  # noqa: E402
+
+
+PLAYERS = 200
+CLIENTS = 16
+DURATION_SECONDS = 8.0
+MOVE_EVERY = 20
+PASSIVE = [{"action": "look"}, {"action": "stats"}, {"action": "inventory"}]
+
+
+def seed() -> list:
+    locations = list(WORLD)
+    players = [
+        Player(
+            player_id=f"bench_{i}", name=f"Bench{i}", location=locations[i % len(locations)],
+            level=1, xp=0, hp=10, max_hp=10,
+        )
+        for i in range(PLAYERS)
+    ]
+    db.upsert_players(players)
+    return players
+
+
+def client_loop(players: list, deadline: float, counts: list, index: int) -> None:
+    done = errors = 0
+    i = 0
+    while time.monotonic() < deadline:
+        player = players[i % len(players)]
+        if i % MOVE_EVERY == 0:
+            # There and back again, so the population stays spread out
+            exits = WORLD[player.location].exits
+            commands = [
+                {"action": "move", "args": {"to": exits[0].to}},
+                {"action": "move", "args": {"to": player.location}},
+            ]
+        else:
+            commands = [PASSIVE[i % len(PASSIVE)]]
+        for command in commands:
+            try:
+                SHARD_ROUTER.execute(player.player_id, command)
+                done += 1
+            except ShardError:
+                errors += 1
+        i += 1
+    counts[index] = (done, errors)
+
+
+def run(shard_count: int) -> float:
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(), f"bench_shards_{shard_count}.sqlite")
+    db.init_db()
+    players = seed()
+    SHARD_ROUTER.start(shard_count)
+    try:
+        # Warm up: every shard has imported everything and opened the database
+        for player in players[: len(WORLD)]:
+            SHARD_ROUTER.execute(player.player_id, {"action": "look"})
+
+        counts: list = [None] * CLIENTS
+        deadline = time.monotonic() + DURATION_SECONDS
+        threads = [
+            threading.Thread(target=client_loop, args=(players[i::CLIENTS], deadline, counts, i))
+            for i in range(CLIENTS)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        metrics = dict(SHARD_ROUTER.metrics)
+    finally:
+        SHARD_ROUTER.stop()
+
+    done = sum(c[0] for c in counts)
+    errors = sum(c[1] for c in counts)
+    rate = done / DURATION_SECONDS
+    print(
+        f"  {shard_count} shard(s): {rate:8.0f} commands/s  "
+        f"({done} commands, {errors} errors, {metrics['handoffs']} handoffs, routed {metrics['routed']})"
+    )
+    return rate
+
+
+def main() -> None:
+    shard_counts = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4]
+    print(f"{PLAYERS} players, {CLIENTS} clients, {DURATION_SECONDS:.0f}s per run, {os.cpu_count()} CPUs")
+    rates = {n: run(n) for n in shard_counts}
+    base = rates[shard_counts[0]]
+    for n, rate in rates.items():
+        print(f"  {n} shard(s): {rate / base:.2f}x the {shard_counts[0]}-shard throughput")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: evaluate 1,000 compiled DSL rules against one world snapshot.
+
+Run from server_py/:  python benchmarks/bench_world_rules.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from types import MappingProxyType
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.rule_dsl import compile_rules  # noqa: E402
+from app.world_rules import WorldBatch, WorldSnapshot  # noqa: E402
+from app.world_scheduler import TICK_BUDGET_SECONDS  # noqa: E402
+
+
+RULE_COUNT = 1000
+ROUNDS = 20
+
+
+def make_rules(n: int) -> dict:
+    rules = []
+    for i in range(n):
+        rules.append({
+            "id": f"rule_{i}",
+            "name": f"Rule {i}",
+            "location": "forest",
+            "when": {"all": [
+                {"counter": f"counter_{i % 50}", "op": ">=", "value": i % 20},
+                {"any": [
+                    {"monsters": {"location": "forest", "match": "rat"}, "op": "==", "value": 0},
+                    {"turns_since": f"cleared_{i % 10}", "op": ">=", "value": 20},
+                ]},
+                {"not": {"state": f"flag_{i}", "op": "==", "value": "true"}},
+            ]},
+            "then": [
+                {"set": {f"flag_{i}": "true"}},
+                {"emit": {"event_type": "world_evolution", "location": "forest", "data": {"rule": i}}},
+            ],
+        })
+    return {"rules": rules}
+
+
+def main() -> None:
+    started = time.perf_counter()
+    rules = compile_rules(make_rules(RULE_COUNT))
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    snapshot = WorldSnapshot(
+        turn=100,
+        state=MappingProxyType({f"cleared_{i}": str(i) for i in range(10)}),
+        monsters=MappingProxyType({"forest": ("rat_1",)}),
+        counters=MappingProxyType({f"counter_{i}": i for i in range(50)}),
+    )
+
+    timings = []
+    fired = 0
+    for _ in range(ROUNDS):
+        batch = WorldBatch()
+        started = time.perf_counter()
+        fired = sum(1 for rule in rules if rule.evaluate(snapshot, batch))
+        timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    median_ms = timings[len(timings) // 2] * 1000
+    budget_ms = TICK_BUDGET_SECONDS * 1000
+    print(f"compiled {RULE_COUNT} rules in {compile_ms:.1f}ms")
+    print(f"evaluated {RULE_COUNT} rules ({fired} fired): median {median_ms:.2f}ms, "
+          f"max {timings[-1] * 1000:.2f}ms over {ROUNDS} rounds")
+    print(f"tick budget {budget_ms:.0f}ms: {'OK' if timings[-1] * 1000 <= budget_ms else 'OVER BUDGET'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Stress test: concurrent trade accepts, offers and shop purchases must
+conserve items.
+
+Several threads per player race to accept the same offers while others
+create offers and buy from the shop. Afterwards every item must be
+accounted for: trades only move items, and each successful purchase turns
+exactly SHOP_PRICE coins into one healing_herb. Lost updates or double
+settlement show up as a mismatch.
+
+Run from server_py/:  python benchmarks/stress_trade_settlement.py
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import db  # noqa: E402
+from app.engine.apply_action import apply_action  # noqa: E402
+from app.types import Player  # noqa: E402
+from app.world_entities import WORLD_ENTITIES  # noqa: E402
+
+
+PLAYER_COUNT = 6
+THREADS_PER_ROLE = 4
+DURATION_SECONDS = 5.0
+START_COINS = 200
+START_HERBS = 50
+SHOP_PRICE = next(
+    e.inventory["healing_herb"]["price"] for e in WORLD_ENTITIES["town_square"] if e.role == "shop"
+)
+
+
+def totals() -> dict:
+    players = db.get_players([f"p{i}" for i in range(PLAYER_COUNT)])
+    return {
+        "coin": sum(p.inventory.get("coin", 0) for p in players),
+        "healing_herb": sum(p.inventory.get("healing_herb", 0) for p in players),
+    }
+
+
+def main() -> None:
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(), "stress.db")
+    db.init_db()
+    names = [f"Trader{i}" for i in range(PLAYER_COUNT)]
+    for i, name in enumerate(names):
+        db.upsert_player(Player(
+            player_id=f"p{i}", name=name, location="town_square", level=1, xp=0, hp=10, max_hp=10,
+            inventory={"coin": START_COINS, "healing_herb": START_HERBS},
+        ))
+    before = totals()
+
+    stop = time.monotonic() + DURATION_SECONDS
+    lock = threading.Lock()
+    counts = {"buys": 0, "offers": 0, "accepts": 0, "accept_failures": 0, "conflicts": 0}
+
+    def bump(key: str) -> None:
+        with lock:
+            counts[key] += 1
+
+    def act(player_id: str, action: dict):
+        result = apply_action(player_id=player_id, req_json=action)
+        if result.error and "Please try again" in result.error:
+            bump("conflicts")
+        return result
+
+    def offerer(rng: random.Random) -> None:
+        while time.monotonic() < stop:
+            i, j = rng.sample(range(PLAYER_COUNT), 2)
+            offer = {rng.choice(["coin", "healing_herb"]): rng.randint(1, 5)}
+            request = {rng.choice(["coin", "healing_herb"]): rng.randint(1, 5)}
+            result = act(f"p{i}", {"action": "offer_trade", "args": {
+                "to_player": names[j], "offer_items": offer, "request_items": request,
+            }})
+            if result.ok:
+                bump("offers")
+
+    def accepter(rng: random.Random) -> None:
+        while time.monotonic() < stop:
+            player_id = f"p{rng.randrange(PLAYER_COUNT)}"
+            trades = db.get_pending_trades_for_player(player_id)
+            if not trades:
+                time.sleep(0.001)
+                continue
+            result = act(player_id, {"action": "accept_trade", "args": {"trade_id": rng.choice(trades)["trade_id"]}})
+            bump("accepts" if result.ok else "accept_failures")
+
+    def buyer(rng: random.Random) -> None:
+        while time.monotonic() < stop:
+            result = act(f"p{rng.randrange(PLAYER_COUNT)}", {"action": "buy", "args": {"item": "healing_herb"}})
+            if result.ok:
+                bump("buys")
+
+    threads = [
+        threading.Thread(target=role, args=(random.Random(n * 10 + k),))
+        for n, role in enumerate((offerer, accepter, accepter, buyer))
+        for k in range(THREADS_PER_ROLE)
+    ]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    after = totals()
+    expected = {
+        "coin": before["coin"] - SHOP_PRICE * counts["buys"],
+        "healing_herb": before["healing_herb"] + counts["buys"],
+    }
+    print(f"threads={len(threads)} duration={DURATION_SECONDS}s {counts}")
+    print(f"before={before} after={after} expected={expected}")
+    if after != expected:
+        print("FAIL: items were created or destroyed")
+        sys.exit(1)
+    print("OK: items conserved")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,62 @@ export type CommandResponse = {
   messages?: string[];
   state?: any;
   error?: string;
+  retryable?: boolean;
 };
 
+export type Catalog = {
+  hash: string;
+  locations: Record<string, any>;
+  items: Record<string, any>;
+  factions: Record<string, any>;
+};
+
+const CATALOG_KEY = "world_catalog";
+let catalog: Catalog | null = null;
+
+/**
+ * Static world data (locations, exits, items, factions). Cached in memory
+ * and localStorage; refetched only when a response carries a different
+ * catalog_hash, and revalidated with If-None-Match so an unchanged
+ * catalog costs a 304.
+ */
+export async function loadCatalog(hash?: string): Promise<Catalog> {
+  if (!catalog && typeof localStorage !== "undefined") {
+    const saved = localStorage.getItem(CATALOG_KEY);
+    if (saved) catalog = JSON.parse(saved);
+  }
+  if (catalog && (!hash || catalog.hash === hash)) return catalog;
+
+  const res = await fetch(`${SERVER}/world/catalog`, {
+    headers: catalog ? { "if-none-match": `"${catalog.hash}"` } : {},
+  });
+  if (res.status === 304 && catalog) return catalog;
+  catalog = (await res.json()) as Catalog;
+  if (typeof localStorage !== "undefined") {
+    localStorage.setItem(CATALOG_KEY, JSON.stringify(catalog));
+  }
+  return catalog;
+}
+
+/** Fill in location names, descriptions and exits from the catalog. */
+async function withCatalog(resp: CommandResponse): Promise<CommandResponse> {
+  const state = resp.state;
+  if (!state?.catalog_hash) return resp;
+  const { locations } = await loadCatalog(state.catalog_hash);
+  const resolve = (loc: any) => (loc ? { ...locations[loc.id], ...loc } : loc);
+  return {
+    ...resp,
+    state: {
+      ...state,
+      location: resolve(state.location),
+      adjacent_scenes: state.adjacent_scenes?.map((scene: any) => ({
+        ...scene,
+        location: resolve(scene.location),
+      })),
+    },
+  };
+}
+
 export async function sendCommand(
   text: string,
   playerId?: string | null
@@ -21,5 +75,71 @@ export async function sendCommand(
     body: JSON.stringify({ text }),
   });
 
-  return await res.json();
-}
\ No newline at end of file
+  return withCatalog(await res.json());
+}
+
+export type PushEvent = {
+  type: "event";
+  event: "presence" | "trade_offer" | "party_invite" | "notice";
+  message: string;
+  data: any;
+};
+
+export type Session = {
+  sendCommand: (text: string) => Promise<CommandResponse>;
+  close: () => void;
+};
+
+/**
+ * Open a persistent /ws session for a player. Commands go over the socket
+ * and the server pushes events (arrivals, trade offers, invites, notices)
+ * as they happen, so the client never has to poll with `look`.
+ */
+export function openSession(
+  playerId: string,
+  onEvent: (event: PushEvent) => void,
+  onClose?: () => void
+): Promise<Session> {
+  const socket = new WebSocket(`${SERVER.replace(/^http/, "ws")}/ws`);
+  const pending = new Map<number, (resp: CommandResponse) => void>();
+  let nextId = 1;
+
+  return new Promise((resolve, reject) => {
+    socket.onopen = () => {
+      socket.send(JSON.stringify({ type: "auth", player_id: playerId }));
+    };
+
+    socket.onmessage = (msg) => {
+      const data = JSON.parse(msg.data);
+      if (data.type === "welcome") {
+        resolve({
+          sendCommand(text: string) {
+            const id = nextId++;
+            socket.send(JSON.stringify({ type: "command", text, id }));
+            return new Promise((done) => pending.set(id, done));
+          },
+          close() {
+            socket.close();
+          },
+        });
+      } else if (data.type === "result") {
+        const done = pending.get(data.id);
+        pending.delete(data.id);
+        withCatalog(data.result).then((resp) => done?.(resp));
+      } else if (data.type === "event") {
+        onEvent(data);
+      } else if (data.type === "error") {
+        reject(new Error(data.error));
+      }
+    };
+
+    socket.onerror = () => reject(new Error("session failed"));
+    socket.onclose = () => {
+      for (const done of pending.values()) {
+        done({ ok: false, error: "connection closed" });
+      }
+      pending.clear();
+      onClose?.();
+    };
+  });
+}
@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useRef, useState } from "react";
-import { sendCommand } from "./lib/api";
+import { sendCommand, openSession, PushEvent, Session } from "./lib/api";
 import { generateSceneImage } from "./lib/gemini";
 import { buildScenePrompt } from "./lib/scene";
 
@@ -189,6 +189,18 @@ function StatusPane({state, onCommand}: {state: any | null; onCommand: (cmd: str
               )}
             </div>
           ))}
+
+          {/* State only carries the oldest few offers each way */}
+          {state.pending_trade_counts &&
+            state.pending_trade_counts.received + state.pending_trade_counts.sent >
+              (state.pending_trade_offers?.length ?? 0) + (state.pending_trade_offers_sent?.length ?? 0) && (
+            <button
+              className="text-green-400 hover:underline text-xs"
+              onClick={() => onCommand('trades')}
+            >
+              Show all {state.pending_trade_counts.received + state.pending_trade_counts.sent} trades
+            </button>
+          )}
         </div>
       )}
 
@@ -247,6 +259,7 @@ export default function Page() {
   const [lastState, setLastState] = useState<any | null>(null);
   const [currentSceneKey, setCurrentSceneKey] = useState<string | null>(null);
   const inputRef = useRef<HTMLInputElement>(null);
+  const sessionRef = useRef<Session | null>(null);
 
   const bottomRef = useRef<HTMLDivElement>(null);
 
@@ -321,6 +334,64 @@ export default function Page() {
     })();
   }, [playerId]);
 
+  // Live session: server pushes arrivals, offers, invites and notices
+  useEffect(() => {
+    if (!playerId) return;
+    let closed = false;
+    let session: Session | null = null;
+
+    openSession(playerId, applyPushEvent, () => {
+      sessionRef.current = null;
+    })
+      .then((s) => {
+        if (closed) {
+          s.close();
+          return;
+        }
+        session = s;
+        sessionRef.current = s;
+      })
+      .catch(() => {
+        // Fall back to plain HTTP commands
+      });
+
+    return () => {
+      closed = true;
+      session?.close();
+      sessionRef.current = null;
+    };
+  }, [playerId]);
+
+  function applyPushEvent(event: PushEvent) {
+    setLog((l) => [...l, { id: crypto.randomUUID(), text: event.message }]);
+
+    setLastState((state: any) => {
+      if (!state) return state;
+      const data = event.data;
+      if (event.event === "presence" && data.location_id === state.location?.id) {
+        const others = (state.entities ?? []).filter((e: any) => e.id !== data.entity.id);
+        return {
+          ...state,
+          entities: data.change === "arrived" ? [...others, data.entity] : others,
+        };
+      }
+      if (event.event === "trade_offer") {
+        return {
+          ...state,
+          pending_trade_offers: [...(state.pending_trade_offers ?? []), data],
+          pending_trade_counts: state.pending_trade_counts && {
+            ...state.pending_trade_counts,
+            received: state.pending_trade_counts.received + 1,
+          },
+        };
+      }
+      if (event.event === "party_invite") {
+        return { ...state, party_invites: [...(state.party_invites ?? []), data] };
+      }
+      return state;
+    });
+  }
+
   // Auto-scroll log
   useEffect(() => {
     bottomRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -359,7 +430,12 @@ export default function Page() {
     ]);
 
     try {
-      const resp = await sendCommand(command, playerId);
+      // Character creation always goes over HTTP; a session is bound to one player
+      const isCreate = /^(create|new)\b/i.test(command.trim());
+      const resp =
+        sessionRef.current && !isCreate
+          ? await sessionRef.current.sendCommand(command)
+          : await sendCommand(command, playerId);
 
       if (resp.state) {
         setLastState(resp.state);